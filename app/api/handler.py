@@ -1,26 +1,267 @@
+import os
+import json
+import time
+import asyncio
+from typing import Optional
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from contextlib import asynccontextmanager
-from core.models.requests.ask_body import AskBody
-from app.core.config.supervisor import SupervisorAgent
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from app.api.limiter import ConcurrencyLimiter
+from app.core.cache.answer import AnswerCache
+from app.core.models.interface.triplestore import get_triplestore
+from app.core.models.requests.ask_body import AskBody
+from app.core.config.metrics import ASK_SLOTS, REGISTRY, REQUEST_SECONDS
+from app.core.config.supervisor import (
+    SUPERVISOR_NAME,
+    get_session_supervisor,
+    get_supervisor,
+)
+from app.core.config.trace import Trace, TraceStore
+from app.core.config.utils import arun_graph, astream_graph
+from app.core.config.warmup import Readiness
+
+# histórico das sessões (checkpoints do LangGraph)
+SESSIONS_DB = os.getenv("SESSIONS_DB", "./sessions.sqlite")
+
+
+async def _boot(app: FastAPI) -> None:
+    def build() -> None:
+        app.state.graph = get_supervisor()
+        app.state.session_graph = get_session_supervisor(app.state.checkpointer)
+
+    await app.state.readiness.run_step("graph", build)
+    await app.state.readiness.warm_up()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.agent = SupervisorAgent()
-    yield
+    app.state.graph = None
+    app.state.session_graph = None
+    app.state.limiter = ConcurrencyLimiter()
+    app.state.answer_cache = AnswerCache()
+    app.state.traces = TraceStore()
+    app.state.readiness = Readiness()
+    async with AsyncSqliteSaver.from_conn_string(SESSIONS_DB) as checkpointer:
+        await checkpointer.setup()
+        app.state.checkpointer = checkpointer
+        # grafo e aquecimento dos modelos em segundo plano: "/" já responde
+        # (liveness) e /ready só fica OK no fim
+        boot = asyncio.create_task(_boot(app))
+        try:
+            yield
+        finally:
+            boot.cancel()
 
 
 app = FastAPI(lifespan=lifespan)
 
 
+class SlotStreamingResponse(StreamingResponse):
+    """
+    Stream que devolve a vaga do limitador quando a resposta termina.
+
+    Se o cliente cair antes do primeiro chunk o gerador nunca roda e o
+    `finally` dele não executa; aqui a vaga é liberada de qualquer jeito.
+    """
+
+    def __init__(self, content, *, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+def _sse(event: dict) -> str:
+    name = event.pop("event")
+    return f"event: {name}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+def _payload(question: str) -> dict:
+    return {"messages": [{"role": "user", "content": question}]}
+
+
+def _graph(body: AskBody):
+    # com sessão o histórico vem do checkpoint; sem, cada pergunta é isolada
+    graph = app.state.session_graph if body.session_id else app.state.graph
+    if graph is None:
+        raise HTTPException(503, "warming up", headers={"Retry-After": "5"})
+    return graph
+
+
+async def _cached(body: AskBody) -> Optional[str]:
+    # respostas dependem do histórico da sessão: não usa o cache
+    if body.session_id:
+        return None
+    return await run_in_threadpool(app.state.answer_cache.get_exact, body.question)
+
+
+async def _similar(body: AskBody) -> tuple:
+    # chama o Ollama de embeddings: só dentro da vaga do limiter
+    if body.session_id:
+        return None, None
+    return await run_in_threadpool(app.state.answer_cache.get_similar, body.question)
+
+
+def _cached_stream(answer: str) -> StreamingResponse:
+    async def hit():
+        yield _sse({"event": "done", "answer": answer, "cached": True})
+
+    return StreamingResponse(hit(), media_type="text/event-stream")
+
+
 @app.get("/")
 def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+    readiness = app.state.readiness
+    return JSONResponse(readiness.status(), status_code=200 if readiness.ready else 503)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {**app.state.answer_cache.stats(), "sparql": get_triplestore().cache_stats()}
+
+
+@app.post("/cache/sparql/invalidate")
+def invalidate_sparql_cache():
+    # chamado pelo loader RDF depois de uma carga (só limpa este worker; nos
+    # outros o resultado antigo vale até SPARQL_CACHE_TTL)
+    store = get_triplestore()
+    store.invalidate()
+    return store.cache_stats()
+
+
+@app.get("/metrics")
+def metrics():
+    limiter = app.state.limiter.stats()
+    ASK_SLOTS.set(limiter["running"], state="running")
+    ASK_SLOTS.set(limiter["waiting"], state="waiting")
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/traces")
+def traces(limit: int = 20):
+    return app.state.traces.recent(limit)
+
+
+@app.get("/traces/{trace_id}")
+def trace_detail(trace_id: str):
+    trace = app.state.traces.get(trace_id)
+    if trace is None:
+        raise HTTPException(404, "trace not found")
+    return trace
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    await app.state.checkpointer.adelete_thread(session_id)
+    return {"deleted": session_id}
+
+
 @app.post("/ask")
-def ask(body: AskBody):
+async def ask(body: AskBody):
+    if not body.question:
+        raise HTTPException(400, "question required")
+    started = time.perf_counter()
+    cache = app.state.answer_cache
+    graph = _graph(body)
+    cached = await _cached(body)
+    trace = Trace(body.question)
+    if cached is None:
+        async with app.state.limiter.slot():
+            cached, vec = await _similar(body)
+            if cached is None:
+                status = "ok"
+                try:
+                    out = await arun_graph(
+                        graph, _payload(body.question), trace, body.session_id
+                    )
+                except Exception as e:
+                    status = "error"
+                    return {
+                        "answer": f"Erro ao processar: {str(e)}",
+                        "trace_id": trace.id,
+                    }
+                finally:
+                    app.state.traces.add(trace)
+                    REQUEST_SECONDS.observe(
+                        time.perf_counter() - started, endpoint="/ask", status=status
+                    )
+    if cached is not None:
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started, endpoint="/ask", status="cached"
+        )
+        return {"answer": cached, "cached": True}
+    if out and not body.session_id:
+        cache.put(body.question, out, vec)
+    response = {"answer": out, "trace_id": trace.id}
+    if body.session_id:
+        response["session_id"] = body.session_id
+    return response
+
+
+@app.post("/ask/stream")
+async def ask_stream(body: AskBody):
     if not body.question:
         raise HTTPException(400, "question required")
-    out = app.state.agent.call(body.question)
-    return {"answer": out}
+    cache = app.state.answer_cache
+    graph = _graph(body)
+    cached = await _cached(body)
+    if cached is not None:
+        return _cached_stream(cached)
+
+    # reserva a vaga antes de abrir o stream para ainda poder responder 429/503
+    started = time.perf_counter()
+    release = await app.state.limiter.hold()
+    try:
+        cached, vec = await _similar(body)
+    except BaseException:
+        release()
+        raise
+    if cached is not None:
+        release()
+        return _cached_stream(cached)
+    trace = Trace(body.question)
+
+    async def events():
+        status = "ok"
+        try:
+            async for event in astream_graph(
+                graph,
+                _payload(body.question),
+                supervisor_name=SUPERVISOR_NAME,
+                trace=trace,
+                session_id=body.session_id,
+            ):
+                if event["event"] == "done":
+                    if event["answer"] and not body.session_id:
+                        cache.put(body.question, event["answer"], vec)
+                    event["trace_id"] = trace.id
+                yield _sse(event)
+        except Exception as e:
+            status = "error"
+            yield _sse({"event": "error", "detail": str(e), "trace_id": trace.id})
+        finally:
+            release()
+            app.state.traces.add(trace)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started, endpoint="/ask/stream", status=status
+            )
+
+    return SlotStreamingResponse(
+        events(),
+        release=release,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,84 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+MAX_CONCURRENCY = int(os.getenv("ASK_MAX_CONCURRENCY", "8"))
+MAX_QUEUE = int(os.getenv("ASK_MAX_QUEUE", "32"))
+QUEUE_TIMEOUT = float(os.getenv("ASK_QUEUE_TIMEOUT", "30"))
+
+
+class ConcurrencyLimiter:
+    """
+    Limita quantas perguntas rodam ao mesmo tempo no worker.
+
+    Até `max_concurrency` requisições executam em paralelo; outras
+    `max_queue` esperam na fila por no máximo `queue_timeout` segundos.
+    Fila cheia -> 429; espera estourada -> 503.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_queue: int = MAX_QUEUE,
+        queue_timeout: float = QUEUE_TIMEOUT,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._running = 0
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
+
+    async def acquire(self) -> None:
+        if self._running + self._waiting >= self.max_concurrency + self.max_queue:
+            raise HTTPException(429, "too many requests", headers={"Retry-After": "1"})
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                503, "server busy", headers={"Retry-After": "5"}
+            ) from None
+        finally:
+            self._waiting -= 1
+        self._running += 1
+
+    def release(self) -> None:
+        self._running -= 1
+        self._sem.release()
+
+    async def hold(self):
+        """
+        Reserva uma vaga e devolve a função que a libera.
+
+        A função pode ser chamada mais de uma vez (gerador do stream e
+        resposta), mas só a primeira chamada devolve a vaga.
+        """
+        await self.acquire()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.release()
+
+        return release
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,156 @@
+import os
+import re
+import threading
+from typing import FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.cache.lru import TTLCache
+from app.core.config.router import normalize
+from app.core.models.interface.embedding import get_embeddings, index_version
+from app.core.tools.norms.bm25 import tokenize
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+# similaridade de cosseno mínima para reaproveitar a resposta de outra pergunta
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))
+
+
+def question_key(question: str) -> str:
+    text = re.sub(r"[^\w\s]", " ", normalize(question))
+    return " ".join(text.split())
+
+
+def citations(question: str) -> FrozenSet[str]:
+    """Números citados na pergunta (artigos, leis, resoluções, anos)."""
+    # tokenize já inclui "7183" para "7.183": só a forma sem separadores
+    return frozenset(t for t in tokenize(question) if t.isdigit())
+
+
+class AnswerCache:
+    """
+    Cache de respostas na frente do grafo do supervisor.
+
+    1ª camada: pergunta normalizada (minúsculas, sem acento/pontuação).
+    2ª camada: embedding da pergunta (nomic-embed-text) comparado com as
+    perguntas já respondidas; acima de `similarity` reaproveita a resposta,
+    desde que as duas citem os mesmos números ("art. 302" e "art. 303"
+    ficam quase idênticas no embedding, mas pedem respostas diferentes).
+
+    Entradas expiram por TTL, saem por LRU e tudo é descartado quando o
+    índice de normas muda (ver `index_version`).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = ANSWER_CACHE_SIZE,
+        ttl: float = ANSWER_CACHE_TTL,
+        similarity: float = ANSWER_CACHE_SIMILARITY,
+    ):
+        self.similarity = similarity
+        self._answers = TTLCache(maxsize=maxsize, ttl=ttl, on_evict=self._forget)
+        self._vectors: dict[str, np.ndarray] = {}
+        self._citations: dict[str, FrozenSet[str]] = {}
+        self._matrix: Optional[Tuple[List[str], np.ndarray]] = None
+        self._lock = threading.Lock()
+        self._version = index_version()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            if self._vectors.pop(key, None) is not None:
+                self._citations.pop(key, None)
+                self._matrix = None
+
+    def _check_version(self) -> None:
+        version = index_version()
+        if version != self._version:
+            self._version = version
+            self.invalidations += 1
+            self._answers.clear()
+
+    def _embed(self, question: str) -> Optional[np.ndarray]:
+        try:
+            vec = np.asarray(get_embeddings().embed_query(question), dtype=np.float32)
+        except Exception as e:
+            print(f"[AnswerCache] sem embedding, só cache exato: {e}")
+            return None
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else None
+
+    def _nearest(self, vec: np.ndarray, cited: FrozenSet[str]) -> Optional[str]:
+        """Pergunta mais parecida acima do limiar que cita os mesmos números."""
+        with self._lock:
+            if not self._vectors:
+                return None
+            if self._matrix is None:
+                keys = list(self._vectors)
+                self._matrix = (keys, np.stack([self._vectors[k] for k in keys]))
+            keys, matrix = self._matrix
+            sims = matrix @ vec
+            for i in np.argsort(-sims):
+                if sims[i] < self.similarity:
+                    break
+                if self._citations.get(keys[i]) == cited:
+                    return keys[i]
+        return None
+
+    def get_exact(self, question: str) -> Optional[str]:
+        """Só a 1ª camada: não calcula embedding."""
+        self._check_version()
+        answer = self._answers.get(question_key(question))
+        if answer is not None:
+            self.exact_hits += 1
+        return answer
+
+    def get_similar(self, question: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Só a 2ª camada (chama o modelo de embeddings). Retorna (resposta,
+        embedding); o embedding deve ser repassado para `put` para não
+        embutir a pergunta duas vezes.
+        """
+        vec = self._embed(question)
+        if vec is not None:
+            near = self._nearest(vec, citations(question))
+            answer = self._answers.get(near) if near else None
+            if answer is not None:
+                self.semantic_hits += 1
+                return answer, vec
+        self.misses += 1
+        return None, vec
+
+    def get(self, question: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """As duas camadas em sequência; ver `get_similar`."""
+        answer = self.get_exact(question)
+        if answer is not None:
+            return answer, None
+        return self.get_similar(question)
+
+    def put(self, question: str, answer: str, vec: Optional[np.ndarray] = None) -> None:
+        key = question_key(question)
+        self._answers.put(key, answer)
+        if vec is not None and key in self._answers:
+            with self._lock:
+                self._vectors[key] = vec
+                self._citations[key] = citations(question)
+                self._matrix = None
+
+    def clear(self) -> None:
+        self._answers.clear()
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        hits = self.exact_hits + self.semantic_hits
+        return {
+            "size": len(self._answers),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._answers.evictions,
+            "expirations": self._answers.expirations,
+            "invalidations": self.invalidations,
+        }
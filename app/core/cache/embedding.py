@@ -0,0 +1,168 @@
+import os
+import struct
+import hashlib
+import threading
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.cache.lru import TTLCache
+
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "./embedding_cache")
+# perguntas e consultas geradas pelo LLM: só em memória, LRU limitado
+EMBED_QUERY_CACHE_SIZE = int(os.getenv("EMBED_QUERY_CACHE_SIZE", "4096"))
+
+# registro: MAGIC | digest (16 bytes) | dim (uint32) | dim x float32
+_MAGIC = b"EMB1"
+_HEADER = struct.Struct("<4s16sI")
+
+
+def _digest(model: str, text: str) -> bytes:
+    return hashlib.blake2b(f"{model}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Cache de embeddings endereçado por conteúdo (modelo + hash do texto).
+
+    Os vetores de `embed_documents` (chunks da ingestão, exemplos do
+    roteador, frases dos trechos) ficam num arquivo append-only por modelo,
+    em float32, lido inteiro no início e re-lido incrementalmente quando
+    outro processo acrescenta registros. `embed_query` recebe texto livre
+    dos usuários, que cresce sem limite: esses vetores ficam só num LRU em
+    memória (EMBED_QUERY_CACHE_SIZE), consultado depois do arquivo.
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        model: str,
+        cache_dir: str = EMBED_CACHE_DIR,
+        query_cache_size: int = EMBED_QUERY_CACHE_SIZE,
+    ):
+        self.inner = inner
+        self.model = model
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in model)
+        self.path = os.path.join(cache_dir, f"{safe}.f32")
+        self._vectors: Dict[bytes, np.ndarray] = {}
+        self._offset = 0
+        self._queries = TTLCache(maxsize=query_cache_size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Lê os registros acrescentados desde a última leitura."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        pos, end = 0, len(data)
+        while pos + _HEADER.size <= end:
+            magic, digest, dim = _HEADER.unpack_from(data, pos)
+            stop = pos + _HEADER.size + 4 * dim
+            nxt = data[stop : stop + 4]
+            if magic != _MAGIC or stop > end or not _MAGIC.startswith(nxt):
+                # registro truncado/corrompido: procura o próximo
+                found = data.find(_MAGIC, pos + 1)
+                if found < 0:
+                    break
+                pos = found
+                continue
+            self._vectors[digest] = np.frombuffer(
+                data, dtype="<f4", count=dim, offset=pos + _HEADER.size
+            )
+            pos = stop
+        self._offset += pos
+
+    def _append(self, items: List[tuple]) -> None:
+        buf = bytearray()
+        for digest, vec in items:
+            arr = np.asarray(vec, dtype="<f4")
+            buf += _HEADER.pack(_MAGIC, digest, arr.size) + arr.tobytes()
+        # um único write com O_APPEND: registros de processos diferentes não se misturam
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, bytes(buf))
+        finally:
+            os.close(fd)
+
+    def _lookup(self, texts: List[str]) -> tuple:
+        digests = [_digest(self.model, t) for t in texts]
+        with self._lock:
+            if any(d not in self._vectors for d in digests):
+                self._refresh()
+            found = {d: self._vectors[d] for d in digests if d in self._vectors}
+        missing: Dict[bytes, str] = {}
+        for d, t in zip(digests, texts):
+            if d not in found:
+                missing.setdefault(d, t)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return digests, found, missing
+
+    def _store(self, found: dict, missing: Dict[bytes, str], vectors) -> None:
+        new = list(zip(missing, vectors))
+        with self._lock:
+            self._append(new)
+            for d, v in new:
+                arr = np.asarray(v, dtype=np.float32)
+                self._vectors[d] = arr
+                found[d] = arr
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        digests, found, missing = self._lookup(texts)
+        if missing:
+            self._store(
+                found, missing, self.inner.embed_documents(list(missing.values()))
+            )
+        return [found[d].tolist() for d in digests]
+
+    def _query_lookup(self, text: str) -> tuple:
+        digest = _digest(self.model, text)
+        vec = self._vectors.get(digest)
+        if vec is None:
+            vec = self._queries.get(digest)
+        if vec is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return digest, vec
+
+    def _query_store(self, digest: bytes, vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        self._queries.put(digest, vec)
+        return vec
+
+    def embed_query(self, text: str) -> List[float]:
+        digest, vec = self._query_lookup(text)
+        if vec is None:
+            vec = self._query_store(digest, self.inner.embed_query(text))
+        return vec.tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        digests, found, missing = self._lookup(texts)
+        if missing:
+            vectors = await self.inner.aembed_documents(list(missing.values()))
+            self._store(found, missing, vectors)
+        return [found[d].tolist() for d in digests]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        digest, vec = self._query_lookup(text)
+        if vec is None:
+            vec = self._query_store(digest, await self.inner.aembed_query(text))
+        return vec.tolist()
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model,
+            "entries": len(self._vectors),
+            "queries": len(self._queries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -1,13 +1,38 @@
 from app.core.models.interface.chat_agent import BaseChatModule
+from app.core.tools.sparql.query import get_sparql_tool
 
-tools = []
+tools = [get_sparql_tool()]
 
 
 class FlightAgent(BaseChatModule):
+    route_keywords = (
+        "voo",
+        "voos",
+        "aeroporto",
+        "companhia aerea",
+        "companhias aereas",
+        "horario",
+        "rota",
+        "partida",
+        "decolagem",
+        "pouso",
+        "atraso",
+        "cancelado",
+        "iata",
+    )
+    route_examples = (
+        "Quais voos saem de Guarulhos para Brasília amanhã?",
+        "Qual o horário de partida do voo para Recife?",
+        "Quais companhias aéreas operam no aeroporto de Confins?",
+        "Quais rotas ligam São Paulo ao Rio de Janeiro?",
+    )
+
     def __init__(self):
         prompt = (
             "Você é um agente especializado em dados de voos."
             + "Seu objetivo é ajudar os usuários a encontrar informações sobre voos, aeroportos, companhias aéreas e outros dados relacionados a viagens aéreas."
             + "Você tem acesso a uma variedade de ferramentas para buscar essas informações."
+            + "Use a ferramenta sparql_query para consultar os dados de voos, aeroportos e companhias aéreas no triplestore;"
+            + " filtre e agregue na própria consulta e peça a próxima página (page) só se precisar."
         )
         super().__init__(tools=tools, prompt=prompt, name="Agente de Voos")
@@ -1,11 +1,44 @@
 from app.core.models.interface.chat_agent import BaseChatModule
 from app.core.tools.norms.retriever import build_pdf_retriever_tool
 
-tools = [build_pdf_retriever_tool()]
-
 
 class NormAgent(BaseChatModule):
-    def __init__(self):
+    route_keywords = (
+        "aeronauta",
+        "aeronautas",
+        "tripulante",
+        "jornada",
+        "descanso",
+        "folga",
+        "lei",
+        "norma",
+        "normas",
+        "regulamento",
+        "rbac",
+        "rbha",
+        "codigo brasileiro",
+        "cba",
+        "artigo",
+        "art.",
+        "infracao",
+        "multa",
+        "penalidade",
+        "sancao",
+        "licenca",
+        "habilitacao",
+        "certificado",
+    )
+    route_examples = (
+        "Qual é a jornada máxima de trabalho de um piloto?",
+        "Quais são os direitos do aeronauta?",
+        "Quais são as penalidades para voo não autorizado segundo o CBA?",
+        "O que diz a lei sobre o descanso mínimo dos tripulantes?",
+        "Quais requisitos para obter licença de piloto?",
+    )
+
+    def __init__(self, tools: list | None = None):
+        if tools is None:
+            tools = [build_pdf_retriever_tool()]
         prompt = """Você é um assistente especializado em legislação aeronáutica brasileira.
 
                     Ferramentas disponíveis:
@@ -1,14 +1,37 @@
 from app.core.models.interface.chat_agent import BaseChatModule
+from app.core.tools.sparql.query import get_sparql_tool
+from app.core.tools.swan.stats import get_occurrence_stats_tool
 
-tools = []
+tools = [get_occurrence_stats_tool(), get_sparql_tool()]
 
 
 class SwanAgent(BaseChatModule):
+    route_keywords = (
+        "ocorrencia",
+        "ocorrencias",
+        "incidente",
+        "incidentes",
+        "acidente",
+        "acidentes",
+        "estatistica",
+        "estatisticas",
+        "cenipa",
+    )
+    route_examples = (
+        "Quantos acidentes aéreos ocorreram em 2023?",
+        "Quais os tipos de ocorrência mais comuns com helicópteros?",
+        "Estatísticas de incidentes por estado",
+        "Quais ocorrências foram registradas em São Paulo no último ano?",
+    )
+
     def __init__(self):
         prompt = (
             "Você é um agente especializado em ocorrências aéreas."
             + "Seu objetivo é ajudar os usuários a encontrar informações sobre ocorrências aéreas."
             + "Você tem acesso a uma variedade de ferramentas para buscar essas informações."
+            + "Para contagens, rankings e tendências (por ano, UF, classificação, tipo ou categoria de aeronave), use a ferramenta estatisticas_ocorrencias."
+            + "Use a ferramenta sparql_query para consultar os dados de ocorrências aéreas no triplestore;"
+            + " filtre e agregue na própria consulta e peça a próxima página (page) só se precisar."
         )
         super().__init__(
             tools=tools, prompt=prompt, name="Agente de Ocorrências Aéreas"
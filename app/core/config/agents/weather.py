@@ -4,6 +4,29 @@ tools = []
 
 
 class WeatherAgent(BaseChatModule):
+    route_keywords = (
+        "clima",
+        "meteorologia",
+        "meteorologica",
+        "meteorologicas",
+        "metar",
+        "taf",
+        "chuva",
+        "vento",
+        "ventos",
+        "previsao do tempo",
+        "temperatura",
+        "visibilidade",
+        "nevoeiro",
+        "trovoada",
+    )
+    route_examples = (
+        "Como está o tempo em Congonhas agora?",
+        "Qual a previsão de chuva para Porto Alegre amanhã?",
+        "Qual o METAR de Guarulhos?",
+        "Há previsão de nevoeiro em Curitiba pela manhã?",
+    )
+
     def __init__(self):
         prompt = (
             "Você é um agente especializado em dados de meteorológicos."
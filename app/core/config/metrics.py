@@ -0,0 +1,349 @@
+import time
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from app.core.config.trace import _agent_of, node_name
+
+# segundos; do roteador (ms) até respostas longas do qwen3 em CPU
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_one(key, value))
+        return lines
+
+    def _render_one(self, key, value) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, n = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    def _render_one(self, key, value) -> List[str]:
+        counts, total, n = value
+        lines = []
+        for bound, count in zip(self.buckets, counts):
+            le = f'le="{bound}"'
+            lines.append(
+                f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}"
+            )
+        inf = _labels(self.labelnames, key, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{inf} {n}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class Registry:
+    """Registro mínimo de métricas no formato texto do Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+NODE_SECONDS = REGISTRY.register(
+    Histogram(
+        "airdata_node_duration_seconds",
+        "Tempo de cada nó do grafo, por agente.",
+        ("agent", "node"),
+    )
+)
+LLM_SECONDS = REGISTRY.register(
+    Histogram(
+        "airdata_llm_duration_seconds",
+        "Tempo de cada chamada ao modelo de chat, por agente.",
+        ("agent", "model"),
+    )
+)
+LLM_PROMPT_SECONDS = REGISTRY.register(
+    Histogram(
+        "airdata_llm_prompt_eval_seconds",
+        "Tempo de prefill (prompt_eval_duration do Ollama), por agente.",
+        ("agent", "model"),
+    )
+)
+LLM_TOKENS_PER_SECOND = REGISTRY.register(
+    Histogram(
+        "airdata_llm_tokens_per_second",
+        "Velocidade de geração (eval_count / eval_duration), por agente.",
+        ("agent", "model"),
+        buckets=TOKENS_PER_SECOND_BUCKETS,
+    )
+)
+LLM_TOKENS = REGISTRY.register(
+    Counter(
+        "airdata_llm_tokens_total",
+        "Tokens de prompt e de resposta, por agente.",
+        ("agent", "model", "kind"),
+    )
+)
+TOOL_SECONDS = REGISTRY.register(
+    Histogram(
+        "airdata_tool_duration_seconds",
+        "Tempo de cada tool (inclui handoffs transfer_to_*), por agente.",
+        ("agent", "tool"),
+    )
+)
+HANDOFFS = REGISTRY.register(
+    Counter(
+        "airdata_handoffs_total",
+        "Transferências do supervisor (ou do roteador) para especialistas.",
+        ("to", "via"),
+    )
+)
+RETRIEVAL_SECONDS = REGISTRY.register(
+    Histogram(
+        "airdata_retrieval_stage_seconds",
+        "Etapas da tool de normas (busca híbrida + rerank, compressão).",
+        ("stage",),
+    )
+)
+REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "airdata_request_duration_seconds",
+        "Tempo total de cada requisição da API.",
+        ("endpoint", "status"),
+    )
+)
+SPARQL_CACHE = REGISTRY.register(
+    Counter(
+        "airdata_sparql_cache_total",
+        "Consultas SPARQL respondidas pelo cache (hit) ou pelo Fuseki (miss).",
+        ("result",),
+    )
+)
+MODEL_FALLBACKS = REGISTRY.register(
+    Counter(
+        "airdata_model_fallbacks_total",
+        "Chamadas desviadas para o modelo de fallback, por motivo (busy/slo).",
+        ("model", "reason"),
+    )
+)
+ASK_SLOTS = REGISTRY.register(
+    Gauge(
+        "airdata_ask_slots",
+        "Requisições do /ask em execução e na fila do limitador.",
+        ("state",),
+    )
+)
+
+
+class MetricsCallback(BaseCallbackHandler):
+    """
+    Alimenta as métricas a partir dos callbacks do LangChain: nós do grafo,
+    chamadas ao ChatOllama (tokens e tokens/s vêm do response_metadata do
+    Ollama) e tools. Uma única instância serve todas as requisições; o estado
+    por execução fica indexado pelo run_id.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._open: Dict[UUID, Tuple[str, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, agent: str, name: str) -> None:
+        with self._lock:
+            self._open[run_id] = (agent, name, time.perf_counter())
+
+    def _stop(self, run_id: UUID) -> Optional[Tuple[str, str, float]]:
+        with self._lock:
+            opened = self._open.pop(run_id, None)
+        if opened is None:
+            return None
+        agent, name, t = opened
+        return agent, name, time.perf_counter() - t
+
+    # --- nós --------------------------------------------------------------
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            parent = self._open.get(kwargs.get("parent_run_id"))
+        node = node_name(metadata, kwargs.get("name"), parent and parent[1])
+        if node:
+            self._start(run_id, _agent_of(metadata), node)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        closed = self._stop(run_id)
+        if closed:
+            agent, node, seconds = closed
+            NODE_SECONDS.observe(seconds, agent=agent, node=node)
+            if node == "router" and isinstance(outputs, dict) and outputs.get("route"):
+                HANDOFFS.inc(to=outputs["route"], via="router")
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        # inclui handoffs, que sobem como exceção (GraphBubbleUp)
+        closed = self._stop(run_id)
+        if closed:
+            agent, node, seconds = closed
+            NODE_SECONDS.observe(seconds, agent=agent, node=node)
+
+    # --- LLM --------------------------------------------------------------
+
+    def on_chat_model_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        messages: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        model = (metadata or {}).get("ls_model_name", "")
+        self._start(run_id, _agent_of(metadata), model)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        closed = self._stop(run_id)
+        if closed is None:
+            return
+        agent, model, seconds = closed
+        LLM_SECONDS.observe(seconds, agent=agent, model=model)
+        try:
+            message = response.generations[0][0].message
+        except (IndexError, AttributeError):
+            return
+        meta = getattr(message, "response_metadata", None) or {}
+        usage = getattr(message, "usage_metadata", None) or {}
+        prompt = meta.get("prompt_eval_count", usage.get("input_tokens", 0)) or 0
+        completion = meta.get("eval_count", usage.get("output_tokens", 0)) or 0
+        LLM_TOKENS.inc(prompt, agent=agent, model=model, kind="prompt")
+        LLM_TOKENS.inc(completion, agent=agent, model=model, kind="completion")
+        if meta.get("prompt_eval_duration"):
+            LLM_PROMPT_SECONDS.observe(
+                meta["prompt_eval_duration"] / 1e9, agent=agent, model=model
+            )
+        # durações do Ollama em ns; sem elas usa o tempo de parede
+        gen_seconds = (meta.get("eval_duration") or 0) / 1e9 or seconds
+        if completion and gen_seconds:
+            LLM_TOKENS_PER_SECOND.observe(
+                completion / gen_seconds, agent=agent, model=model
+            )
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._stop(run_id)
+
+    # --- tools ------------------------------------------------------------
+
+    def on_tool_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        input_str: str,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "")
+        self._start(run_id, _agent_of(metadata), name)
+        if name.startswith("transfer_to_"):
+            HANDOFFS.inc(to=name[len("transfer_to_") :], via="supervisor")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        closed = self._stop(run_id)
+        if closed:
+            agent, tool, seconds = closed
+            TOOL_SECONDS.observe(seconds, agent=agent, tool=tool)
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        closed = self._stop(run_id)
+        if closed:
+            agent, tool, seconds = closed
+            TOOL_SECONDS.observe(seconds, agent=agent, tool=tool)
+
+
+METRICS_CALLBACK = MetricsCallback()
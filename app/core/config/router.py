@@ -0,0 +1,137 @@
+import os
+import re
+import math
+import time
+import unicodedata
+from typing import Dict, List, Optional
+
+from langchain_core.messages import HumanMessage, convert_to_messages
+
+from app.core.models.interface.chat_agent import BaseChatModule
+from app.core.models.interface.embedding import get_embeddings
+
+ROUTER_NODE = "router"
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "1") == "1"
+# similaridade mínima com o centróide do agente e folga para o segundo colocado
+ROUTER_THRESHOLD = float(os.getenv("ROUTER_THRESHOLD", "0.7"))
+ROUTER_MARGIN = float(os.getenv("ROUTER_MARGIN", "0.05"))
+# segundos sem tentar embeddings depois de uma falha (Ollama fora ou fila cheia)
+ROUTER_EMBED_COOLDOWN = float(os.getenv("ROUTER_EMBED_COOLDOWN", "10"))
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+class FastPathRouter:
+    """
+    Roteador sem LLM na frente do supervisor.
+
+    1. Palavras-chave: se só um agente tem termos na pergunta, vai direto.
+    2. Embeddings: similaridade com o centróide dos exemplos de cada agente;
+       roteia se passar de ROUTER_THRESHOLD com folga de ROUTER_MARGIN.
+
+    Sem confiança, retorna None e o supervisor decide como antes.
+    """
+
+    def __init__(
+        self,
+        agents: List[BaseChatModule],
+        threshold: float = ROUTER_THRESHOLD,
+        margin: float = ROUTER_MARGIN,
+        cooldown: float = ROUTER_EMBED_COOLDOWN,
+    ):
+        self.threshold = threshold
+        self.margin = margin
+        self.cooldown = cooldown
+        self._keywords = {
+            a.name: [
+                re.compile(rf"(?<!\w){re.escape(normalize(k))}(?!\w)")
+                for k in a.route_keywords
+            ]
+            for a in agents
+        }
+        self._examples = {a.name: list(a.route_examples) for a in agents}
+        self._centroids: Optional[Dict[str, List[float]]] = None
+        self._embeddings_retry_at = 0.0
+
+    def _keyword_route(self, text: str) -> Optional[str]:
+        hits = {
+            name: sum(1 for p in patterns if p.search(text))
+            for name, patterns in self._keywords.items()
+        }
+        matched = [name for name, n in hits.items() if n]
+        return matched[0] if len(matched) == 1 else None
+
+    def _load_centroids(self) -> Dict[str, List[float]]:
+        if self._centroids is None:
+            names = [n for n, ex in self._examples.items() if ex]
+            texts = [t for n in names for t in self._examples[n]]
+            vectors = get_embeddings().embed_documents(texts)
+            centroids, i = {}, 0
+            for name in names:
+                group = vectors[i : i + len(self._examples[name])]
+                i += len(group)
+                centroids[name] = [sum(col) / len(group) for col in zip(*group)]
+            self._centroids = centroids
+        return self._centroids
+
+    def prime(self) -> None:
+        """Calcula os centróides agora, em vez de na primeira pergunta."""
+        if not ROUTER_ENABLED:
+            return
+        try:
+            self._load_centroids()
+        except Exception as e:
+            print(f"[Router] centróides não calculados no boot: {e}")
+
+    def _embedding_route(self, question: str) -> Optional[str]:
+        if time.monotonic() < self._embeddings_retry_at:
+            return None
+        try:
+            centroids = self._load_centroids()
+            query = get_embeddings().embed_query(question)
+        except Exception as e:
+            # sem Ollama de embeddings o roteador segue só com palavras-chave
+            # até o fim do cooldown, e então tenta de novo
+            print(
+                f"[Router] embeddings indisponíveis: {e}; nova tentativa em "
+                f"{self.cooldown:.0f}s"
+            )
+            self._embeddings_retry_at = time.monotonic() + self.cooldown
+            return None
+        ranked = sorted(
+            ((_cosine(query, c), name) for name, c in centroids.items()), reverse=True
+        )
+        if not ranked:
+            return None
+        best, name = ranked[0]
+        second = ranked[1][0] if len(ranked) > 1 else 0.0
+        if best >= self.threshold and best - second >= self.margin:
+            return name
+        return None
+
+    def route(self, question: str) -> Optional[str]:
+        return self._keyword_route(normalize(question)) or self._embedding_route(
+            question
+        )
+
+    def __call__(self, state: dict) -> dict:
+        """Nó do grafo: grava em state["route"] o agente escolhido (ou None)."""
+        if not ROUTER_ENABLED:
+            return {"route": None}
+        last = convert_to_messages(state["messages"])[-1]
+        if not isinstance(last, HumanMessage):
+            return {"route": None}
+        route = self.route(last.content)
+        if route:
+            print(f"[Router] rota direta -> {route}")
+        return {"route": route}
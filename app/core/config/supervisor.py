@@ -1,9 +1,14 @@
+import time
+import threading
+from contextlib import contextmanager
 from sys import path
-
+from typing import Optional
 
 path.append("./")
 from app.core.config.utils import run_graph
+from app.core.config.router import ROUTER_NODE, FastPathRouter
 from app.core.tools.supervisor.handoff import create_handoff_tool
+from app.core.tools.norms.retriever import get_pdf_retriever_tool
 
 from app.core.config.agents.swan import SwanAgent
 from app.core.config.agents.weather import WeatherAgent
@@ -14,60 +19,118 @@ from app.core.models.interface.chat_agent import BaseChatModule
 
 from langgraph.graph import StateGraph, MessagesState, START, END
 
+SUPERVISOR_NAME = "Agente Supervisor"
+
 
-flight_agent = FlightAgent()
-norm_agent = NormAgent()
-swan_agent = SwanAgent()
-weather_agent = WeatherAgent()
+class SupervisorState(MessagesState):
+    # agente escolhido pelo roteador rápido; None = supervisor decide
+    route: Optional[str]
 
-agents: list[BaseChatModule] = [
-    flight_agent,
-    norm_agent,
-    swan_agent,
-    weather_agent,
-]
 
+def _after_router(state: SupervisorState) -> str:
+    return state.get("route") or SUPERVISOR_NAME
 
-handoff_tools = [create_handoff_tool(agent_name=agent.name) for agent in agents]
+
+def _after_specialist(state: SupervisorState) -> str:
+    # rota direta: a resposta do especialista já é a resposta final
+    return END if state.get("route") else SUPERVISOR_NAME
 
 
 class SupervisorAgent(BaseChatModule):
-    def __init__(self):
+    def __init__(self, agents: list[BaseChatModule]):
         prompt = SYSTEM_PROMPT
+        handoff_tools = [create_handoff_tool(agent_name=a.name) for a in agents]
         # Passar as ferramentas de transferência para o supervisor
         super().__init__(
             prompt=prompt,
-            name="Agente Supervisor",
+            name=SUPERVISOR_NAME,
             tools=handoff_tools,  # Adicionar as ferramentas aqui
         )
 
 
-supervisor_agent = SupervisorAgent()
-
-supervisor = (
-    StateGraph(MessagesState)
-    .add_node(
-        supervisor_agent.module,
-        destinations=(
-            norm_agent.name,
-            flight_agent.name,
-            swan_agent.name,
-            weather_agent.name,
-            END,
-        ),
-    )
-    .add_node(norm_agent.module)
-    .add_node(flight_agent.module)
-    .add_node(swan_agent.module)
-    .add_node(weather_agent.module)
-    .add_edge(START, supervisor_agent.name)
-    .add_edge(norm_agent.name, supervisor_agent.name)
-    .add_edge(flight_agent.name, supervisor_agent.name)
-    .add_edge(swan_agent.name, supervisor_agent.name)
-    .add_edge(weather_agent.name, supervisor_agent.name)
-    .compile()
-)
+@contextmanager
+def _timed(component: str):
+    t0 = time.perf_counter()
+    yield
+    print(f"[Startup] {component}: {time.perf_counter() - t0:.2f}s")
+
+
+def build_graph_builder() -> StateGraph:
+    with _timed("retriever"):
+        norms_tool = get_pdf_retriever_tool()
+
+    with _timed("agents"):
+        agents: list[BaseChatModule] = [
+            FlightAgent(),
+            NormAgent(tools=[norms_tool]),
+            SwanAgent(),
+            WeatherAgent(),
+        ]
+        supervisor_agent = SupervisorAgent(agents)
+
+    with _timed("router"):
+        router = FastPathRouter(agents)
+        router.prime()
+
+    with _timed("graph compile"):
+        names = [a.name for a in agents]
+        builder = (
+            StateGraph(SupervisorState)
+            .add_node(ROUTER_NODE, router)
+            .add_node(
+                supervisor_agent.module,
+                destinations=tuple(names) + (END,),
+            )
+        )
+        for agent in agents:
+            builder.add_node(agent.module)
+            builder.add_conditional_edges(
+                agent.name, _after_specialist, [SUPERVISOR_NAME, END]
+            )
+        builder.add_edge(START, ROUTER_NODE).add_conditional_edges(
+            ROUTER_NODE, _after_router, [SUPERVISOR_NAME, *names]
+        )
+    return builder
+
+
+def build_supervisor(checkpointer=None):
+    return build_graph_builder().compile(checkpointer=checkpointer)
+
+
+_builder = None
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def _get_builder() -> StateGraph:
+    global _builder
+    if _builder is None:
+        with _supervisor_lock:
+            if _builder is None:
+                with _timed("supervisor total"):
+                    _builder = build_graph_builder()
+    return _builder
+
+
+def get_supervisor():
+    """Grafo compilado do supervisor, construído uma única vez por processo."""
+    global _supervisor
+    if _supervisor is None:
+        builder = _get_builder()
+        with _supervisor_lock:
+            if _supervisor is None:
+                _supervisor = builder.compile()
+    return _supervisor
+
+
+def get_session_supervisor(checkpointer):
+    """
+    Mesmo grafo (mesmos agentes e retriever) compilado com um checkpointer:
+    o histórico de cada sessão fica salvo por thread_id.
+    """
+    return _get_builder().compile(checkpointer=checkpointer)
 
 
 if __name__ == "__main__":
-    print(norm_agent.call("O que é a Lei do Aeronauta?"))
+    payload = {"messages": [{"role": "user", "content": "O que é a Lei do Aeronauta?"}]}
+    print(run_graph(get_supervisor(), payload))
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import uuid
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.errors import GraphBubbleUp
+
+# quantos traces completos ficam em memória (ring buffer)
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+# limite de eventos por trace (nós/tools), para perguntas que entram em loop
+TRACE_MAX_EVENTS = int(os.getenv("TRACE_MAX_EVENTS", "200"))
+# prévia do retorno das tools guardada no trace
+TRACE_CONTENT_CHARS = int(os.getenv("TRACE_CONTENT_CHARS", "500"))
+# arquivo JSONL opcional com um trace por linha; vazio desliga
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH", "")
+
+
+def _agent_of(metadata: Optional[dict]) -> str:
+    # "Agente de Normas:<task_id>|agent:<task_id>" -> "Agente de Normas"
+    ns = (metadata or {}).get("langgraph_checkpoint_ns", "")
+    return ns.split("|")[0].split(":")[0] if ns else ""
+
+
+def node_name(
+    metadata: Optional[dict], name: Optional[str], parent_node: Optional[str] = None
+) -> Optional[str]:
+    """
+    Nome do nó do grafo se o run é o do próprio nó; None para os runnables
+    internos dele e para o subgrafo compilado do agente, que roda dentro do
+    nó com o mesmo nome (`parent_node` = nó do run pai, se houver).
+    """
+    node = (metadata or {}).get("langgraph_node")
+    if not node or name != node or parent_node == node:
+        return None
+    return node
+
+
+class Trace(BaseCallbackHandler):
+    """
+    Trace de uma única requisição: tempo de cada nó do grafo, chamadas e
+    retornos de tools, resposta e erro.
+
+    É um callback handler do LangChain; basta passar `trace.config()` para
+    invoke/ainvoke/astream. Listas têm tamanho máximo (TRACE_MAX_EVENTS), então
+    o custo de memória por requisição é limitado.
+    """
+
+    # roda no mesmo thread/loop do grafo em vez de um executor
+    run_inline = True
+
+    def __init__(self, question: str = "", max_events: int = TRACE_MAX_EVENTS):
+        self.id = uuid.uuid4().hex
+        self.question = question
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.nodes: deque = deque(maxlen=max_events)
+        self.tool_calls: deque = deque(maxlen=max_events)
+        self.tool_returns: deque = deque(maxlen=max_events)
+        self.answer: Optional[str] = None
+        self.error: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+        self._open: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _ms(self, since: Optional[float] = None) -> float:
+        return round((time.perf_counter() - (since or self._t0)) * 1000, 2)
+
+    def config(self) -> dict:
+        return {"callbacks": [self]}
+
+    # --- nós do grafo -----------------------------------------------------
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            parent = self._open.get(kwargs.get("parent_run_id"))
+            node = node_name(metadata, kwargs.get("name"), parent and parent[1])
+            if node:
+                self._open[run_id] = (
+                    _agent_of(metadata),
+                    node,
+                    self._ms(),
+                    time.perf_counter(),
+                )
+
+    def _close_node(self, run_id: UUID, error: Optional[str] = None) -> None:
+        with self._lock:
+            opened = self._open.pop(run_id, None)
+            if opened is None:
+                return
+            agent, node, start_ms, t = opened
+            span = {"agent": agent, "node": node, "start_ms": start_ms}
+            span["ms"] = self._ms(t)
+            if error:
+                span["error"] = error
+            self.nodes.append(span)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._close_node(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        # handoffs e interrupts sobem como exceção, mas não são falhas
+        if isinstance(error, GraphBubbleUp):
+            self._close_node(run_id)
+        else:
+            self._close_node(run_id, error=repr(error)[:TRACE_CONTENT_CHARS])
+
+    # --- tools ------------------------------------------------------------
+
+    def on_tool_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        input_str: str,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        inputs: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "")
+        with self._lock:
+            self.tool_calls.append(
+                {
+                    "agent": _agent_of(metadata),
+                    "name": name,
+                    "args": inputs if inputs is not None else input_str,
+                    "id": str(run_id),
+                    "start_ms": self._ms(),
+                }
+            )
+            self._open[run_id] = (_agent_of(metadata), name, None, time.perf_counter())
+
+    def _close_tool(self, run_id: UUID, content: str, error: bool = False) -> None:
+        with self._lock:
+            opened = self._open.pop(run_id, None)
+            agent, name, _, t = opened or ("", "", None, None)
+            self.tool_returns.append(
+                {
+                    "agent": agent,
+                    "name": name,
+                    "id": str(run_id),
+                    "ms": self._ms(t) if t else None,
+                    "chars": len(content),
+                    "content": content[:TRACE_CONTENT_CHARS],
+                    **({"error": True} if error else {}),
+                }
+            )
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        content = getattr(output, "content", output)
+        self._close_tool(run_id, content if isinstance(content, str) else str(content))
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._close_tool(
+            run_id, repr(error), error=not isinstance(error, GraphBubbleUp)
+        )
+
+    # --- fim --------------------------------------------------------------
+
+    def finish(
+        self, answer: Optional[str] = None, error: Optional[BaseException] = None
+    ) -> "Trace":
+        self.answer = answer
+        self.error = repr(error)[:TRACE_CONTENT_CHARS] if error else None
+        self.duration_ms = self._ms()
+        with self._lock:
+            self._open.clear()
+        return self
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "id": self.id,
+                "question": self.question,
+                "started_at": self.started_at,
+                "duration_ms": self.duration_ms,
+                "nodes": list(self.nodes),
+                "tool_calls": list(self.tool_calls),
+                "tool_returns": list(self.tool_returns),
+                "answer": self.answer,
+                "error": self.error,
+            }
+
+
+class TraceStore:
+    """
+    Últimos `maxsize` traces em memória (ring buffer) e, com `jsonl_path`,
+    um trace por linha num arquivo local.
+    """
+
+    def __init__(
+        self, maxsize: int = TRACE_BUFFER_SIZE, jsonl_path: str = TRACE_JSONL_PATH
+    ):
+        self._traces: deque = deque(maxlen=maxsize)
+        self._index: Dict[str, dict] = {}
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def add(self, trace: Trace) -> None:
+        data = trace.to_dict()
+        with self._lock:
+            if len(self._traces) == self._traces.maxlen:
+                self._index.pop(self._traces[0]["id"], None)
+            self._traces.append(data)
+            self._index[data["id"]] = data
+            self.total += 1
+            if self.jsonl_path:
+                try:
+                    with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(data, ensure_ascii=False, default=str))
+                        f.write("\n")
+                except OSError as e:
+                    print(f"[Trace] falha ao gravar {self.jsonl_path}: {e}")
+
+    def get(self, trace_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._index.get(trace_id)
+
+    def recent(self, n: int = 20) -> List[dict]:
+        with self._lock:
+            return list(self._traces)[-n:][::-1]
+
+    def __len__(self) -> int:
+        return len(self._traces)
@@ -1,41 +1,157 @@
-from langchain_core.messages import AIMessage, ToolMessage
+from typing import AsyncIterator, Optional
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
 from langchain_core.messages import convert_to_messages
+from app.core.config.metrics import METRICS_CALLBACK
+from app.core.config.trace import Trace
+from app.core.models.interface.chat_agent import final_answer as _final_answer
 
-seen_tool_calls = []  # chamadas de tool (nome/args/id)
-seen_tool_returns = []  # retornos de tool (conteúdo)
 
+def _config(trace: Optional[Trace] = None, session_id: Optional[str] = None) -> dict:
+    # métricas sempre; trace só quando a requisição tem um
+    config = {"callbacks": [METRICS_CALLBACK] + ([trace] if trace else [])}
+    if session_id:
+        # grafo com checkpointer: o histórico da sessão fica no thread_id
+        config["configurable"] = {"thread_id": session_id}
+    return config
 
-def run_graph(supervisor, payload):
-    for chunk in supervisor.stream(payload, subgraphs=True):
-        ns, update = chunk if isinstance(chunk, tuple) else (None, chunk)
-        for node_name, node_update in update.items():
+
+def run_graph(
+    supervisor,
+    payload,
+    trace: Optional[Trace] = None,
+    session_id: Optional[str] = None,
+) -> str:
+    """Versão síncrona (CLI). Com `trace`, registra nós e tools da execução."""
+    try:
+        answer = _final_answer(
+            supervisor.invoke(payload, config=_config(trace, session_id))
+        )
+    except Exception as e:
+        if trace:
+            trace.finish(error=e)
+        raise
+    if trace:
+        trace.finish(answer)
+    return answer
+
+
+async def arun_graph(
+    supervisor,
+    payload,
+    trace: Optional[Trace] = None,
+    session_id: Optional[str] = None,
+) -> str:
+    try:
+        answer = _final_answer(
+            await supervisor.ainvoke(payload, config=_config(trace, session_id))
+        )
+    except Exception as e:
+        if trace:
+            trace.finish(error=e)
+        raise
+    if trace:
+        trace.finish(answer)
+    return answer
+
+
+def _agent_of(ns, default=None):
+    # ns = ("Agente de Normas:<task_id>", ...) -> "Agente de Normas"
+    return ns[0].split(":")[0] if ns else default
+
+
+async def astream_graph(
+    supervisor,
+    payload,
+    supervisor_name: str,
+    trace: Optional[Trace] = None,
+    session_id: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """
+    Executa o grafo e gera eventos leves conforme acontecem:
+
+    - {"event": "handoff", "to": agente}
+    - {"event": "tool_call", "agent", "name", "args"}
+    - {"event": "tool_result", "agent", "name", "chars"}
+    - {"event": "token", "agent", "content"}  (só dos especialistas)
+    - {"event": "done", "answer"}
+
+    Tokens do supervisor não são repassados (normalmente são só a decisão de
+    roteamento); a resposta final dele vem no evento "done".
+    """
+    final_answer = ""
+    try:
+        async for event in _astream_events(
+            supervisor, payload, supervisor_name, _config(trace, session_id)
+        ):
+            if event["event"] == "done":
+                final_answer = event["answer"]
+            yield event
+    except BaseException as e:
+        if trace:
+            trace.finish(error=e)
+        raise
+    if trace:
+        trace.finish(final_answer)
+
+
+async def _astream_events(supervisor, payload, supervisor_name, config):
+    final_answer = ""
+    async for ns, mode, data in supervisor.astream(
+        payload,
+        config=config,
+        subgraphs=True,
+        stream_mode=["updates", "messages"],
+    ):
+        if mode == "messages":
+            chunk, metadata = data
+            agent = _agent_of(ns, metadata.get("langgraph_node"))
+            if (
+                isinstance(chunk, AIMessageChunk)
+                and chunk.content
+                and agent != supervisor_name
+            ):
+                yield {"event": "token", "agent": agent, "content": chunk.content}
+            continue
+
+        for node_name, node_update in data.items():
+            if node_update and node_update.get("route"):
+                # roteador rápido mandou direto para o especialista
+                yield {"event": "handoff", "to": node_update["route"], "via": "router"}
+            if not node_update or "messages" not in node_update:
+                continue
             msgs = convert_to_messages(node_update["messages"])
+            if not ns:
+                # grafo pai: só repete o que os subgrafos já emitiram
+                for m in msgs:
+                    if isinstance(m, AIMessage) and not m.tool_calls:
+                        final_answer = m.content
+                continue
+            agent = _agent_of(ns)
             for m in msgs:
-                # LLM deciding to call a tool (the "query" intent)
-                if isinstance(m, AIMessage) and getattr(m, "tool_calls", None):
+                if isinstance(m, AIMessage) and m.tool_calls:
                     for tc in m.tool_calls:
-                        seen_tool_calls.append(
-                            {
-                                "node": node_name,
+                        if tc["name"].startswith("transfer_to_"):
+                            yield {
+                                "event": "handoff",
+                                "to": tc["name"][len("transfer_to_") :],
+                            }
+                        else:
+                            yield {
+                                "event": "tool_call",
+                                "agent": agent,
                                 "name": tc["name"],
                                 "args": tc["args"],
-                                "id": tc["id"],
                             }
-                        )
-                # Tool finished and returned a result
-                elif isinstance(m, ToolMessage):
-                    seen_tool_returns.append(
-                        {
-                            "node": node_name,
-                            "name": m.name,
-                            "tool_call_id": m.tool_call_id,
-                            "content": m.content,
-                        }
-                    )
-                # Supervisor’s final answer usually lands as an AIMessage with no tool_calls
-                elif isinstance(m, AIMessage) and not getattr(m, "tool_calls", None):
-                    final_answer = m.content  # keep last one
-    return final_answer
+                elif isinstance(m, ToolMessage) and not m.name.startswith(
+                    "transfer_to_"
+                ):
+                    yield {
+                        "event": "tool_result",
+                        "agent": agent,
+                        "name": m.name,
+                        "chars": len(str(m.content)),
+                    }
+    yield {"event": "done", "answer": final_answer}
 
 
 def pretty_print_message(message, indent=False):
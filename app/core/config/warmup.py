@@ -0,0 +1,102 @@
+import os
+import time
+import asyncio
+from typing import Callable, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.models.interface.embedding import EMBED_MODEL, get_embeddings
+from app.core.models.interface.model import configured_models, get_chat_model
+from app.core.models.interface.occurrences import get_occurrence_store
+from app.core.tools.norms.retriever import get_pdf_retriever_tool
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+# intervalo entre tentativas quando o Ollama ainda não responde
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+WARMUP_QUERY = "jornada de trabalho do aeronauta"
+
+
+def _warm_embeddings() -> None:
+    # direto no cliente do Ollama: pelo cache o modelo não seria carregado
+    get_embeddings(EMBED_MODEL).inner.embed_query(WARMUP_QUERY)
+
+
+def _warm_chat(model: str) -> Callable[[], None]:
+    def warm() -> None:
+        # um token basta para o Ollama carregar o modelo na memória
+        get_chat_model(model).invoke("ok", options={"num_predict": 1})
+
+    return warm
+
+
+def _warm_retriever() -> None:
+    # carrega o índice HNSW do Chroma e exercita BM25/rerank/compressão
+    get_pdf_retriever_tool().invoke({"query": WARMUP_QUERY})
+
+
+def _warm_occurrences() -> None:
+    # só a tool do SwanAgent depende da base: falha aqui não segura o /ready
+    try:
+        get_occurrence_store()
+    except Exception as e:
+        print(f"[Warmup] base de ocorrências indisponível: {e}")
+
+
+def warmup_steps() -> List[Tuple[str, Callable[[], None]]]:
+    return [
+        (f"embeddings:{EMBED_MODEL}", _warm_embeddings),
+        *((f"chat:{m}", _warm_chat(m)) for m in configured_models()),
+        ("retriever", _warm_retriever),
+        ("occurrences", _warm_occurrences),
+    ]
+
+
+class Readiness:
+    """
+    Estado do boot exposto em /ready: o pod só recebe tráfego depois que o
+    grafo foi montado e os modelos foram carregados no Ollama.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.started = time.time()
+        self.steps: dict = {}
+        self.error: Optional[str] = None
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "uptime_s": round(time.time() - self.started, 1),
+            "steps": self.steps,
+            **({"error": self.error} if self.error else {}),
+        }
+
+    async def run_step(self, name: str, fn: Callable[[], None]) -> None:
+        """Executa um passo fora do event loop, repetindo até dar certo."""
+        attempts = 0
+        while True:
+            attempts += 1
+            t0 = time.perf_counter()
+            try:
+                await run_in_threadpool(fn)
+            except Exception as e:
+                self.error = f"{name}: {e}"
+                self.steps[name] = {"ok": False, "attempts": attempts}
+                print(
+                    f"[Warmup] {name} falhou ({e}); nova tentativa em "
+                    f"{WARMUP_RETRY_SECONDS:.0f}s"
+                )
+                await asyncio.sleep(WARMUP_RETRY_SECONDS)
+                continue
+            seconds = round(time.perf_counter() - t0, 2)
+            self.steps[name] = {"ok": True, "seconds": seconds, "attempts": attempts}
+            self.error = None
+            print(f"[Warmup] {name}: {seconds}s")
+            return
+
+    async def warm_up(self) -> None:
+        if WARMUP_ENABLED:
+            for name, fn in warmup_steps():
+                await self.run_step(name, fn)
+        self.ready = True
+        print("[Warmup] pronto para receber tráfego")
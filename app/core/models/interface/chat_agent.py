@@ -1,26 +1,90 @@
-from langchain_ollama import ChatOllama
+import os
+from typing import AsyncIterator, List
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.messages import convert_to_messages, trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
 from langgraph.prebuilt import create_react_agent
-from app.core.models.interface.model import export_model
+from app.core.models.interface.model import get_agent_model
+
+# tokens de histórico enviados ao modelo a cada chamada (o prompt de sistema
+# não conta); o resto continua no estado/checkpoint, só não vai para o LLM
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "3000"))
+
+
+def trim_history(messages: list, max_tokens: int = HISTORY_TOKEN_BUDGET) -> List:
+    """
+    Mantém as mensagens mais recentes que cabem em `max_tokens`, começando
+    numa mensagem do usuário para não separar tool_calls das respostas.
+    Se nem o turno atual cabe, mantém o turno atual inteiro.
+    """
+    messages = convert_to_messages(messages)
+    trimmed = trim_messages(
+        messages,
+        strategy="last",
+        token_counter=count_tokens_approximately,
+        max_tokens=max_tokens,
+        start_on="human",
+        include_system=True,
+    )
+    if any(isinstance(m, HumanMessage) for m in trimmed):
+        return trimmed
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return messages[i:]
+    return messages
+
+
+def _pre_model_hook(state: dict) -> dict:
+    return {"llm_input_messages": trim_history(state["messages"])}
+
 
-model = export_model()
+def final_answer(state: dict) -> str:
+    # a resposta final é a última AIMessage sem tool_calls
+    for m in reversed(state.get("messages", [])):
+        if isinstance(m, AIMessage) and not m.tool_calls:
+            return m.content
+    return ""
 
 
 class BaseChatModule:
+    # usados pelo roteador rápido (app/core/config/router.py)
+    route_keywords: tuple[str, ...] = ()
+    route_examples: tuple[str, ...] = ()
+
     def __init__(self, tools: list = [], prompt: str = "", name: str = ""):
         self.tools = tools
         self.prompt = prompt
         self.name = name
         self.module = create_react_agent(
-            model=ChatOllama(model=model),
+            model=get_agent_model(name),
             tools=tools,
             prompt=prompt,
             name=name,
+            pre_model_hook=_pre_model_hook,
         )
 
+    def _message(self, input: str) -> dict:
+        return {"messages": [{"role": "user", "content": input}]}
+
     def call(self, input: str) -> str:
-        message = {"messages": [{"role": "user", "content": input}]}
         try:
-            answer = self.module.invoke(message)
-            return answer
+            answer = self.module.invoke(self._message(input))
+            return final_answer(answer)
         except Exception as e:
             return f"Erro ao processar: {str(e)}"
+
+    async def acall(self, input: str) -> str:
+        try:
+            answer = await self.module.ainvoke(self._message(input))
+            return final_answer(answer)
+        except Exception as e:
+            return f"Erro ao processar: {str(e)}"
+
+    async def astream(self, input: str) -> AsyncIterator[str]:
+        """Gera os tokens da resposta conforme o modelo os produz."""
+        async for chunk, _ in self.module.astream(
+            self._message(input), stream_mode="messages"
+        ):
+            if isinstance(chunk, AIMessageChunk) and chunk.content:
+                yield chunk.content
@@ -1,16 +1,56 @@
 import os
+import json
+import time
+import queue
 import hashlib
-from typing import List, Dict, Any
-import PyPDF2
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
 from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings
 
+from app.core.cache.embedding import CachedEmbeddings
+from app.core.models.interface.legal_chunker import LegalTextSplitter
+from app.core.models.interface.model import get_embedding_model
+from app.core.models.interface.pdf_pages import extract_page_range, page_count
 
 EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
 COLLECTION_NAME = os.getenv("CHROMA_COLLECTION", "airdata_norms")
+# tamanho do lote enviado ao Ollama e quantos lotes são embutidos em paralelo
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+# extração de PDF em processos: 0 = um por CPU, 1 = sequencial
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+# "recursive" (RecursiveCharacterTextSplitter) ou "legal" (Título/Capítulo/Art.)
+CHUNKING_MODE = os.getenv("CHUNKING_MODE", "recursive")
+PERSIST_DIRECTORY = os.getenv("CHROMA_DIR", "./chroma_db_ollama")
+MANIFEST_FILE = "ingest_manifest.json"
+
+
+@lru_cache(maxsize=None)
+def get_embeddings(model: str = EMBED_MODEL) -> CachedEmbeddings:
+    """
+    Cliente de embeddings compartilhado por ingestão, retriever e roteador,
+    com cache persistente em disco (ver app/core/cache/embedding.py).
+    """
+    return CachedEmbeddings(get_embedding_model(model), model)
+
+
+def index_version(persist_directory: str = PERSIST_DIRECTORY) -> str:
+    """
+    Identifica a versão atual do índice. Muda sempre que um ingest grava o
+    manifesto, inclusive se feito por outro processo (usa só um stat).
+    """
+    try:
+        st = os.stat(os.path.join(persist_directory, MANIFEST_FILE))
+    except FileNotFoundError:
+        return "empty"
+    return f"{st.st_mtime_ns}:{st.st_size}"
 
 
 def _chunk_id(doc_name: str, chunk_text: str) -> str:
@@ -18,51 +58,239 @@ def _chunk_id(doc_name: str, chunk_text: str) -> str:
     return f"{doc_name}:{h}"
 
 
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class IngestionManifest:
+    """
+    Registro persistente dos documentos já indexados no Chroma.
+
+    Para cada documento guarda tamanho, mtime, sha256 do arquivo e os
+    parâmetros de chunking usados. Se nada mudou, a extração e o split
+    podem ser pulados por completo no boot.
+    """
+
+    def __init__(self, persist_directory: str):
+        self.path = os.path.join(persist_directory, MANIFEST_FILE)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("documents", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"[Manifest] ignorando manifesto inválido {self.path}: {e}")
+
+    def check(self, doc_name: str, pdf_path: str, params: Dict[str, Any]) -> bool:
+        """
+        True se o documento já está indexado com os mesmos parâmetros.
+        Só calcula o hash quando tamanho/mtime divergem do registrado.
+        """
+        st = os.stat(pdf_path)
+        entry = self.entries.get(doc_name)
+        if not entry or entry.get("params") != params:
+            return False
+        if entry.get("file_path") != pdf_path or entry.get("size") != st.st_size:
+            return False
+        if entry.get("mtime") == st.st_mtime:
+            return True
+        # mtime mudou (checkout, cópia): confirma pelo conteúdo
+        if entry.get("sha256") != _file_sha256(pdf_path):
+            return False
+        self._pending[doc_name] = {**entry, "mtime": st.st_mtime}
+        return True
+
+    def stage(
+        self, doc_name: str, pdf_path: str, params: Dict[str, Any], chunks: int
+    ) -> None:
+        """Registra um documento re-processado; só persiste em commit()."""
+        st = os.stat(pdf_path)
+        self._pending[doc_name] = {
+            "file_path": pdf_path,
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "sha256": _file_sha256(pdf_path),
+            "params": params,
+            "chunks": chunks,
+        }
+
+    def previous(self, doc_name: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(doc_name)
+
+    def staged(self) -> List[str]:
+        return list(self._pending)
+
+    def commit(self) -> None:
+        if not self._pending:
+            return
+        self.entries.update(self._pending)
+        self._pending = {}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"documents": self.entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+
 class EmbeddingProcessor:
     def __init__(
         self,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
-        persist_directory: str = "./chroma_db_ollama",
+        persist_directory: str = PERSIST_DIRECTORY,
         embedding_model: str = EMBED_MODEL,
+        chunking: str = CHUNKING_MODE,
     ):
-        self.embeddings = OllamaEmbeddings(model=embedding_model)
+        if chunking not in ("recursive", "legal"):
+            raise ValueError(f"Modo de chunking desconhecido: {chunking}")
+        self.chunking = chunking
+        self.legal_splitter = LegalTextSplitter()
+        self.embedding_model = embedding_model
+        self.embeddings = get_embeddings(embedding_model)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
             length_function=len,
             separators=["\n\n", "\n", " ", ""],
         )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
         self.persist_directory = persist_directory
+        self.manifest = IngestionManifest(persist_directory)
         self.vectorstore = None
         print(f"[Embeddings] model: {embedding_model}")
 
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
+    def extract_pages(self, pdf_path: str) -> List[str]:
         try:
-            with open(pdf_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                return "\n".join((page.extract_text() or "") for page in reader.pages)
+            return extract_page_range(pdf_path, 0, page_count(pdf_path))
         except Exception as e:
             print(f"Erro ao extrair texto do PDF {pdf_path}: {e}")
-            return ""
+            return []
+
+    def extract_text_from_pdf(self, pdf_path: str) -> str:
+        return "\n".join(self.extract_pages(pdf_path))
+
+    def extract_pages_parallel(
+        self, pdf_paths: Dict[str, str], workers: int = PDF_EXTRACT_WORKERS
+    ) -> Dict[str, List[str]]:
+        """
+        Extrai as páginas de vários PDFs em paralelo, dividindo cada
+        documento em faixas de PDF_PAGES_PER_TASK páginas. A ordem das
+        páginas é preservada, então o texto (e os doc_ids) é idêntico ao
+        da extração sequencial.
+        """
+        workers = workers or os.cpu_count() or 1
+        tasks: List[tuple] = []
+        pages: Dict[str, List[str]] = {}
+        for doc_name, pdf_path in pdf_paths.items():
+            try:
+                n = page_count(pdf_path)
+            except Exception as e:
+                print(f"Erro ao extrair texto do PDF {pdf_path}: {e}")
+                continue
+            pages[doc_name] = [""] * n
+            for start in range(0, n, PDF_PAGES_PER_TASK):
+                tasks.append(
+                    (doc_name, pdf_path, start, min(n, start + PDF_PAGES_PER_TASK))
+                )
+
+        if workers <= 1 or len(tasks) <= 1:
+            return {name: self.extract_pages(pdf_paths[name]) for name in pages}
+
+        # spawn: o servidor já tem threads rodando, fork não é seguro
+        ctx = multiprocessing.get_context("spawn")
+        failed = set()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(tasks)), mp_context=ctx
+            ) as pool:
+                futures = [
+                    (name, start, pool.submit(extract_page_range, path, start, stop))
+                    for name, path, start, stop in tasks
+                ]
+                for name, start, fut in futures:
+                    try:
+                        chunk = fut.result()
+                    except Exception as e:
+                        if name not in failed:
+                            print(
+                                f"Erro ao extrair texto do PDF {pdf_paths[name]} "
+                                f"em paralelo: {e}"
+                            )
+                        failed.add(name)
+                        continue
+                    pages[name][start : start + len(chunk)] = chunk
+        except Exception as e:
+            # pool nem subiu (ou quebrou ao encerrar): tudo vai para o sequencial
+            print(f"Erro no pool de extração: {e}")
+            failed = set(pages)
+        for name in failed:
+            print(f"{name}: extraindo de novo sem o pool")
+            pages[name] = self.extract_pages(pdf_paths[name])
+        return pages
+
+    def _chunking_params(self) -> Dict[str, Any]:
+        params = {
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "embedding_model": self.embedding_model,
+            "collection": COLLECTION_NAME,
+        }
+        if self.chunking == "legal":
+            params.update(
+                chunking="legal",
+                chunk_size=self.legal_splitter.max_chars,
+                chunk_overlap=0,
+                min_chunk_size=self.legal_splitter.min_chars,
+                splitter_version=LegalTextSplitter.VERSION,
+            )
+        return params
+
+    def split_pages(self, pages: List[str]) -> List[tuple]:
+        """[(texto, metadados extras)] conforme o modo de chunking."""
+        if self.chunking == "legal":
+            return self.legal_splitter.split_pages(pages)
+        return [(c, {}) for c in self.text_splitter.split_text("\n".join(pages))]
 
-    def process_pdfs(self, pdf_paths: Dict[str, str]) -> List[Document]:
+    def process_pdfs(
+        self, pdf_paths: Dict[str, str], workers: int = PDF_EXTRACT_WORKERS
+    ) -> List[Document]:
         docs: List[Document] = []
+        params = self._chunking_params()
+        pending: Dict[str, str] = {}
         for doc_name, pdf_path in pdf_paths.items():
-            print(f"Processando {doc_name}...")
             if not os.path.exists(pdf_path):
                 print(f"Arquivo não encontrado: {pdf_path}")
                 continue
-            text = self.extract_text_from_pdf(pdf_path)
-            if not text.strip():
+            if self.manifest.check(doc_name, pdf_path, params):
+                print(f"{doc_name}: inalterado, usando índice existente")
+                continue
+            pending[doc_name] = pdf_path
+        if not pending:
+            return docs
+
+        print(f"Extraindo {len(pending)} documento(s)...")
+        extracted = self.extract_pages_parallel(pending, workers)
+        for doc_name, pdf_path in pending.items():
+            print(f"Processando {doc_name}...")
+            pages = extracted.get(doc_name, [])
+            if not "".join(pages).strip():
+                # fica fora do manifesto: é processado de novo no próximo ingest
                 print(f"Nenhum texto extraído de {pdf_path}")
                 continue
-            chunks = self.text_splitter.split_text(text)
-            for chunk in chunks:
+            chunks = self.split_pages(pages)
+            for chunk, extra in chunks:
                 docs.append(
                     Document(
                         page_content=chunk,
                         metadata={
+                            **extra,
                             "source": doc_name,
                             "file_path": pdf_path,
                             "type": "legal_document",
@@ -70,10 +298,115 @@ class EmbeddingProcessor:
                         },
                     )
                 )
+            self.manifest.stage(doc_name, pdf_path, params, len(chunks))
             print(f"{doc_name}: {len(chunks)} chunks criados")
         return docs
 
-    def create_vectorstore(self, documents: List[Document]) -> Chroma:
+    def _drop_stale_chunks(self, documents: List[Document]) -> None:
+        """Remove chunks antigos de documentos que mudaram desde o último ingest."""
+        current: Dict[str, set] = {}
+        for d in documents:
+            current.setdefault(d.metadata["source"], set()).add(d.metadata["doc_id"])
+        for doc_name in self.manifest.staged():
+            if not self.manifest.previous(doc_name) or doc_name not in current:
+                continue
+            old = self.vectorstore._collection.get(
+                where={"source": doc_name}, include=[]
+            ).get("ids", [])
+            stale = [i for i in old if i not in current[doc_name]]
+            if stale:
+                print(f"{doc_name}: removendo {len(stale)} chunks obsoletos")
+                self.vectorstore._collection.delete(ids=stale)
+
+    def _existing_ids(self, ids: List[str], batch: int = 1000) -> set:
+        existing = set()
+        for i in range(0, len(ids), batch):
+            got = self.vectorstore._collection.get(ids=ids[i : i + batch], include=[])
+            existing.update(got.get("ids", []))
+        return existing
+
+    def _ingest(
+        self, documents: List[Document], batch_size: int, concurrency: int
+    ) -> None:
+        """
+        Pipeline em dois estágios ligados por uma fila:
+        - embed: até `concurrency` lotes sendo embutidos em paralelo;
+        - write: uma única thread grava os lotes prontos no Chroma (upsert).
+
+        Se o processo cair no meio, os lotes já gravados são pulados na
+        próxima execução (ids existentes) e o manifesto não é atualizado.
+        """
+        batches = [
+            documents[i : i + batch_size] for i in range(0, len(documents), batch_size)
+        ]
+        total = len(documents)
+        # limita lotes embutidos aguardando escrita (memória constante); cada
+        # vaga é devolvida uma única vez, pelo writer, depois de tratar o lote
+        slots = threading.Semaphore(concurrency * 2)
+        ready: "queue.Queue" = queue.Queue()
+        errors: List[BaseException] = []
+        done = 0
+        t0 = time.perf_counter()
+
+        def embed(batch: List[Document]):
+            try:
+                vectors = self.embeddings.embed_documents(
+                    [d.page_content for d in batch]
+                )
+                ready.put((batch, vectors))
+            except BaseException as e:
+                ready.put((batch, e))
+
+        def write():
+            nonlocal done
+            for _ in batches:
+                batch, vectors = ready.get()
+                try:
+                    if isinstance(vectors, BaseException):
+                        raise vectors
+                    if not errors:
+                        self.vectorstore._collection.upsert(
+                            ids=[d.metadata["doc_id"] for d in batch],
+                            embeddings=vectors,
+                            documents=[d.page_content for d in batch],
+                            metadatas=[d.metadata for d in batch],
+                        )
+                        done += len(batch)
+                        rate = done / (time.perf_counter() - t0)
+                        print(
+                            f"[Ingestão] {done}/{total} chunks "
+                            f"({100 * done / total:.1f}%) - {rate:.1f} chunks/s"
+                        )
+                except BaseException as e:
+                    errors.append(e)
+                finally:
+                    slots.release()
+
+        writer = threading.Thread(target=write, name="chroma-writer", daemon=True)
+        writer.start()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for batch in batches:
+                slots.acquire()
+                if errors:
+                    # a vaga volta no finally do writer, como nos outros lotes
+                    ready.put((batch, errors[0]))
+                    continue
+                pool.submit(embed, batch)
+        writer.join()
+        if errors:
+            raise errors[0]
+        elapsed = time.perf_counter() - t0
+        print(
+            f"[Ingestão] {done} chunks em {elapsed:.1f}s "
+            f"({done / elapsed if elapsed else 0:.1f} chunks/s)"
+        )
+
+    def create_vectorstore(
+        self,
+        documents: List[Document],
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY,
+    ) -> Chroma:
         # Always open the same named collection so we can check existing IDs
         self.vectorstore = Chroma(
             collection_name=COLLECTION_NAME,
@@ -82,37 +415,41 @@ class EmbeddingProcessor:
         )
 
         if not documents:
+            self.manifest.commit()
             return self.vectorstore
 
-        # ✅ only add NEW ids (skip what’s already there)
-        all_ids = [d.metadata["doc_id"] for d in documents]
-        # query only these ids; returns the ones that already exist
-        existing = set(self.vectorstore._collection.get(ids=all_ids).get("ids", []))
+        self._drop_stale_chunks(documents)
 
-        to_add_texts, to_add_metas, to_add_ids = [], [], []
+        # ✅ only add NEW ids (skip what’s already there)
+        existing = self._existing_ids([d.metadata["doc_id"] for d in documents])
+        to_add: Dict[str, Document] = {}
+        kept: Dict[str, Document] = {}
         for d in documents:
             did = d.metadata["doc_id"]
+            # chunks repetidos no mesmo documento geram o mesmo id
             if did in existing:
-                continue
-            to_add_texts.append(d.page_content)
-            to_add_metas.append(d.metadata)
-            to_add_ids.append(did)
-
-        if to_add_texts:
-            print(f"Adicionando {len(to_add_texts)} novos chunks…")
-            # add in batches to keep memory steady
-            B = 10
-            for i in range(0, len(to_add_texts), B):
-                print(f"Adicionando chunks {i} a {i + B}...")
-                self.vectorstore.add_texts(
-                    texts=to_add_texts[i : i + B],
-                    metadatas=to_add_metas[i : i + B],
-                    ids=to_add_ids[i : i + B],
+                kept.setdefault(did, d)
+            elif did not in to_add:
+                to_add[did] = d
+
+        if kept:
+            # mesmo texto (mesmo id), mas os metadados podem ter mudado
+            # (rótulo do artigo, páginas): atualiza sem embutir de novo
+            ids = list(kept)
+            for i in range(0, len(ids), 1000):
+                self.vectorstore._collection.update(
+                    ids=ids[i : i + 1000],
+                    metadatas=[kept[did].metadata for did in ids[i : i + 1000]],
                 )
 
+        if to_add:
+            print(f"Adicionando {len(to_add)} novos chunks…")
+            self._ingest(list(to_add.values()), batch_size, concurrency)
         else:
             print("Nada novo para adicionar (índice já atualizado).")
 
+        # só marca como indexado depois que tudo foi gravado no Chroma
+        self.manifest.commit()
         return self.vectorstore
 
     def search_similar(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
@@ -0,0 +1,232 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_TITLE_RE = re.compile(r"^\s*T[ÍI]TULO\s+([IVXLC]+)\b", re.IGNORECASE)
+_CHAPTER_RE = re.compile(r"^\s*CAP[ÍI]TULO\s+([IVXLC]+)\b", re.IGNORECASE)
+_SECTION_RE = re.compile(r"^\s*SE[ÇC][ÃA]O\s+([IVXLC]+)\b", re.IGNORECASE)
+# "Art. 1°", "Art. 1o", "Art. 302.", "Art. 12-A" e "Art. 3 8." (PDF com espaço)
+_ARTICLE_RE = re.compile(
+    r"^\s*Art\.\s*(\d+(?: \d+(?=\s*[.°º]))?)\s*[°ºo]?(?:\s*-\s*([A-Z])\b)?"
+)
+# texto citado (nova redação de outra lei): abre com aspas antes do "Art."
+_QUOTE_OPEN_RE = re.compile(r"^\s*[“\"]")
+_QUOTE_CLOSE_RE = re.compile(r"[”\"]")
+# início de parágrafo ou inciso, usados para quebrar artigos longos
+_PARAGRAPH_RE = re.compile(
+    r"^\s*(§|Parágrafo único|[IVXLC]+\s*[-–]|[a-z]\))", re.IGNORECASE
+)
+
+
+def _number(art: "re.Match") -> int:
+    return int(art.group(1).replace(" ", ""))
+
+
+class LegalTextSplitter:
+    """
+    Divide textos legais brasileiros respeitando a estrutura
+    Título/Capítulo/Seção/Art./§/inciso.
+
+    Cada chunk contém um artigo inteiro (ou uma sequência de artigos curtos
+    do mesmo capítulo/seção), sem sobreposição, com metadados de título,
+    capítulo, seção, artigo(s) e páginas. Artigos maiores que `max_chars`
+    são quebrados nos limites de parágrafo/inciso, repetindo o cabeçalho
+    "Art. N" em cada parte.
+    """
+
+    # muda quando os chunks ou metadados mudam (força reindexação)
+    VERSION = 2
+
+    def __init__(self, max_chars: int = 1500, min_chars: int = 1000):
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+
+    def _blocks(self, pages: List[str]) -> List[Dict[str, Any]]:
+        """Um bloco por artigo (mais o preâmbulo), com contexto e páginas."""
+        ctx = {"title": "", "chapter": "", "section": ""}
+        blocks: List[Dict[str, Any]] = []
+        current: Optional[Dict[str, Any]] = None
+        pending_heading: Optional[str] = None
+        # dentro de aspas ("passa a vigorar com a seguinte redação: “Art. 30
+        # ...” (NR)") nada é cabeçalho: o trecho fica no artigo que o cita
+        quoted = False
+        last_number = 0
+
+        def close():
+            nonlocal current
+            if current and "".join(current["lines"]).strip():
+                blocks.append(current)
+            current = None
+
+        for page_no, page in enumerate(pages, start=1):
+            for line in page.splitlines():
+                stripped = line.strip()
+                if not stripped:
+                    continue
+                in_quote = quoted or bool(_QUOTE_OPEN_RE.match(stripped))
+                if in_quote:
+                    body = stripped if quoted else stripped[1:]
+                    quoted = not _QUOTE_CLOSE_RE.search(body)
+                    pending_heading = None
+                heading = None
+                for key, regex in (
+                    ("title", _TITLE_RE),
+                    ("chapter", _CHAPTER_RE),
+                    ("section", _SECTION_RE),
+                ):
+                    if not in_quote and regex.match(stripped):
+                        heading = key
+                        break
+                if heading:
+                    close()
+                    label = stripped.split()[0].capitalize() + " " + stripped.split()[1]
+                    ctx[heading] = label
+                    # um título novo zera capítulo/seção; capítulo zera seção
+                    if heading == "title":
+                        ctx["chapter"] = ctx["section"] = ""
+                    elif heading == "chapter":
+                        ctx["section"] = ""
+                    pending_heading = heading
+                    continue
+                art = None if in_quote else _ARTICLE_RE.match(stripped)
+                if art and _number(art) < last_number:
+                    # numeração só cresce; número menor é citação sem aspas
+                    art = None
+                if pending_heading and not art and len(ctx[pending_heading]) < 200:
+                    # linhas seguintes ao cabeçalho são o nome ("Das Férias"),
+                    # às vezes quebrado em duas linhas
+                    sep = " " if " - " in ctx[pending_heading] else " - "
+                    ctx[pending_heading] += sep + stripped
+                    continue
+                pending_heading = None
+                if art or current is None:
+                    close()
+                    number = _number(art) if art else 0
+                    last_number = max(last_number, number)
+                    current = {
+                        **ctx,
+                        "article": (
+                            f"{number}-{art.group(2)}"
+                            if art and art.group(2)
+                            else str(number) if art else ""
+                        ),
+                        "article_num": number,
+                        "page_start": page_no,
+                        "page_end": page_no,
+                        "lines": [],
+                    }
+                current["lines"].append(stripped)
+                current["page_end"] = page_no
+        close()
+        return blocks
+
+    def _split_long(self, block: Dict[str, Any]) -> List[str]:
+        lines = block["lines"]
+        text = "\n".join(lines)
+        if len(text) <= self.max_chars:
+            return [text]
+        header = [f"Art. {block['article']} (cont.)"] if block["article"] else []
+        parts: List[List[str]] = []
+        buf: List[str] = []
+        size = 0
+        para = 0  # posição em buf do último início de parágrafo/inciso
+        for line in lines:
+            if buf and size + len(line) + 1 > self.max_chars:
+                # corta no último parágrafo; se não houver, na própria linha
+                cut = para if para > len(header) else len(buf)
+                parts.append(buf[:cut])
+                buf = header + buf[cut:]
+                size = sum(len(l) + 1 for l in buf)
+                para = 0
+            if _PARAGRAPH_RE.match(line):
+                para = len(buf)
+            buf.append(line)
+            size += len(line) + 1
+        parts.append(buf)
+        out = []
+        for part in parts:
+            piece = "\n".join(part)
+            # linha única maior que o limite: corta no espaço
+            while len(piece) > self.max_chars:
+                cut = piece.rfind(" ", 0, self.max_chars)
+                cut = cut if cut > self.max_chars // 2 else self.max_chars
+                out.append(piece[:cut])
+                piece = "\n".join(header + [piece[cut:].lstrip()])
+            out.append(piece)
+        return out
+
+    def split_pages(self, pages: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Retorna [(texto, metadados)] na ordem do documento."""
+        chunks: List[Tuple[str, Dict[str, Any]]] = []
+        merged: Optional[Dict[str, Any]] = None
+
+        def meta(
+            b: Dict[str, Any], first: int, last: int, last_label: str = ""
+        ) -> Dict[str, Any]:
+            # "12-A" é um artigo; faixas de artigos juntados são "12 a 15"
+            article = b["article"]
+            if last_label and last_label != article:
+                article = f"{article} a {last_label}"
+            return {
+                "title": b["title"],
+                "chapter": b["chapter"],
+                "section": b["section"],
+                "article": article,
+                "article_start": first,
+                "article_end": last,
+                "page_start": b["page_start"],
+                "page_end": b["page_end"],
+            }
+
+        def flush():
+            nonlocal merged
+            if merged:
+                chunks.append(
+                    (
+                        merged["text"],
+                        meta(
+                            merged,
+                            merged["first"],
+                            merged["last"],
+                            merged["last_label"],
+                        ),
+                    )
+                )
+            merged = None
+
+        for block in self._blocks(pages):
+            pieces = self._split_long(block)
+            if len(pieces) > 1:
+                flush()
+                n = block["article_num"]
+                for piece in pieces:
+                    chunks.append((piece, meta(block, n, n)))
+                continue
+            text = pieces[0]
+            # o preâmbulo (article_num 0) nunca se junta a artigos
+            same_scope = (
+                merged
+                and merged["first"]
+                and block["article_num"]
+                and all(merged[k] == block[k] for k in ("title", "chapter", "section"))
+            )
+            if (
+                same_scope
+                and len(merged["text"]) < self.min_chars
+                and len(merged["text"]) + len(text) + 1 <= self.max_chars
+            ):
+                # junta artigos curtos vizinhos do mesmo capítulo/seção
+                merged["text"] += "\n" + text
+                merged["last"] = block["article_num"]
+                merged["last_label"] = block["article"]
+                merged["page_end"] = block["page_end"]
+                continue
+            flush()
+            merged = {
+                **block,
+                "text": text,
+                "first": block["article_num"],
+                "last": block["article_num"],
+                "last_label": block["article"],
+            }
+        flush()
+        return chunks
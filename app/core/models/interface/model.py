@@ -1,2 +1,259 @@
-def export_model():
-    return "qwen3:0.6b"
+import os
+import time
+import random
+import asyncio
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import httpx
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+from ollama import ResponseError
+
+from app.core.config.metrics import MODEL_FALLBACKS
+
+# None = o cliente do ollama usa OLLAMA_HOST ou http://localhost:11434
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL") or None
+# tempo que o Ollama mantém o modelo carregado depois da última chamada
+# ("30m", "2h", "600"; "-1" = para sempre)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "32"))
+OLLAMA_RETRIES = int(os.getenv("OLLAMA_RETRIES", "3"))
+OLLAMA_RETRY_BACKOFF = float(os.getenv("OLLAMA_RETRY_BACKOFF", "0.25"))
+
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen3:0.6b")
+# modelo por agente: "Agente Supervisor=qwen3:0.6b,Agente de Normas=qwen3:4b"
+AGENT_MODELS: Dict[str, str] = dict(
+    (part.split("=", 1)[0].strip(), part.split("=", 1)[1].strip())
+    for part in os.getenv("AGENT_MODELS", "").split(",")
+    if "=" in part
+)
+# modelo menor usado quando o do agente está ocupado ou estoura o SLO;
+# vazio = OLLAMA_MODEL
+MODEL_FALLBACK = os.getenv("MODEL_FALLBACK", "")
+# segundos até o primeiro token (streaming) ou a resposta completa; 0 = sem SLO
+MODEL_SLO_SECONDS = float(os.getenv("MODEL_SLO_SECONDS", "0"))
+# chamadas simultâneas ao modelo principal antes de desviar para o fallback
+# (em geral o OLLAMA_NUM_PARALLEL do servidor); 0 = sem limite
+MODEL_MAX_INFLIGHT = int(os.getenv("MODEL_MAX_INFLIGHT", "0"))
+
+# falhas em que a requisição não chegou a ser processada pelo Ollama;
+# timeouts de leitura não entram (a geração pode já ter rodado)
+_RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# 503 = fila do Ollama cheia (OLLAMA_MAX_QUEUE); 502 = proxy na frente sem
+# conseguir falar com o Ollama. 504 não entra: é o timeout de leitura do
+# proxy, e a geração pode já ter rodado
+_RETRY_STATUS = frozenset({502, 503})
+
+
+def export_model(agent: Optional[str] = None) -> str:
+    return AGENT_MODELS.get(agent or "", OLLAMA_MODEL)
+
+
+def configured_models() -> List[str]:
+    """Todos os modelos de chat que os agentes podem usar (para o warm-up)."""
+    models = {OLLAMA_MODEL, *AGENT_MODELS.values()}
+    if MODEL_FALLBACK:
+        models.add(MODEL_FALLBACK)
+    return sorted(models)
+
+
+def _keep_alive_seconds(value: str) -> int:
+    # OllamaEmbeddings só aceita inteiro (segundos)
+    units = {"s": 1, "m": 60, "h": 3600}
+    value = value.strip().lower()
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def _backoff(attempt: int) -> float:
+    # exponencial com jitter completo, para réplicas não tentarem juntas
+    return random.uniform(0, OLLAMA_RETRY_BACKOFF * 2**attempt)
+
+
+class _RetryTransport(httpx.HTTPTransport):
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(OLLAMA_RETRIES + 1):
+            last = attempt == OLLAMA_RETRIES
+            try:
+                response = super().handle_request(request)
+            except _RETRY_ERRORS:
+                if last:
+                    raise
+            else:
+                if response.status_code not in _RETRY_STATUS or last:
+                    return response
+                response.close()
+            time.sleep(_backoff(attempt))
+
+
+class _AsyncRetryTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(OLLAMA_RETRIES + 1):
+            last = attempt == OLLAMA_RETRIES
+            try:
+                response = await super().handle_async_request(request)
+            except _RETRY_ERRORS:
+                if last:
+                    raise
+            else:
+                if response.status_code not in _RETRY_STATUS or last:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(_backoff(attempt))
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=OLLAMA_MAX_CONNECTIONS,
+        max_keepalive_connections=OLLAMA_MAX_CONNECTIONS,
+        keepalive_expiry=300,
+    )
+
+
+@lru_cache(maxsize=1)
+def _sync_transport() -> httpx.HTTPTransport:
+    return _RetryTransport(limits=_limits())
+
+
+@lru_cache(maxsize=1)
+def _async_transport() -> httpx.AsyncHTTPTransport:
+    return _AsyncRetryTransport(limits=_limits())
+
+
+def _client_options() -> dict:
+    """
+    Parâmetros comuns a todos os clientes: o mesmo pool de conexões
+    (transport) para todos os agentes e embeddings, timeouts e keep_alive.
+    """
+    return {
+        "base_url": OLLAMA_BASE_URL,
+        "keep_alive": _keep_alive_seconds(OLLAMA_KEEP_ALIVE),
+        "client_kwargs": {
+            "timeout": httpx.Timeout(OLLAMA_TIMEOUT, connect=OLLAMA_CONNECT_TIMEOUT)
+        },
+        "sync_client_kwargs": {"transport": _sync_transport()},
+        "async_client_kwargs": {"transport": _async_transport()},
+    }
+
+
+def get_chat_model(model: Optional[str] = None) -> ChatOllama:
+    """Um ChatOllama por modelo, compartilhado pelos agentes."""
+    return _chat_model(model or export_model())
+
+
+@lru_cache(maxsize=None)
+def _chat_model(model: str) -> ChatOllama:
+    return ChatOllama(model=model, **_client_options())
+
+
+@lru_cache(maxsize=None)
+def get_embedding_model(model: str) -> OllamaEmbeddings:
+    return OllamaEmbeddings(model=model, **_client_options())
+
+
+class ModelUnavailable(Exception):
+    """Modelo principal ocupado ou acima do SLO; aciona o fallback."""
+
+
+_inflight: Dict[str, int] = {}
+_inflight_lock = threading.Lock()
+
+
+class GuardedChatOllama(ChatOllama):
+    """
+    ChatOllama que desiste cedo em vez de deixar a requisição esperando:
+    levanta ModelUnavailable se já há `max_inflight` chamadas ao mesmo
+    modelo ou se o primeiro token (ou a resposta, sem streaming) não chega
+    em `slo_seconds`.
+    """
+
+    slo_seconds: float = 0.0
+    max_inflight: int = 0
+
+    def _unavailable(self, reason: str) -> ModelUnavailable:
+        MODEL_FALLBACKS.inc(model=self.model, reason=reason)
+        print(f"[Modelo] {self.model} indisponível ({reason}), usando fallback")
+        return ModelUnavailable(f"{self.model}: {reason}")
+
+    @contextmanager
+    def _slot(self):
+        with _inflight_lock:
+            running = _inflight.get(self.model, 0)
+            if self.max_inflight and running >= self.max_inflight:
+                raise self._unavailable("busy")
+            _inflight[self.model] = running + 1
+        try:
+            yield
+        finally:
+            with _inflight_lock:
+                _inflight[self.model] -= 1
+
+    def _generate(self, *args, **kwargs):
+        with self._slot():
+            return super()._generate(*args, **kwargs)
+
+    def _stream(self, *args, **kwargs):
+        with self._slot():
+            yield from super()._stream(*args, **kwargs)
+
+    async def _agenerate(self, *args, **kwargs):
+        with self._slot():
+            if not self.slo_seconds:
+                return await super()._agenerate(*args, **kwargs)
+            try:
+                return await asyncio.wait_for(
+                    super()._agenerate(*args, **kwargs), self.slo_seconds
+                )
+            except asyncio.TimeoutError:
+                raise self._unavailable("slo") from None
+
+    async def _astream(self, *args, **kwargs):
+        with self._slot():
+            stream = super()._astream(*args, **kwargs)
+            try:
+                # depois do primeiro token não dá mais para trocar de modelo
+                first = await asyncio.wait_for(
+                    stream.__anext__(), self.slo_seconds or None
+                )
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                await stream.aclose()
+                raise self._unavailable("slo") from None
+            yield first
+            async for chunk in stream:
+                yield chunk
+
+
+# erros que fazem a chamada cair para o modelo de fallback
+_FALLBACK_ERRORS = (ModelUnavailable, ResponseError, httpx.TransportError)
+
+
+@lru_cache(maxsize=None)
+def _guarded_model(model: str) -> GuardedChatOllama:
+    return GuardedChatOllama(
+        model=model,
+        slo_seconds=MODEL_SLO_SECONDS,
+        max_inflight=MODEL_MAX_INFLIGHT,
+        **_client_options(),
+    )
+
+
+def get_agent_model(agent: Optional[str] = None):
+    """
+    Modelo do agente (AGENT_MODELS) com fallback para MODEL_FALLBACK quando
+    ele está ocupado, lento ou fora do ar. Sem fallback distinto, é o
+    ChatOllama compartilhado de sempre.
+    """
+    primary = export_model(agent)
+    fallback = MODEL_FALLBACK or OLLAMA_MODEL
+    if fallback == primary:
+        return get_chat_model(primary)
+    return _guarded_model(primary).with_fallbacks(
+        [get_chat_model(fallback)], exceptions_to_handle=_FALLBACK_ERRORS
+    )
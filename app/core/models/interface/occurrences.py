@@ -0,0 +1,489 @@
+import os
+import csv
+import json
+import time
+import argparse
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config.router import normalize
+
+# base colunar gerada a partir dos CSVs do CENIPA
+OCCURRENCES_STORE = os.getenv("OCCURRENCES_STORE", "./data/ocorrencias.npz")
+# CSVs (separados por vírgula) para gerar/atualizar a base automaticamente
+OCCURRENCES_CSV = os.getenv("OCCURRENCES_CSV", "")
+
+# dimensão -> colunas aceitas, na ordem de preferência (CENIPA e variações)
+DIMENSIONS: Dict[str, Tuple[str, ...]] = {
+    "ano": ("ocorrencia_ano", "ano"),
+    "uf": ("ocorrencia_uf", "uf", "estado"),
+    "classificacao": ("ocorrencia_classificacao", "classificacao"),
+    "tipo": ("ocorrencia_tipo", "tipo_ocorrencia", "ocorrencia_tipo_categoria"),
+    "categoria": (
+        "aeronave_tipo_veiculo",
+        "aeronave_tipo",
+        "categoria_aeronave",
+        "tipo_veiculo",
+    ),
+}
+# dimensões com vários valores por ocorrência (vários tipos, várias aeronaves):
+# a ocorrência entra em cada um dos grupos
+MULTI_VALUED = ("tipo", "categoria")
+METRICS: Dict[str, Tuple[str, ...]] = {
+    "fatalidades": ("aeronave_fatalidades_total", "total_fatalidades", "fatalidades"),
+}
+# o ano sai da data quando não há coluna própria
+DATE_COLUMNS = ("ocorrencia_dia", "data_ocorrencia", "ocorrencia_data", "data")
+# cada tabela do CENIPA usa um nome para a chave da ocorrência
+KEY_COLUMNS = tuple(
+    ["codigo_ocorrencia"] + [f"codigo_ocorrencia{i}" for i in range(1, 5)]
+)
+MISSING = "NÃO INFORMADO"
+# formato do .npz (2: dimensões como pares ocorrência/valor)
+STORE_VERSION = 2
+_NULLS = {"", "***", "NULL", "NAN", "NONE", "-"}
+
+
+def _value(raw: Optional[str]) -> str:
+    value = (raw or "").strip()
+    return MISSING if value.upper() in _NULLS else value.upper()
+
+
+def _year(raw: str) -> str:
+    # "23/05/2019", "2019-05-23" ou "2019"
+    raw = (raw or "").strip()
+    for part in (raw[-4:], raw[:4]):
+        if part.isdigit() and 1900 < int(part) < 2100:
+            return part
+    return MISSING
+
+
+def _number(raw: Optional[str]) -> float:
+    try:
+        return float((raw or "").replace(",", "."))
+    except ValueError:
+        return 0.0
+
+
+def _read_csv(path: str) -> Iterable[Dict[str, str]]:
+    # exports do CENIPA: ";" e UTF-8, às vezes latin-1
+    for encoding in ("utf-8-sig", "latin-1"):
+        try:
+            with open(path, newline="", encoding=encoding) as f:
+                sample = f.read(8192)
+                f.seek(0)
+                delimiter = ";" if sample.count(";") >= sample.count(",") else ","
+                reader = csv.DictReader(f, delimiter=delimiter)
+                reader.fieldnames = [
+                    normalize(h).strip().lower() for h in reader.fieldnames or []
+                ]
+                rows = list(reader)
+            return rows
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"não foi possível decodificar {path}")
+
+
+def _pick(header: Sequence[str], names: Sequence[str]) -> Optional[str]:
+    return next((n for n in names if n in header), None)
+
+
+def read_occurrences(paths: Sequence[str]) -> List[Dict[str, object]]:
+    """
+    Lê um ou mais CSVs e devolve um registro por ocorrência.
+
+    Com a chave codigo_ocorrencia* (exports separados do CENIPA:
+    ocorrencia.csv, ocorrencia_tipo.csv, aeronave.csv) os arquivos são
+    juntados pela chave. Dimensões de MULTI_VALUED guardam a lista de valores
+    distintos; as demais ficam com o primeiro valor informado. As métricas
+    (fatalidades) são somadas na ocorrência e, quando a mesma linha traz uma
+    dimensão de MULTI_VALUED (aeronave.csv: categoria), também por valor em
+    "<métrica>:<dimensão>". Sem chave, cada linha é uma ocorrência.
+    """
+    records: Dict[str, Dict[str, object]] = {}
+    order: List[str] = []
+    for path in paths:
+        rows = _read_csv(path)
+        if not rows:
+            continue
+        header = list(rows[0].keys())
+        key_col = _pick(header, KEY_COLUMNS)
+        dims = {d: _pick(header, cols) for d, cols in DIMENSIONS.items()}
+        date_col = _pick(header, DATE_COLUMNS)
+        metrics = {m: _pick(header, cols) for m, cols in METRICS.items()}
+        for i, row in enumerate(rows):
+            key = (row.get(key_col) or "").strip() if key_col else ""
+            key = key or f"{path}:{i}"
+            record = records.get(key)
+            if record is None:
+                record = records[key] = {}
+                order.append(key)
+            for dim, col in dims.items():
+                if not col:
+                    continue
+                value = _year(row[col]) if dim == "ano" else _value(row.get(col))
+                if dim in MULTI_VALUED:
+                    values = record.setdefault(dim, [])
+                    if value not in values:
+                        values.append(value)
+                elif record.get(dim, MISSING) == MISSING:
+                    record[dim] = value
+            if date_col and record.get("ano", MISSING) == MISSING:
+                record["ano"] = _year(row.get(date_col, ""))
+            for metric, col in metrics.items():
+                if not col:
+                    continue
+                amount = _number(row.get(col))
+                record[metric] = record.get(metric, 0.0) + amount
+                for dim in MULTI_VALUED:
+                    if dims[dim]:
+                        split = record.setdefault(f"{metric}:{dim}", {})
+                        value = _value(row.get(dims[dim]))
+                        split[value] = split.get(value, 0.0) + amount
+    for record in records.values():
+        for dim in MULTI_VALUED:
+            values = record.get(dim)
+            if values and len(values) > 1 and MISSING in values:
+                # "não informado" só fica ao lado de outros valores quando
+                # carrega parte da métrica (aeronave sem categoria com mortos)
+                keep = any(record.get(f"{m}:{dim}", {}).get(MISSING) for m in METRICS)
+                if not keep:
+                    values.remove(MISSING)
+    return [records[k] for k in order]
+
+
+def _dim_values(record: Dict[str, object], dim: str) -> List[str]:
+    value = record.get(dim)
+    if isinstance(value, list):
+        return value or [MISSING]
+    return [str(value) if value is not None else MISSING]
+
+
+def build_store(paths: Sequence[str], out: str = OCCURRENCES_STORE) -> int:
+    """
+    Gera a base colunar (.npz): cada dimensão vira um dicionário de valores
+    + pares (ocorrência, código int32), com o índice de agrupamento
+    pré-calculado (pares ordenados por código e offsets de cada valor).
+    """
+    t0 = time.perf_counter()
+    records = read_occurrences(paths)
+    arrays: Dict[str, np.ndarray] = {}
+    for dim in DIMENSIONS:
+        pairs = [(row, v) for row, r in enumerate(records) for v in _dim_values(r, dim)]
+        values = sorted({v for _, v in pairs}, key=lambda v: (v == MISSING, v))
+        lookup = {v: i for i, v in enumerate(values)}
+        codes = np.fromiter((lookup[v] for _, v in pairs), np.int32, len(pairs))
+        order = np.argsort(codes, kind="stable").astype(np.int32)
+        counts = np.bincount(codes, minlength=len(values))
+        arrays[f"{dim}_values"] = np.array(values, dtype=str)
+        arrays[f"{dim}_rows"] = np.fromiter((r for r, _ in pairs), np.int32, len(pairs))
+        arrays[f"{dim}_codes"] = codes
+        arrays[f"{dim}_order"] = order
+        arrays[f"{dim}_offsets"] = np.concatenate(([0], np.cumsum(counts)))
+        for metric in METRICS:
+            if dim in MULTI_VALUED and any(f"{metric}:{dim}" in r for r in records):
+                # parte da métrica de cada par (ocorrência, valor); sem
+                # divisão informada, o par fica com o total da ocorrência
+                split = [records[row].get(f"{metric}:{dim}") for row, _ in pairs]
+                arrays[f"metric_{metric}:{dim}"] = np.array(
+                    [
+                        (
+                            part.get(v, 0.0)
+                            if part is not None
+                            else records[row].get(metric, 0.0)
+                        )
+                        for (row, v), part in zip(pairs, split)
+                    ],
+                    dtype=np.float32,
+                )
+    for metric in METRICS:
+        arrays[f"metric_{metric}"] = np.array(
+            [r.get(metric, 0.0) for r in records], dtype=np.float32
+        )
+    meta = {
+        "sources": list(paths),
+        "rows": len(records),
+        "built_at": time.time(),
+        "version": STORE_VERSION,
+    }
+    arrays["meta"] = np.array(json.dumps(meta, ensure_ascii=False))
+
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    tmp = f"{out}.tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, out)
+    print(
+        f"[Ocorrências] {len(records)} ocorrências de {len(paths)} arquivo(s) "
+        f"-> {out} ({time.perf_counter() - t0:.2f}s)"
+    )
+    return len(records)
+
+
+class OccurrenceStore:
+    """
+    Base colunar de ocorrências em memória (NumPy) para agregações.
+
+    Cada dimensão é uma lista de pares (ocorrência, valor), com um par por
+    ocorrência nas dimensões simples e vários em MULTI_VALUED. Filtros usam o
+    índice de cada dimensão (fatia de pares já ordenados por valor), sem
+    varrer a tabela; agrupamentos expandem as ocorrências pelos seus pares,
+    combinam os códigos num inteiro e somam com np.bincount. Uma ocorrência
+    com dois tipos conta nos dois grupos, mas uma vez só no total.
+    """
+
+    def __init__(self, path: str = OCCURRENCES_STORE):
+        with np.load(path, allow_pickle=False) as data:
+            self.meta = json.loads(str(data["meta"]))
+            if self.meta.get("version") != STORE_VERSION:
+                raise ValueError(
+                    f"{path} foi gerado em outro formato; gere de novo com "
+                    "python -m app.core.models.interface.occurrences <csvs>"
+                )
+            self.values = {d: data[f"{d}_values"].tolist() for d in DIMENSIONS}
+            self.pair_rows = {d: data[f"{d}_rows"] for d in DIMENSIONS}
+            self.codes = {d: data[f"{d}_codes"] for d in DIMENSIONS}
+            self.order = {d: data[f"{d}_order"] for d in DIMENSIONS}
+            self.offsets = {d: data[f"{d}_offsets"] for d in DIMENSIONS}
+            self.metrics = {m: data[f"metric_{m}"] for m in METRICS}
+            # métrica dividida por valor (fatalidades por aeronave)
+            self.pair_metrics = {
+                (m, d): data[f"metric_{m}:{d}"]
+                for m in METRICS
+                for d in MULTI_VALUED
+                if f"metric_{m}:{d}" in data.files
+            }
+        self.rows = int(self.meta["rows"])
+        self._normalized = {
+            d: [normalize(v) for v in values] for d, values in self.values.items()
+        }
+
+    def match(self, dim: str, value) -> List[int]:
+        """Códigos da dimensão para o valor (sem acento/caixa; senão, trecho)."""
+        target = normalize(str(value)).strip()
+        names = self._normalized[dim]
+        exact = [i for i, n in enumerate(names) if n == target]
+        if exact:
+            return exact
+        partial = [i for i, n in enumerate(names) if target and target in n]
+        if not partial:
+            options = ", ".join(self.values[dim][:15])
+            raise ValueError(f"{dim}='{value}' não encontrado. Exemplos: {options}")
+        return partial
+
+    def _pairs_for(self, dim: str, codes: Sequence[int]) -> np.ndarray:
+        order, offsets = self.order[dim], self.offsets[dim]
+        if not codes:
+            return np.empty(0, dtype=order.dtype)
+        return np.concatenate([order[offsets[c] : offsets[c + 1]] for c in codes])
+
+    def _rows_for(self, dim: str, codes: Sequence[int]) -> np.ndarray:
+        return self.pair_rows[dim][self._pairs_for(dim, codes)]
+
+    def _year_codes(self, start: Optional[int], end: Optional[int]) -> List[int]:
+        return [
+            i
+            for i, v in enumerate(self.values["ano"])
+            if v.isdigit()
+            and (start is None or int(v) >= start)
+            and (end is None or int(v) <= end)
+        ]
+
+    def _selections(
+        self,
+        filters: Optional[Dict[str, object]],
+        year_from: Optional[int],
+        year_to: Optional[int],
+    ) -> Dict[str, np.ndarray]:
+        # dimensão -> pares que passam no filtro
+        selections = {
+            dim: self._pairs_for(dim, self.match(dim, value))
+            for dim, value in (filters or {}).items()
+            if value not in (None, "")
+        }
+        if year_from is not None or year_to is not None:
+            years = self._pairs_for("ano", self._year_codes(year_from, year_to))
+            if "ano" in selections:
+                years = np.intersect1d(selections["ano"], years)
+            selections["ano"] = years
+        return selections
+
+    def _mask(self, selections: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+        if not selections:
+            return None
+        mask = np.ones(self.rows, dtype=bool)
+        for dim, pairs in selections.items():
+            selected = np.zeros(self.rows, dtype=bool)
+            selected[self.pair_rows[dim][pairs]] = True
+            mask &= selected
+        return mask
+
+    def mask(
+        self,
+        filters: Optional[Dict[str, object]] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+    ) -> Optional[np.ndarray]:
+        """Máscara booleana das ocorrências que passam nos filtros (None = todas)."""
+        return self._mask(self._selections(filters, year_from, year_to))
+
+    def _weights(
+        self, metric: str, selections: Dict[str, np.ndarray]
+    ) -> Optional[np.ndarray]:
+        if metric == "ocorrencias":
+            return None
+        weights = self.metrics[metric]
+        for dim, pairs in selections.items():
+            split = self.pair_metrics.get((metric, dim))
+            if split is not None:
+                # filtro por categoria: só as fatalidades das aeronaves dela
+                weights = np.bincount(
+                    self.pair_rows[dim][pairs],
+                    weights=split[pairs],
+                    minlength=self.rows,
+                )
+        return weights
+
+    def _expand(
+        self,
+        dim: str,
+        rows: np.ndarray,
+        pairs: Optional[np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Repete cada ocorrência de `rows` uma vez por par seu em `pairs`."""
+        pair_rows = self.pair_rows[dim]
+        if pairs is None:
+            # pares gravados na ordem das ocorrências
+            pairs = np.arange(len(pair_rows))
+        else:
+            pairs = pairs[np.argsort(pair_rows[pairs], kind="stable")]
+        counts = np.bincount(pair_rows[pairs], minlength=self.rows)
+        starts = np.cumsum(counts) - counts
+        repeat = counts[rows]
+        first = np.cumsum(repeat) - repeat
+        within = np.arange(int(repeat.sum())) - np.repeat(first, repeat)
+        return repeat, pairs[np.repeat(starts[rows], repeat) + within]
+
+    def aggregate(
+        self,
+        group_by: Sequence[str] = (),
+        filters: Optional[Dict[str, object]] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        metric: str = "ocorrencias",
+        top: int = 20,
+    ) -> Tuple[List[Tuple[Tuple[str, ...], float]], float]:
+        """
+        Agrega `metric` ("ocorrencias" ou uma de METRICS) por `group_by`.
+        Retorna as `top` maiores combinações (ou em ordem de ano, quando o
+        agrupamento é só por ano) e o total do recorte, que conta cada
+        ocorrência uma vez mesmo quando ela aparece em vários grupos.
+        """
+        for dim in group_by:
+            if dim not in DIMENSIONS:
+                raise ValueError(
+                    f"Dimensão '{dim}' inválida. Use: {', '.join(DIMENSIONS)}"
+                )
+        if metric != "ocorrencias" and metric not in METRICS:
+            raise ValueError(
+                f"Métrica '{metric}' inválida. Use: ocorrencias, {', '.join(METRICS)}"
+            )
+        selections = self._selections(filters, year_from, year_to)
+        mask = self._mask(selections)
+        weights = self._weights(metric, selections)
+        if weights is None:
+            total = float(self.rows if mask is None else mask.sum())
+        else:
+            total = float(weights.sum() if mask is None else weights[mask].sum())
+        if not group_by:
+            return [((), total)], total
+
+        if len(group_by) == 1 and mask is None and weights is None:
+            # contagem por uma dimensão: já está nos offsets do índice
+            sizes = np.diff(self.offsets[group_by[0]])
+            keys = np.nonzero(sizes)[0]
+            sums = sizes[keys].astype(np.float64)
+        else:
+            rows = np.arange(self.rows) if mask is None else np.nonzero(mask)[0]
+            key = np.zeros(len(rows), dtype=np.int64)
+            values = None if weights is None else weights[rows]
+            for dim in group_by:
+                repeat, pairs = self._expand(dim, rows, selections.get(dim))
+                rows = np.repeat(rows, repeat)
+                key = np.repeat(key, repeat) * len(self.values[dim])
+                key += self.codes[dim][pairs]
+                if values is not None:
+                    split = self.pair_metrics.get((metric, dim))
+                    values = (
+                        split[pairs].astype(np.float64)
+                        if split is not None
+                        else np.repeat(values, repeat)
+                    )
+            keys, inverse = np.unique(key, return_inverse=True)
+            sums = np.bincount(inverse, weights=values, minlength=len(keys))
+
+        if list(group_by) == ["ano"]:
+            picked = np.arange(len(keys))
+        else:
+            picked = np.argsort(-sums, kind="stable")[:top]
+        out = []
+        for i in picked:
+            k, labels = int(keys[i]), []
+            for dim in reversed(group_by):
+                size = len(self.values[dim])
+                labels.append(self.values[dim][k % size])
+                k //= size
+            out.append((tuple(reversed(labels)), float(sums[i])))
+        return out, total
+
+
+_store: Optional[OccurrenceStore] = None
+_store_lock = threading.Lock()
+
+
+def _stale(path: str, sources: Sequence[str]) -> bool:
+    if not os.path.exists(path):
+        return True
+    with np.load(path, allow_pickle=False) as data:
+        if json.loads(str(data["meta"])).get("version") != STORE_VERSION:
+            return True
+    built = os.path.getmtime(path)
+    return any(os.path.getmtime(s) > built for s in sources if os.path.exists(s))
+
+
+def get_occurrence_store() -> Optional[OccurrenceStore]:
+    """
+    Base carregada uma vez por processo. Com OCCURRENCES_CSV, (re)gera o
+    .npz quando ele não existe ou é mais antigo que os CSVs.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                sources = [p.strip() for p in OCCURRENCES_CSV.split(",") if p.strip()]
+                if sources and _stale(OCCURRENCES_STORE, sources):
+                    build_store(sources, OCCURRENCES_STORE)
+                if not os.path.exists(OCCURRENCES_STORE):
+                    return None
+                _store = OccurrenceStore(OCCURRENCES_STORE)
+    return _store
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Gera a base colunar de ocorrências a partir dos CSVs do CENIPA. "
+            "Ex.: python -m app.core.models.interface.occurrences "
+            "ocorrencia.csv ocorrencia_tipo.csv aeronave.csv"
+        )
+    )
+    parser.add_argument("files", nargs="+", help="CSVs (';' ou ',')")
+    parser.add_argument("--out", default=OCCURRENCES_STORE)
+    args = parser.parse_args(argv)
+    build_store(args.files, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,17 @@
+# Funções de extração usadas pelos processos do pool em embedding.py.
+# Ficam num módulo leve (só PyPDF2) para que cada processo não precise
+# importar langchain/chroma ao iniciar.
+from typing import List
+
+import PyPDF2
+
+
+def extract_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    with open(pdf_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        return [(reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+def page_count(pdf_path: str) -> int:
+    with open(pdf_path, "rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
@@ -0,0 +1,557 @@
+import os
+import re
+import gzip
+import json
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.core.models.interface.triplestore import SPARQL_QUERY_URL
+
+# endpoint do Graph Store Protocol do Fuseki (/ds/data); por padrão o mesmo
+# dataset do SPARQL_QUERY_URL
+SPARQL_GSP_URL = os.getenv(
+    "SPARQL_GSP_URL", re.sub(r"/(query|sparql)$", "", SPARQL_QUERY_URL) + "/data"
+)
+# statements (Turtle) ou triplos (N-Triples) por requisição
+SPARQL_LOAD_BATCH = int(os.getenv("SPARQL_LOAD_BATCH", "50000"))
+# grafos nomeados enviados em paralelo
+SPARQL_LOAD_WORKERS = int(os.getenv("SPARQL_LOAD_WORKERS", "4"))
+SPARQL_LOAD_RETRIES = int(os.getenv("SPARQL_LOAD_RETRIES", "5"))
+SPARQL_LOAD_TIMEOUT = float(os.getenv("SPARQL_LOAD_TIMEOUT", "300"))
+SPARQL_LOAD_PROGRESS = os.getenv("SPARQL_LOAD_PROGRESS", ".rdf_load_progress.json")
+# base dos grafos nomeados derivados do nome do arquivo
+SPARQL_GRAPH_BASE = os.getenv("SPARQL_GRAPH_BASE", "http://airdata/graph/")
+# blank nodes viram IRIs (skolemização): rotulados continuam o mesmo nó
+# quando o arquivo é dividido em várias requisições, e anônimos ([...] e
+# coleções (...)) ganham IRIs fixos pela posição, então reenviar um lote
+# não duplica nada
+SKOLEM_BASE = os.getenv("SKOLEM_BASE", "http://airdata/.well-known/genid/")
+# endpoint da API que descarta o cache de SPARQL depois da carga
+# (ex.: http://localhost:8000/cache/sparql/invalidate); vazio = não avisa e
+# a API só vê os dados novos quando o cache expirar (SPARQL_CACHE_TTL)
+SPARQL_CACHE_INVALIDATE_URL = os.getenv("SPARQL_CACHE_INVALIDATE_URL", "")
+
+DEFAULT_GRAPH = "default"
+
+_CONTENT_TYPES = {
+    "turtle": "text/turtle; charset=utf-8",
+    "nt": "application/n-triples; charset=utf-8",
+}
+
+# o que importa para achar o fim de um statement Turtle: literais, IRIs,
+# comentários, aninhamento e o "." seguido de espaço
+_TTL_TOKEN_RE = re.compile(
+    r'"""|\'\'\'|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|<[^<>\s]*>|#.*'
+    r"|[\[\]()]|\.(?=\s|$|#)|(?<![\w.-])_:[\w.-]*[\w-]"
+)
+# só diretivas de fato: "base:x ex:p ex:o ." é um triplo com o prefixo "base:"
+_PREFIX_LINE_RE = re.compile(
+    r"^\s*(?:@prefix\s+[\w.-]*:\s*<|@base\s*<|PREFIX\s+[\w.-]*:\s*<|BASE\s*<)",
+    re.IGNORECASE,
+)
+# statement inteiro (já juntado): literais longos podem ter quebras de linha
+_STATEMENT_TOKEN_RE = re.compile(
+    r'"""(?:[^"\\]|\\[\s\S]|"(?!""))*"""|\'\'\'(?:[^\'\\]|\\[\s\S]|\'(?!\'\'))*\'\'\''
+    r'|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|<[^<>\s]*>|#[^\n]*|[\[\]()]|\s+'
+    r"|[^\s\[\]()\"'<#]+|."
+)
+_RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+_NT_BNODE_RE = re.compile(r'"(?:[^"\\]|\\.)*"|<[^<>\s]*>|(?<![\w.-])_:[\w.-]*[\w-]')
+
+
+def rdf_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    return "nt" if name.endswith((".nt", ".ntriples")) else "turtle"
+
+
+def _open(path: str) -> BinaryIO:
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _skolem_prefix(path: str) -> str:
+    # mesmo arquivo -> mesmos IRIs, inclusive ao retomar uma carga
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    return f"{SKOLEM_BASE}{digest}/"
+
+
+class _TurtleScanner:
+    """
+    Acompanha, linha a linha, se o statement Turtle atual terminou (um "."
+    fora de literais, IRIs e colchetes) e troca `_:rótulo` por IRIs.
+    """
+
+    def __init__(self, skolem: str):
+        self.skolem = skolem
+        self.long_quote: Optional[str] = None
+        self.depth = 0
+        # o statement atual tem blank nodes anônimos ([...] ou (...))
+        self.anonymous = False
+
+    def feed(self, line: str) -> Tuple[str, bool]:
+        """Retorna a linha (com blank nodes trocados) e se o statement fechou."""
+        out: List[str] = []
+        pos = 0
+        ended = False
+        while pos < len(line):
+            if self.long_quote:
+                close = line.find(self.long_quote, pos)
+                if close < 0:
+                    out.append(line[pos:])
+                    return "".join(out), False
+                out.append(line[pos : close + 3])
+                pos = close + 3
+                self.long_quote = None
+                ended = False
+                continue
+            m = _TTL_TOKEN_RE.search(line, pos)
+            gap = line[pos : m.start() if m else len(line)]
+            out.append(gap)
+            if gap.strip():
+                ended = False
+            if m is None:
+                break
+            token = m.group(0)
+            pos = m.end()
+            if token[0] == "#":
+                out.append(token)
+                continue
+            if token in ('"""', "'''"):
+                self.long_quote = token
+            elif token in ("[", "("):
+                self.depth += 1
+                self.anonymous = True
+            elif token in ("]", ")"):
+                self.depth -= 1
+            elif token.startswith("_:"):
+                token = f"<{self.skolem}{token[2:]}>"
+            out.append(token)
+            ended = token == "." and self.depth == 0
+        return "".join(out), ended
+
+
+def _skolemize_anonymous(statement: str, base: str) -> str:
+    """
+    Reescreve um statement Turtle sem blank nodes anônimos: cada `[...]`
+    vira `<base>N` mais um statement com as propriedades dele, e cada
+    coleção `(...)` vira a lista rdf:first/rdf:rest com IRIs. `base` deve
+    identificar o statement (arquivo + posição) para os IRIs serem sempre
+    os mesmos.
+    """
+    # cada nível guarda os termos já lidos; um termo é texto contíguo
+    # (ex.: '"1"^^xsd:int', 'ex:o;'), separado dos outros por espaço
+    stack: List[Tuple[str, List[str]]] = [("", [])]
+    extra: List[str] = []
+    glue = False  # o próximo pedaço continua o termo anterior
+    counter = 0
+
+    def add(piece: str) -> None:
+        nonlocal glue
+        terms = stack[-1][1]
+        if glue and terms:
+            terms[-1] += piece
+        else:
+            terms.append(piece)
+        glue = True
+
+    for m in _STATEMENT_TOKEN_RE.finditer(statement):
+        token = m.group(0)
+        if token.isspace() or token.startswith("#"):
+            glue = False
+        elif token in ("[", "("):
+            stack.append((token, []))
+            glue = False
+        elif token in ("]", ")") and len(stack) > 1:
+            kind, terms = stack.pop()
+            if kind == "[":
+                node = f"<{base}{counter}>"
+                counter += 1
+                if terms:
+                    extra.append(f"{node} {' '.join(terms)} .\n")
+            elif not terms:
+                node = f"<{_RDF}nil>"
+            else:
+                cells = [f"<{base}{counter + i}>" for i in range(len(terms))]
+                counter += len(terms)
+                node = cells[0]
+                for i, (cell, item) in enumerate(zip(cells, terms)):
+                    rest = cells[i + 1] if i + 1 < len(cells) else f"<{_RDF}nil>"
+                    extra.append(
+                        f"{cell} <{_RDF}first> {item} ; <{_RDF}rest> {rest} .\n"
+                    )
+            glue = False
+            add(node)
+            glue = False
+        else:
+            add(token)
+    _, terms = stack[0]
+    main = " ".join(terms)
+    # "[ ex:p ex:o ] ." sozinho: as triplas já estão no statement extra
+    if re.fullmatch(r"<[^<>\s]*>\s*\.", main):
+        main = ""
+    return "".join([main + "\n" if main else ""] + extra)
+
+
+def _skolemize_nt(line: str, skolem: str) -> str:
+    if "_:" not in line:
+        return line
+    return _NT_BNODE_RE.sub(
+        lambda m: (
+            f"<{skolem}{m.group(0)[2:]}>" if m.group(0).startswith("_:") else m.group(0)
+        ),
+        line,
+    )
+
+
+def iter_batches(
+    path: str, batch_size: int = SPARQL_LOAD_BATCH, offset: int = 0, prefixes=()
+) -> Iterator[Tuple[bytes, int, int, List[str]]]:
+    """
+    Divide o arquivo em lotes auto-contidos de até `batch_size` statements.
+
+    Gera (corpo, statements, offset em bytes logo após o lote, prefixos).
+    Em Turtle cada lote leva as declarações @prefix/@base vistas até ali.
+    Com `offset`/`prefixes` de uma carga anterior, continua dali.
+    """
+    fmt = rdf_format(path)
+    skolem = _skolem_prefix(path)
+    header: List[str] = list(prefixes)
+    scanner = _TurtleScanner(skolem) if fmt == "turtle" else None
+    body: List[str] = []
+    statement: List[str] = []
+    count = 0
+    pos = offset
+
+    with _open(path) as f:
+        if offset:
+            f.seek(offset)
+        for raw in f:
+            if not statement:
+                start = pos
+            pos += len(raw)
+            line = raw.decode("utf-8")
+            if scanner is None:
+                stripped = line.strip()
+                if not stripped or stripped.startswith("#"):
+                    continue
+                body.append(_skolemize_nt(line, skolem))
+                count += 1
+            else:
+                if not statement and _PREFIX_LINE_RE.match(line):
+                    header.append(line if line.endswith("\n") else line + "\n")
+                    continue
+                if not statement and not line.strip():
+                    continue
+                text, ended = scanner.feed(line)
+                statement.append(text)
+                if not ended:
+                    continue
+                if scanner.anonymous:
+                    # posição do statement no arquivo: mesmo IRI ao retomar
+                    statement = [
+                        _skolemize_anonymous("".join(statement), f"{skolem}~{start}.")
+                    ]
+                    scanner.anonymous = False
+                body.extend(statement)
+                statement = []
+                count += 1
+            if count >= batch_size:
+                yield "".join(header + body).encode("utf-8"), count, pos, list(header)
+                body, count = [], 0
+    if statement:
+        # último statement sem "." final: manda assim mesmo (sem reescrever)
+        # e deixa o Fuseki apontar o erro de sintaxe
+        body.extend(statement)
+        count += 1
+    if count:
+        yield "".join(header + body).encode("utf-8"), count, pos, list(header)
+
+
+class LoadProgress:
+    """
+    Progresso da carga por (arquivo, grafo), gravado atomicamente a cada
+    lote confirmado pelo Fuseki. Numa nova execução o loader retoma do
+    último offset, desde que arquivo e tamanho de lote não tenham mudado.
+    """
+
+    def __init__(self, path: str = SPARQL_LOAD_PROGRESS):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("jobs", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"[Loader] ignorando progresso inválido {self.path}: {e}")
+
+    @staticmethod
+    def key(path: str, graph: str) -> str:
+        return f"{os.path.abspath(path)}|{graph}"
+
+    def resume(self, path: str, graph: str, batch_size: int) -> Dict[str, Any]:
+        st = os.stat(path)
+        entry = self.entries.get(self.key(path, graph))
+        fresh = {"offset": 0, "prefixes": [], "batches": 0, "triples": 0}
+        if not entry:
+            return fresh
+        if (
+            entry.get("size") != st.st_size
+            or entry.get("mtime") != st.st_mtime
+            or entry.get("batch_size") != batch_size
+        ):
+            print(f"[Loader] {path}: arquivo ou tamanho de lote mudou, recomeçando")
+            return fresh
+        return entry
+
+    def save(self, path: str, graph: str, **fields: Any) -> None:
+        st = os.stat(path)
+        with self._lock:
+            self.entries[self.key(path, graph)] = {
+                "size": st.st_size,
+                "mtime": st.st_mtime,
+                **fields,
+            }
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"jobs": self.entries}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+
+
+class BulkLoader:
+    """
+    Carga em massa de arquivos Turtle/N-Triples (opcionalmente .gz) no
+    Fuseki pelo Graph Store Protocol: cada arquivo vai para um grafo
+    nomeado em lotes de `batch_size` statements (POST ?graph=...), vários
+    grafos em paralelo, com retomada a partir do último lote confirmado.
+    """
+
+    def __init__(
+        self,
+        gsp_url: str = SPARQL_GSP_URL,
+        batch_size: int = SPARQL_LOAD_BATCH,
+        workers: int = SPARQL_LOAD_WORKERS,
+        retries: int = SPARQL_LOAD_RETRIES,
+        timeout: float = SPARQL_LOAD_TIMEOUT,
+        progress: Optional[LoadProgress] = None,
+    ):
+        self.gsp_url = gsp_url
+        self.batch_size = batch_size
+        self.workers = max(workers, 1)
+        self.timeout = timeout
+        self.progress = progress or LoadProgress()
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_maxsize=self.workers,
+            # POST de triplos é idempotente (todos os blank nodes, rotulados
+            # ou anônimos, já viraram IRIs), então dá para repetir em 5xx
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.5,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=None,
+                raise_on_status=False,
+            ),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def _send(self, body: bytes, fmt: str, graph: str, replace: bool) -> None:
+        params = {"default": ""} if graph == DEFAULT_GRAPH else {"graph": graph}
+        method = self._session.put if replace else self._session.post
+        response = method(
+            self.gsp_url,
+            params=params,
+            data=body,
+            headers={"Content-Type": _CONTENT_TYPES[fmt]},
+            timeout=self.timeout,
+        )
+        with response:
+            if response.status_code >= 400:
+                raise RuntimeError(
+                    f"GSP HTTP {response.status_code}: {response.text[:300]}"
+                )
+
+    def replace_graphs(self, jobs: List[Tuple[str, str]]) -> None:
+        """
+        Esvazia (PUT vazio) cada grafo dos jobs uma única vez, antes de
+        qualquer lote: vários arquivos podem ir para o mesmo grafo. Grafos
+        com algum arquivo já carregado ou em andamento ficam como estão,
+        para a nova execução retomar em vez de apagar o que já entrou.
+        """
+        paths: Dict[str, List[str]] = {}
+        for path, graph in jobs:
+            paths.setdefault(graph, []).append(path)
+        for graph, files in paths.items():
+            states = [self.progress.resume(p, graph, self.batch_size) for p in files]
+            if any(st["offset"] or st.get("done") for st in states):
+                print(f"[Loader] {graph}: carga anterior em andamento, sem limpar")
+                continue
+            self._send(b"", "nt", graph, replace=True)
+            print(f"[Loader] {graph}: conteúdo anterior removido")
+
+    def load_file(self, path: str, graph: str) -> int:
+        """Carrega um arquivo num grafo; retorna os statements enviados."""
+        fmt = rdf_format(path)
+        state = self.progress.resume(path, graph, self.batch_size)
+        if state.get("done"):
+            print(f"[Loader] {path} -> {graph}: já carregado, pulando")
+            return 0
+        if state["offset"]:
+            print(
+                f"[Loader] {path} -> {graph}: retomando do lote {state['batches']} "
+                f"({state['triples']} statements já enviados)"
+            )
+        batches, triples = state["batches"], state["triples"]
+        t0 = time.perf_counter()
+        sent = sent_batches = 0
+        for body, count, offset, prefixes in iter_batches(
+            path, self.batch_size, state["offset"], state["prefixes"]
+        ):
+            self._send(body, fmt, graph, replace=False)
+            batches += 1
+            triples += count
+            sent += count
+            sent_batches += 1
+            self.progress.save(
+                path,
+                graph,
+                batch_size=self.batch_size,
+                offset=offset,
+                prefixes=prefixes,
+                batches=batches,
+                triples=triples,
+            )
+        self.progress.save(
+            path,
+            graph,
+            batch_size=self.batch_size,
+            offset=0,
+            prefixes=[],
+            batches=batches,
+            triples=triples,
+            done=True,
+        )
+        seconds = time.perf_counter() - t0
+        rate = sent / seconds if seconds else 0.0
+        print(
+            f"[Loader] {path} -> {graph}: {sent} statements em {sent_batches} lotes, "
+            f"{seconds:.1f}s ({rate:.0f}/s)"
+        )
+        return sent
+
+    def load(self, jobs: List[Tuple[str, str]], replace: bool = False) -> bool:
+        """
+        Carrega vários (arquivo, grafo) em paralelo; False se algum falhou.
+        Com `replace`, cada grafo é esvaziado antes (`replace_graphs`).
+        """
+        if replace:
+            try:
+                self.replace_graphs(jobs)
+            except Exception as e:
+                print(f"[Loader] falha ao limpar os grafos: {e}")
+                return False
+        ok = True
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs) or 1)) as pool:
+            futures = {
+                pool.submit(self.load_file, path, graph): (path, graph)
+                for path, graph in jobs
+            }
+            for fut in as_completed(futures):
+                path, graph = futures[fut]
+                try:
+                    fut.result()
+                except Exception as e:
+                    ok = False
+                    print(
+                        f"[Loader] falha em {path} -> {graph}: {e} "
+                        f"(rode de novo para retomar)"
+                    )
+        return ok
+
+
+def invalidate_api_cache(url: str = SPARQL_CACHE_INVALIDATE_URL) -> bool:
+    """Avisa a API que os dados mudaram; False se não foi possível."""
+    if not url:
+        print(
+            "[Loader] cache de SPARQL da API não invalidado (defina "
+            "SPARQL_CACHE_INVALIDATE_URL); dados novos aparecem em até "
+            "SPARQL_CACHE_TTL segundos"
+        )
+        return False
+    try:
+        requests.post(url, timeout=10).raise_for_status()
+    except requests.RequestException as e:
+        print(f"[Loader] falha ao invalidar o cache da API em {url}: {e}")
+        return False
+    print(f"[Loader] cache de SPARQL da API invalidado ({url})")
+    return True
+
+
+def graph_for(path: str) -> str:
+    name = os.path.basename(path)
+    for ext in (".gz", ".ttl", ".turtle", ".nt", ".ntriples"):
+        if name.endswith(ext):
+            name = name[: -len(ext)]
+    return f"{SPARQL_GRAPH_BASE}{name}"
+
+
+def parse_job(spec: str) -> Tuple[str, str]:
+    # "arquivo.ttl", "arquivo.ttl=http://grafo" ou "arquivo.ttl=default"
+    path, _, graph = spec.partition("=")
+    return path, graph or graph_for(path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Carga em massa de Turtle/N-Triples no Fuseki (Graph Store Protocol). "
+            "Ex.: python -m app.core.models.interface.rdf_loader "
+            "seed/voos.nt.gz seed/ocorrencias.ttl=http://airdata/graph/cenipa"
+        )
+    )
+    parser.add_argument(
+        "files",
+        nargs="+",
+        help="ARQUIVO[=GRAFO]; sem grafo usa SPARQL_GRAPH_BASE + nome do arquivo, "
+        "'default' carrega no grafo padrão",
+    )
+    parser.add_argument("--url", default=SPARQL_GSP_URL, help="endpoint GSP")
+    parser.add_argument("--batch-size", type=int, default=SPARQL_LOAD_BATCH)
+    parser.add_argument("--workers", type=int, default=SPARQL_LOAD_WORKERS)
+    parser.add_argument("--progress", default=SPARQL_LOAD_PROGRESS)
+    parser.add_argument(
+        "--invalidate-url",
+        default=SPARQL_CACHE_INVALIDATE_URL,
+        help="POST da API que descarta o cache de SPARQL ao fim da carga",
+    )
+    parser.add_argument(
+        "--replace",
+        action="store_true",
+        help="esvazia cada grafo (uma vez) antes da carga em vez de acrescentar",
+    )
+    args = parser.parse_args(argv)
+
+    loader = BulkLoader(
+        gsp_url=args.url,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        progress=LoadProgress(args.progress),
+    )
+    ok = loader.load([parse_job(s) for s in args.files], args.replace)
+    # mesmo com falha parcial algum lote pode ter entrado
+    invalidate_api_cache(args.invalidate_url)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
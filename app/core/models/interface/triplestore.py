@@ -0,0 +1,386 @@
+import os
+import re
+import json
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Iterator, Tuple, BinaryIO
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.core.cache.lru import TTLCache
+from app.core.config.metrics import SPARQL_CACHE
+
+# endpoints do Fuseki (ver app/TODO/fuseki/docker-compose.yaml)
+SPARQL_QUERY_URL = os.getenv("SPARQL_QUERY_URL", "http://localhost:3030/ds/query")
+SPARQL_UPDATE_URL = os.getenv("SPARQL_UPDATE_URL", "")
+SPARQL_TIMEOUT = float(os.getenv("SPARQL_TIMEOUT", "30"))
+SPARQL_POOL_SIZE = int(os.getenv("SPARQL_POOL_SIZE", "16"))
+# cache de resultados (consultas normalizadas); SPARQL_CACHE_SIZE=0 desliga
+SPARQL_CACHE_SIZE = int(os.getenv("SPARQL_CACHE_SIZE", "256"))
+SPARQL_CACHE_TTL = float(os.getenv("SPARQL_CACHE_TTL", "300"))
+# SELECTs maiores que isso não são guardados
+SPARQL_CACHE_MAX_ROWS = int(os.getenv("SPARQL_CACHE_MAX_ROWS", "1000"))
+# CONSTRUCT/DESCRIBE maiores que isso (bytes) não são guardados
+SPARQL_CACHE_MAX_BYTES = int(os.getenv("SPARQL_CACHE_MAX_BYTES", str(1 << 20)))
+
+_TSV = "text/tab-separated-values"
+_JSON = "application/sparql-results+json"
+# formatos de grafo pedidos direto ao Fuseki (CONSTRUCT/DESCRIBE)
+RDF_FORMATS = {
+    "turtle": "text/turtle",
+    "ttl": "text/turtle",
+    "nt": "application/n-triples",
+    "ntriples": "application/n-triples",
+    "n-triples": "application/n-triples",
+}
+_CHUNK_SIZE = 64 * 1024
+
+# LIMIT/OFFSET no fim da consulta (modificadores da consulta externa; os de
+# subconsultas ficam dentro de chaves e não casam com o "$")
+_TRAILING_MODIFIERS_RE = re.compile(
+    r"(?:\s+(?:LIMIT|OFFSET)\s+\d+)+\s*$", re.IGNORECASE
+)
+_MODIFIER_RE = re.compile(r"(LIMIT|OFFSET)\s+(\d+)", re.IGNORECASE)
+_LITERAL_RE = re.compile(r'^"(.*)"(?:@[\w-]+|\^\^<[^>]*>)?$', re.DOTALL)
+# literais, IRIs e comentários, para normalizar só o resto da consulta
+_TOKEN_RE = re.compile(
+    r'"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'|<[^<>\"{}|^`\\\s]*>|#[^\n]*"
+)
+_PREFIX_DECL_RE = re.compile(r"PREFIX\s*([\w.-]*):\s*(<[^>]*>)", re.IGNORECASE)
+_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", '"': '"', "\\": "\\", "'": "'"}
+
+
+def page_window(
+    query: str, limit: Optional[int], offset: int = 0
+) -> Tuple[str, Optional[int], int]:
+    """
+    Separa LIMIT/OFFSET do fim da consulta e combina com a página pedida.
+
+    `offset` é relativo ao resultado da própria consulta: com "LIMIT 10" e
+    offset=4 sobram 6 linhas, então o LIMIT final é min(limit, 6) e o
+    OFFSET final é o da consulta + 4. Retorna (consulta sem os
+    modificadores, limit, offset); limit == 0 quer dizer página vazia.
+    """
+    query = query.strip()
+    found = _TRAILING_MODIFIERS_RE.search(query)
+    own: Dict[str, int] = {}
+    if found:
+        for kind, value in _MODIFIER_RE.findall(found.group(0)):
+            own[kind.upper()] = int(value)
+        query = query[: found.start()]
+    if "LIMIT" in own:
+        remaining = max(0, own["LIMIT"] - offset)
+        limit = remaining if limit is None else min(limit, remaining)
+    return query, limit, offset + own.get("OFFSET", 0)
+
+
+def paginate(query: str, limit: Optional[int], offset: int = 0) -> str:
+    """Aplica a página (`page_window`) na consulta."""
+    query, limit, offset = page_window(query, limit, offset)
+    if limit is not None:
+        query += f"\nLIMIT {limit}"
+    if offset:
+        query += f"\nOFFSET {offset}"
+    return query
+
+
+def _squeeze(code: str) -> str:
+    code = re.sub(r"\s+", " ", code)
+    return re.sub(r" ?([{}()]) ?", r"\1", code)
+
+
+def normalize_sparql(query: str) -> str:
+    """
+    Forma canônica da consulta para a chave do cache: sem comentários,
+    espaços colapsados (exceto dentro de literais e IRIs) e declarações
+    PREFIX ordenadas, sem as não usadas.
+    """
+    parts: List[str] = []
+    code = ""
+    pos = 0
+    for m in _TOKEN_RE.finditer(query):
+        token = m.group(0)
+        code += query[pos : m.start()]
+        pos = m.end()
+        if token[0] == "#":
+            code += " "
+            continue
+        parts.append(_squeeze(code) + token)
+        code = ""
+    parts.append(_squeeze(code + query[pos:]))
+    text = "".join(parts).strip()
+
+    prefixes = dict(_PREFIX_DECL_RE.findall(text))
+    body = _PREFIX_DECL_RE.sub("", text).strip()
+    used = sorted(
+        f"PREFIX {label}: {iri}"
+        for label, iri in prefixes.items()
+        if re.search(rf"(?<![\w.-]){re.escape(label)}:", body)
+    )
+    return " ".join(used + [body])
+
+
+def _unescape(text: str) -> str:
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(0)), text)
+
+
+def tsv_term(value: str) -> str:
+    """Termo RDF do formato TSV do SPARQL -> texto simples."""
+    if not value:
+        return ""
+    if value.startswith("<") and value.endswith(">"):
+        return value[1:-1]
+    literal = _LITERAL_RE.match(value)
+    if literal:
+        return _unescape(literal.group(1))
+    # números, booleanos e blank nodes vêm sem aspas
+    return value
+
+
+class Triplestore:
+    """
+    Cliente SPARQL para o Fuseki sobre uma sessão HTTP com pool de conexões.
+
+    - SELECT: resultados em TSV lidos linha a linha (`iter_select`), com
+      LIMIT/OFFSET aplicados na própria consulta, no servidor.
+    - ASK: application/sparql-results+json.
+    - CONSTRUCT/DESCRIBE: Turtle/N-Triples do próprio Fuseki, repassados
+      em blocos de bytes (`iter_construct`), sem montar um Graph do RDFLib.
+    - UPDATE: POST no endpoint de update, quando configurado.
+
+    Resultados de SELECT/ASK/CONSTRUCT ficam num LRU com TTL, com a
+    consulta normalizada (`normalize_sparql`) na chave; qualquer UPDATE
+    esvazia o cache.
+    """
+
+    def __init__(
+        self,
+        query_url: Optional[str] = None,
+        update_url: Optional[str] = None,
+        timeout: float = SPARQL_TIMEOUT,
+        pool_size: int = SPARQL_POOL_SIZE,
+        cache_size: int = SPARQL_CACHE_SIZE,
+        cache_ttl: float = SPARQL_CACHE_TTL,
+    ):
+        self.query_url = query_url or SPARQL_QUERY_URL
+        self.update_url = update_url or SPARQL_UPDATE_URL or None
+        self.timeout = timeout
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=pool_size,
+            # só falhas de conexão: a consulta não chegou ao servidor
+            max_retries=Retry(connect=2, read=0, status=0, backoff_factor=0.2),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._cache = (
+            TTLCache(maxsize=cache_size, ttl=cache_ttl) if cache_size > 0 else None
+        )
+        self.invalidations = 0
+
+    def _cached(self, key: tuple) -> Any:
+        if self._cache is None:
+            return None
+        value = self._cache.get(key)
+        SPARQL_CACHE.inc(result="miss" if value is None else "hit")
+        return value
+
+    def _store(self, key: tuple, value: Any) -> None:
+        if self._cache is not None:
+            self._cache.put(key, value)
+
+    def _post_query(self, query: str, accept: str, stream: bool = False):
+        response = self._session.post(
+            self.query_url,
+            data={"query": query},
+            headers={"Accept": accept},
+            timeout=self.timeout,
+            stream=stream,
+        )
+        if response.status_code >= 400:
+            detail = response.text[:300]
+            response.close()
+            raise RuntimeError(f"SPARQL HTTP {response.status_code}: {detail}")
+        return response
+
+    def iter_select(
+        self, query: str, limit: Optional[int] = None, offset: int = 0
+    ) -> Iterator[Tuple[List[str], Dict[str, str]]]:
+        """
+        Gera (cabeçalhos, linha) conforme o TSV chega do servidor, sem
+        montar a lista de resultados em memória. Resultados lidos até o fim
+        e com até SPARQL_CACHE_MAX_ROWS linhas entram no cache.
+        """
+        key = ("select", normalize_sparql(query), limit, offset)
+        cached = self._cached(key)
+        if cached is not None:
+            headers, rows = cached
+            for row in rows:
+                yield headers, dict(row)
+            return
+        if page_window(query, limit, offset)[1] == 0:
+            # página além do LIMIT da própria consulta: nem vai ao Fuseki
+            return
+        try:
+            response = self._post_query(
+                paginate(query, limit, offset), _TSV, stream=True
+            )
+        except requests.RequestException as e:
+            raise RuntimeError(f"SPARQL SELECT error: {e}") from e
+        with response:
+            lines = response.iter_lines(decode_unicode=False)
+            header = next(lines, None)
+            if header is None:
+                return
+            headers = [h.lstrip("?$") for h in header.decode("utf-8").split("\t")]
+            rows: Optional[List[Dict[str, str]]] = []
+            for line in lines:
+                values = line.decode("utf-8").split("\t")
+                row = {h: tsv_term(v) for h, v in zip(headers, values)}
+                if rows is not None:
+                    rows.append(dict(row))
+                    if len(rows) > SPARQL_CACHE_MAX_ROWS:
+                        rows = None
+                yield headers, row
+        if rows is not None:
+            self._store(key, (headers, rows))
+
+    def select(
+        self, query: str, limit: Optional[int] = None, offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns a list of dicts with stringified values.
+        """
+        return [row for _, row in self.iter_select(query, limit, offset)]
+
+    def ask(self, query: str) -> bool:
+        key = ("ask", normalize_sparql(query))
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        try:
+            with self._post_query(query, _JSON) as response:
+                result = bool(json.loads(response.content)["boolean"])
+        except (requests.RequestException, ValueError, KeyError) as e:
+            raise RuntimeError(f"SPARQL ASK error: {e}") from e
+        self._store(key, result)
+        return result
+
+    def iter_construct(
+        self, query: str, fmt: str = "turtle", chunk_size: int = _CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Gera o grafo de um CONSTRUCT/DESCRIBE em blocos de bytes, já
+        serializado pelo Fuseki no formato pedido (turtle ou nt).
+        """
+        accept = RDF_FORMATS.get(fmt.lower())
+        if accept is None:
+            raise ValueError(
+                f"Formato '{fmt}' não suportado; use um de: {', '.join(RDF_FORMATS)}"
+            )
+        try:
+            response = self._post_query(query, accept, stream=True)
+        except requests.RequestException as e:
+            raise RuntimeError(f"SPARQL CONSTRUCT/DESCRIBE error: {e}") from e
+        with response:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    yield chunk
+
+    def construct_to(self, query: str, out: BinaryIO, fmt: str = "turtle") -> int:
+        """Grava o grafo em `out` sem mantê-lo em memória; retorna os bytes."""
+        written = 0
+        for chunk in self.iter_construct(query, fmt):
+            out.write(chunk)
+            written += len(chunk)
+        return written
+
+    def construct(
+        self, query: str, fmt: str = "turtle", max_bytes: Optional[int] = None
+    ) -> str:  # create DataModels
+        """
+        Returns serialized graph (default Turtle) for CONSTRUCT/DESCRIBE.
+
+        Com `max_bytes`, para de ler a resposta ao atingir o limite e corta
+        no fim do último statement completo; o texto termina com uma linha
+        "# truncado" nesse caso.
+        """
+        key = ("construct", normalize_sparql(query), fmt.lower(), max_bytes)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        buf = bytearray()
+        truncated = False
+        chunks = self.iter_construct(query, fmt)
+        try:
+            for chunk in chunks:
+                buf += chunk
+                if max_bytes is not None and len(buf) > max_bytes:
+                    truncated = True
+                    break
+        finally:
+            # fecha a conexão sem baixar o resto do grafo
+            chunks.close()
+        if truncated:
+            # N-Triples: um triplo por linha; Turtle do Fuseki: " ." fecha o
+            # statement (que pode ocupar várias linhas com ";")
+            end = (
+                b"\n"
+                if RDF_FORMATS[fmt.lower()] == "application/n-triples"
+                else b" .\n"
+            )
+            cut = buf.rfind(end, 0, max_bytes)
+            del buf[cut + len(end) if cut >= 0 else 0 :]
+        result = buf.decode("utf-8")
+        if truncated:
+            result += f"# truncado em {max_bytes} bytes\n"
+        if len(buf) <= SPARQL_CACHE_MAX_BYTES:
+            self._store(key, result)
+        return result
+
+    def update(self, update_stmt: str) -> None:
+        """
+        Executes INSERT/DELETE updates if an update endpoint is configured.
+        """
+        if not self.update_url:
+            raise PermissionError("Update endpoint not configured (read-only mode).")
+        try:
+            response = self._session.post(
+                self.update_url, data={"update": update_stmt}, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise RuntimeError(f"SPARQL UPDATE error: {e}") from e
+        # mesmo com erro o update pode ter sido aplicado em parte
+        self.invalidate()
+        with response:
+            if response.status_code >= 400:
+                raise RuntimeError(
+                    f"SPARQL UPDATE error: HTTP {response.status_code}: "
+                    f"{response.text[:300]}"
+                )
+
+    def invalidate(self) -> None:
+        """Descarta todos os resultados em cache (dados mudaram)."""
+        if self._cache is not None:
+            self._cache.clear()
+            self.invalidations += 1
+
+    def cache_stats(self) -> dict:
+        if self._cache is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            **self._cache.stats(),
+            "invalidations": self.invalidations,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_triplestore() -> Triplestore:
+    """Cliente único por processo: todas as tools dividem o mesmo pool."""
+    return Triplestore()
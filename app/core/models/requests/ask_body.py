@@ -1,5 +1,9 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
 class AskBody(BaseModel):
     question: str
+    # mesma sessão = mesma conversa (histórico salvo no SQLite)
+    session_id: Optional[str] = None
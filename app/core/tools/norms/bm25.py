@@ -0,0 +1,196 @@
+import os
+import re
+import json
+import math
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config.router import normalize
+from app.core.models.interface.embedding import index_version
+
+BM25_FILE = "bm25_index.json"
+
+# números com separadores ficam inteiros ("7.183", "7.565/1986", "302")
+_TOKEN_RE = re.compile(r"\d+(?:[.,/-]\d+)*|\w+")
+_STOPWORDS = frozenset(
+    "a o as os de da do das dos e em no na nos nas um uma uns umas por para "
+    "com sem que se ao aos à às ou como mais mas qual quais sobre pela pelo "
+    "pelas pelos seu sua seus suas ser é são foi".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for tok in _TOKEN_RE.findall(normalize(text)):
+        if tok in _STOPWORDS:
+            continue
+        tokens.append(tok)
+        if tok[0].isdigit() and not tok.isdigit():
+            # "7.183" também casa com "7183"
+            tokens.append(re.sub(r"\D", "", tok))
+    return tokens
+
+
+class BM25Index:
+    """
+    Índice invertido BM25 em memória sobre os chunks do Chroma.
+
+    A busca só percorre as listas de postings dos termos da consulta, então
+    o custo é proporcional aos documentos que contêm esses termos, não ao
+    tamanho do índice.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.version = ""
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.idf: Dict[str, float] = {}
+        self.avgdl = 0.0
+        self._partitions: Optional[Dict[str, "BM25Index"]] = None
+
+    def build(
+        self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]
+    ) -> "BM25Index":
+        self.ids, self.texts, self.metadatas = list(ids), list(texts), list(metadatas)
+        self.lengths, self.postings = [], {}
+        for i, text in enumerate(self.texts):
+            counts = Counter(tokenize(text))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((i, tf))
+        self._finish()
+        return self
+
+    def _finish(self) -> None:
+        n = len(self.ids)
+        self.avgdl = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self.postings.items()
+        }
+
+    def search(
+        self, query: str, k: int = 10, article: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Retorna [(posição do chunk, score)] em ordem decrescente.
+        Com `article`, só chunks cujo intervalo de artigos o contém.
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avgdl)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        if article is not None:
+            scores = {
+                i: s
+                for i, s in scores.items()
+                if (self.metadatas[i] or {}).get("article_start", 0)
+                <= article
+                <= (self.metadatas[i] or {}).get("article_end", -1)
+            }
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+    def partitions(self) -> Dict[str, "BM25Index"]:
+        """
+        Um sub-índice por `source`, montado numa única passada pelas
+        postings. Buscas restritas a uma norma só percorrem a partição dela.
+        """
+        if self._partitions is not None:
+            return self._partitions
+        groups: Dict[str, List[int]] = {}
+        for i, m in enumerate(self.metadatas):
+            groups.setdefault((m or {}).get("source", ""), []).append(i)
+        parts: Dict[str, BM25Index] = {}
+        local: Dict[int, Tuple[BM25Index, int]] = {}
+        for source, idx in groups.items():
+            part = BM25Index(k1=self.k1, b=self.b)
+            part.version = self.version
+            part.ids = [self.ids[i] for i in idx]
+            part.texts = [self.texts[i] for i in idx]
+            part.metadatas = [self.metadatas[i] for i in idx]
+            part.lengths = [self.lengths[i] for i in idx]
+            parts[source] = part
+            for j, i in enumerate(idx):
+                local[i] = (part, j)
+        for term, plist in self.postings.items():
+            for i, tf in plist:
+                part, j = local[i]
+                part.postings.setdefault(term, []).append((j, tf))
+        for part in parts.values():
+            part._finish()
+        self._partitions = parts
+        return parts
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": self.version,
+                    "k1": self.k1,
+                    "b": self.b,
+                    "ids": self.ids,
+                    "texts": self.texts,
+                    "metadatas": self.metadatas,
+                    "lengths": self.lengths,
+                    "postings": self.postings,
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.version = data["version"]
+        index.ids = data["ids"]
+        index.texts = data["texts"]
+        index.metadatas = data["metadatas"]
+        index.lengths = data["lengths"]
+        index.postings = {
+            t: [tuple(p) for p in plist] for t, plist in data["postings"].items()
+        }
+        index._finish()
+        return index
+
+    @classmethod
+    def for_collection(cls, vectorstore, persist_directory: str) -> "BM25Index":
+        """
+        Carrega o índice salvo ao lado do Chroma se ele corresponde à versão
+        atual da coleção; senão reconstrói a partir dos chunks e salva.
+        """
+        path = os.path.join(persist_directory, BM25_FILE)
+        version = index_version(persist_directory)
+        index: Optional[BM25Index] = None
+        try:
+            index = cls.load(path)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[BM25] índice inválido em {path}, reconstruindo: {e}")
+        if index is not None and index.version == version:
+            return index
+
+        t0 = time.perf_counter()
+        data = vectorstore._collection.get(include=["documents", "metadatas"])
+        index = cls().build(data["ids"], data["documents"], data["metadatas"])
+        index.version = version
+        index.save(path)
+        print(
+            f"[BM25] {len(index.ids)} chunks indexados em "
+            f"{time.perf_counter() - t0:.2f}s"
+        )
+        return index
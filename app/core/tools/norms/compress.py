@@ -0,0 +1,157 @@
+import os
+import re
+import threading
+from typing import List
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.core.config.router import normalize
+from app.core.models.interface.embedding import get_embeddings
+from app.core.tools.norms.rerank import LexicalScorer
+
+COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") == "1"
+# orçamento aproximado de tokens para todas as passagens de uma chamada
+COMPRESS_TOKEN_BUDGET = int(os.getenv("COMPRESS_TOKEN_BUDGET", "700"))
+# "lexical" (sem chamadas ao Ollama) ou "embedding" (nomic-embed-text, com cache)
+COMPRESS_SCORER = os.getenv("COMPRESS_SCORER", "lexical")
+
+# quebra de linha do PDF dentro de frase vira espaço; estas marcas iniciam
+# uma unidade nova (artigo, parágrafo, inciso, alínea)
+_UNIT_START = r"(?:Art\.\s*\d|§|Parágrafo único|[IVXLC]+\s*[-–]|[a-z]\)\s)"
+_LINE_BREAK_RE = re.compile(rf"\n(?!\s*{_UNIT_START})")
+_SENTENCE_RE = re.compile(rf"(?<=[.;:])\s+(?=[A-ZÀ-Ú§])|\n(?=\s*{_UNIT_START})")
+_ARTICLE_ONLY_RE = re.compile(r"^Art\.\s*\d+\S*$")
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 caracteres por token em português com os tokenizers do Ollama
+    return (len(text) + 3) // 4
+
+
+def split_sentences(text: str) -> List[str]:
+    text = _LINE_BREAK_RE.sub(" ", text)
+    out: List[str] = []
+    for s in _SENTENCE_RE.split(text):
+        s = s.strip()
+        if not s:
+            continue
+        if out and _ARTICLE_ONLY_RE.match(out[-1]):
+            # "Art. 302." fica junto da frase que abre o artigo
+            out[-1] += " " + s
+        else:
+            out.append(s)
+    return out
+
+
+def _key(sentence: str) -> str:
+    return " ".join(re.sub(r"[^\w]", " ", normalize(sentence)).split())
+
+
+class EmbeddingScorer:
+    """Similaridade de cosseno entre a consulta e cada frase."""
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        emb = get_embeddings()
+        q = np.asarray(emb.embed_query(query), dtype=np.float32)
+        m = np.asarray(emb.embed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(m, axis=1) * (np.linalg.norm(q) or 1.0)
+        return (m @ q / np.where(norms == 0, 1.0, norms)).tolist()
+
+
+class ContextCompressor:
+    """
+    Compressão extrativa das passagens antes de irem para o LLM.
+
+    1. Divide cada chunk em frases/incisos.
+    2. Descarta frases repetidas entre chunks (sobreposição do splitter).
+    3. Pontua cada frase contra a consulta e escolhe as melhores até
+       `token_budget`, priorizando os chunks mais bem ranqueados.
+    4. Remonta cada chunk com as frases escolhidas na ordem original,
+       marcando trechos omitidos com "[...]".
+    """
+
+    def __init__(self, scorer=None, token_budget: int = COMPRESS_TOKEN_BUDGET):
+        self.scorer = scorer or LexicalScorer()
+        self.token_budget = token_budget
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    def compress(self, query: str, docs: List[Document]) -> List[Document]:
+        seen = set()
+        units = []  # (doc, posição, frase)
+        for d, doc in enumerate(docs):
+            for s, sentence in enumerate(split_sentences(doc.page_content)):
+                key = _key(sentence)
+                if key and key not in seen:
+                    seen.add(key)
+                    units.append((d, s, sentence))
+        if not units:
+            return docs
+
+        try:
+            scores = self.scorer.score(query, [u[2] for u in units])
+        except Exception as e:
+            print(f"[Compressão] falha ao pontuar, enviando passagens inteiras: {e}")
+            return docs
+        # leve preferência pelos chunks que vieram primeiro do retriever
+        ranked = sorted(
+            range(len(units)),
+            key=lambda i: scores[i] * (1 - 0.05 * units[i][0]),
+            reverse=True,
+        )
+        keep = set()
+        used = 0
+        for i in ranked:
+            if scores[i] <= 0 and keep:
+                break
+            cost = estimate_tokens(units[i][2])
+            if used + cost > self.token_budget and keep:
+                continue
+            keep.add(i)
+            used += cost
+
+        out = []
+        for d, doc in enumerate(docs):
+            picked = [i for i in sorted(keep) if units[i][0] == d]
+            if not picked:
+                continue
+            parts, last = [], -1
+            for i in picked:
+                s = units[i][1]
+                if s != last + 1:
+                    parts.append("[...]")
+                parts.append(units[i][2])
+                last = s
+            out.append(Document(page_content=" ".join(parts), metadata=doc.metadata))
+
+        before = sum(estimate_tokens(doc.page_content) for doc in docs)
+        after = sum(estimate_tokens(doc.page_content) for doc in out)
+        with self._lock:
+            self.calls += 1
+            self.tokens_in += before
+            self.tokens_out += after
+        print(
+            f"[Compressão] {before} -> {after} tokens "
+            f"({before - after} economizados, {len(out)}/{len(docs)} passagens)"
+        )
+        return out
+
+    def stats(self) -> dict:
+        saved = self.tokens_in - self.tokens_out
+        return {
+            "calls": self.calls,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "tokens_saved": saved,
+            "ratio": (
+                round(self.tokens_out / self.tokens_in, 4) if self.tokens_in else 0.0
+            ),
+        }
+
+
+def make_compressor(idf=None) -> ContextCompressor:
+    scorer = EmbeddingScorer() if COMPRESS_SCORER == "embedding" else LexicalScorer(idf)
+    return ContextCompressor(scorer)
@@ -0,0 +1,142 @@
+import os
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.core.config.router import normalize
+from app.core.tools.norms.bm25 import BM25Index, tokenize
+from app.core.tools.norms.rerank import RERANK_FETCH_K
+
+# constante clássica da reciprocal rank fusion
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]], k: int = RRF_K
+) -> List[tuple[str, float]]:
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def _initials(name: str) -> str:
+    # "Código Brasileiro de Aeronáutica" -> "cba"
+    return "".join(w[0] for w in normalize(name).split() if len(w) > 2)
+
+
+def build_where(
+    source: Optional[str] = None, article: Optional[int] = None
+) -> Optional[dict]:
+    """Filtro `where` do Chroma para norma e/ou número de artigo."""
+    clauses = []
+    if source:
+        clauses.append({"source": source})
+    if article is not None:
+        clauses.append({"article_start": {"$lte": article}})
+        clauses.append({"article_end": {"$gte": article}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Busca densa (Chroma) + lexical (BM25), combinadas por RRF.
+
+    A parte lexical resolve citações exatas ("art. 302", "Lei nº 7.183")
+    que a busca por embedding costuma perder. Com `reranker`, os
+    `rerank_fetch_k` primeiros da fusão são reordenados antes do corte em k.
+    """
+
+    vectorstore: Any
+    index: BM25Index
+    k: int = 4
+    fetch_k: int = 20
+    reranker: Optional[Any] = None
+    rerank_fetch_k: int = RERANK_FETCH_K
+
+    def sources(self) -> List[str]:
+        return sorted(s for s in self.index.partitions() if s)
+
+    def match_sources(self, name: str) -> List[str]:
+        """
+        Normas que correspondem a `name`: nome exato, sigla ("CBA") ou
+        palavras inteiras do nome ("aeronauta", "lei aeronauta"). Mais de uma
+        = filtro ambíguo.
+        """
+        wanted = normalize(name).strip()
+        if not wanted:
+            return []
+        words = set(tokenize(wanted))
+        sources = self.sources()
+        for match in (
+            lambda s: normalize(s) == wanted,
+            lambda s: _initials(s) == wanted,
+            lambda s: words
+            and (words <= set(tokenize(s)) or set(tokenize(s)) <= words),
+        ):
+            found = [s for s in sources if match(s)]
+            if found:
+                return found
+        return []
+
+    def resolve_source(self, name: str) -> Optional[str]:
+        """A norma de `name`, ou None se nenhuma ou mais de uma corresponde."""
+        found = self.match_sources(name)
+        return found[0] if len(found) == 1 else None
+
+    def search(
+        self,
+        query: str,
+        source: Optional[str] = None,
+        article: Optional[int] = None,
+        k: Optional[int] = None,
+    ) -> List[Document]:
+        """
+        Busca híbrida opcionalmente restrita a uma norma (`source`, já
+        resolvido) e/ou a um artigo. O filtro vai para o `where` do Chroma
+        e a parte lexical usa só a partição BM25 daquela norma.
+        """
+        k = k or self.k
+        n = max(k, self.rerank_fetch_k) if self.reranker else k
+        fetch_k = max(self.fetch_k, n)
+        dense = self.vectorstore.similarity_search(
+            query, k=fetch_k, filter=build_where(source, article)
+        )
+        index = (
+            self.index.partitions().get(source, self.index) if source else self.index
+        )
+        lexical = index.search(query, k=fetch_k, article=article)
+
+        by_id: Dict[str, Document] = {}
+        dense_ids = []
+        for d in dense:
+            did = d.metadata.get("doc_id") or d.page_content
+            by_id.setdefault(did, d)
+            dense_ids.append(did)
+        lexical_ids = []
+        for i, _ in lexical:
+            did = index.ids[i]
+            by_id.setdefault(
+                did,
+                Document(
+                    page_content=index.texts[i],
+                    metadata=index.metadatas[i] or {},
+                ),
+            )
+            lexical_ids.append(did)
+
+        fused = reciprocal_rank_fusion([dense_ids, lexical_ids])
+        candidates = [by_id[did] for did, _ in fused[:n]]
+        if self.reranker:
+            return self.reranker.rerank(query, candidates, k)
+        return candidates
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.search(query)
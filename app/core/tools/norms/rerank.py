@@ -0,0 +1,134 @@
+import os
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from app.core.cache.lru import TTLCache
+from app.core.tools.norms.bm25 import tokenize
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "1") == "1"
+# candidatos vindos da busca híbrida antes do rerank
+RERANK_FETCH_K = int(os.getenv("RERANK_FETCH_K", "30"))
+# tempo máximo gasto pontuando; o que sobrar mantém a ordem da fusão
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "8"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "20000"))
+# cross-encoder local do sentence-transformers
+# (ex.: "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"); vazio usa o scorer lexical
+RERANK_MODEL = os.getenv("RERANK_MODEL", "")
+
+
+class LexicalScorer:
+    """
+    Scorer barato sem modelo: cobertura dos termos da consulta pesada por
+    idf, mais bônus por pares de termos consecutivos (frases) e por números
+    citados ("302", "7.183") presentes no chunk.
+    """
+
+    def __init__(self, idf: Optional[Dict[str, float]] = None):
+        self.idf = idf or {}
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        q = tokenize(query)
+        if not q:
+            return [0.0] * len(texts)
+        weights = {t: self.idf.get(t, 1.0) for t in q}
+        total = sum(weights.values())
+        bigrams = set(zip(q, q[1:]))
+        numbers = {t for t in q if t[0].isdigit()}
+        scores = []
+        for text in texts:
+            tokens = tokenize(text)
+            present = set(tokens)
+            coverage = sum(w for t, w in weights.items() if t in present) / total
+            phrase = (
+                len(bigrams & set(zip(tokens, tokens[1:]))) / len(bigrams)
+                if bigrams
+                else 0.0
+            )
+            cited = len(numbers & present) / len(numbers) if numbers else 0.0
+            scores.append(coverage + 0.5 * phrase + 0.5 * cited)
+        return scores
+
+
+class CrossEncoderScorer:
+    """Cross-encoder local em CPU; carregado só na primeira consulta."""
+
+    def __init__(self, model: str):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model
+        self._model = None
+        self._cls = CrossEncoder
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        if self._model is None:
+            self._model = self._cls(self.model_name, device="cpu")
+        return [float(s) for s in self._model.predict([(query, t) for t in texts])]
+
+
+def make_scorer(idf: Optional[Dict[str, float]] = None):
+    if RERANK_MODEL:
+        try:
+            return CrossEncoderScorer(RERANK_MODEL)
+        except ImportError:
+            print("[Rerank] sentence-transformers não instalado, usando scorer lexical")
+    return LexicalScorer(idf)
+
+
+class Reranker:
+    """
+    Reordena os candidatos da busca híbrida dentro de um orçamento de tempo.
+
+    Os candidatos são pontuados em lotes, na ordem da fusão; ao estourar
+    `budget_ms`, os que não foram pontuados ficam depois dos pontuados, na
+    ordem original. Scores ficam em cache por (consulta, chunk).
+    """
+
+    def __init__(
+        self,
+        scorer=None,
+        budget_ms: float = RERANK_BUDGET_MS,
+        batch_size: int = RERANK_BATCH_SIZE,
+        cache_size: int = RERANK_CACHE_SIZE,
+    ):
+        self.scorer = scorer or LexicalScorer()
+        self.budget_ms = budget_ms
+        self.batch_size = batch_size
+        self._scores = TTLCache(maxsize=cache_size)
+        self.over_budget = 0
+
+    def rerank(self, query: str, docs: List[Document], top_n: int) -> List[Document]:
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        qkey = " ".join(tokenize(query))
+        keys = [(qkey, d.metadata.get("doc_id") or d.page_content) for d in docs]
+        scores: Dict[int, float] = {}
+        pending = []
+        for i, key in enumerate(keys):
+            cached = self._scores.get(key)
+            if cached is None:
+                pending.append(i)
+            else:
+                scores[i] = cached
+
+        for start in range(0, len(pending), self.batch_size):
+            if time.perf_counter() > deadline:
+                self.over_budget += 1
+                break
+            batch = pending[start : start + self.batch_size]
+            try:
+                values = self.scorer.score(query, [docs[i].page_content for i in batch])
+            except Exception as e:
+                print(f"[Rerank] falha ao pontuar, mantendo ordem da fusão: {e}")
+                break
+            for i, value in zip(batch, values):
+                scores[i] = value
+                self._scores.put(keys[i], value)
+
+        scored = sorted(scores, key=lambda i: scores[i], reverse=True)
+        rest = [i for i in range(len(docs)) if i not in scores]
+        return [docs[i] for i in (scored + rest)[:top_n]]
+
+    def stats(self) -> dict:
+        return {**self._scores.stats(), "over_budget": self.over_budget}
@@ -1,26 +1,118 @@
-from langchain.tools.retriever import create_retriever_tool
-from app.core.models.interface.embedding import EmbeddingProcessor
+import os
+import time
+from functools import lru_cache
+from typing import Annotated, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.tools import tool
+
+from app.core.config.metrics import RETRIEVAL_SECONDS
+from app.core.models.interface.embedding import EmbeddingProcessor, PERSIST_DIRECTORY
+from app.core.tools.norms.bm25 import BM25Index
+from app.core.tools.norms.compress import COMPRESS_ENABLED, make_compressor
+from app.core.tools.norms.hybrid import HybridRetriever
+from app.core.tools.norms.rerank import RERANK_ENABLED, Reranker, make_scorer
 
 pdfs = {
     "Código Brasileiro de Aeronáutica": "app/seed/CBA.pdf",
     "Lei do Aeronauta": "app/seed/Lei_do_Aeronauta.pdf",
 }
 
+# chunks por artigo, com metadados de capítulo/artigo/páginas
+NORMS_CHUNKING = os.getenv("NORMS_CHUNKING", "legal")
+
+
+def format_passages(docs: List[Document]) -> str:
+    """Passagens com cabeçalho "[norma | art. N | p. X-Y]" para citação."""
+    out = []
+    for d in docs:
+        m = d.metadata
+        header = [m.get("source", "Documento")]
+        if m.get("article"):
+            header.append(f"art. {m['article']}")
+        if m.get("page_start"):
+            pages = f"{m['page_start']}"
+            if m.get("page_end", m["page_start"]) != m["page_start"]:
+                pages += f"-{m['page_end']}"
+            header.append(f"p. {pages}")
+        if m.get("doc_id"):
+            header.append(m["doc_id"])
+        out.append(f"[{' | '.join(header)}]\n{d.page_content}")
+    return "\n\n".join(out)
+
 
 def build_pdf_retriever_tool():
     ep = EmbeddingProcessor(
         embedding_model="nomic-embed-text",
-        persist_directory="./chroma_db_ollama",
+        persist_directory=PERSIST_DIRECTORY,
+        chunking=NORMS_CHUNKING,
     )
     docs = ep.process_pdfs(pdfs)
     vs = ep.create_vectorstore(docs)
-    retriever = vs.as_retriever(search_kwargs={"k": 4})
-    return create_retriever_tool(
-        retriever,
-        name="consultar_normas_aeronauticas",
+    index = BM25Index.for_collection(vs, PERSIST_DIRECTORY)
+    retriever = HybridRetriever(
+        vectorstore=vs,
+        index=index,
+        k=4,
+        reranker=Reranker(make_scorer(index.idf)) if RERANK_ENABLED else None,
+    )
+    compressor = make_compressor(index.idf) if COMPRESS_ENABLED else None
+    # partições BM25 por norma montadas já na inicialização
+    retriever.index.partitions()
+    available = ", ".join(retriever.sources()) or ", ".join(pdfs)
+
+    @tool(
+        "consultar_normas_aeronauticas",
         description=(
             "Procurar na documentação normativa. "
             "Use para lookups factuais; retorne passagens relevantes "
-            "Cite metadata.source e doc_id."
+            "Cite metadata.source e doc_id. "
+            "Aceita citações exatas (ex.: 'art. 302', 'Lei nº 7.183'). "
+            f"Normas disponíveis: {available}. "
+            "Se a pergunta é sobre uma norma ou artigo específico, informe "
+            "`source` e/ou `article` para buscar só nele."
         ),
     )
+    def consultar_normas_aeronauticas(
+        query: Annotated[str, "Consulta em linguagem natural."],
+        source: Annotated[
+            Optional[str],
+            "Norma para restringir a busca (nome ou sigla, ex.: 'CBA').",
+        ] = None,
+        article: Annotated[
+            Optional[int], "Número do artigo para restringir a busca (ex.: 302)."
+        ] = None,
+    ) -> str:
+        resolved = None
+        if source:
+            found = retriever.match_sources(source)
+            if not found:
+                return f"Norma '{source}' não encontrada. Disponíveis: {available}."
+            if len(found) > 1:
+                return (
+                    f"Norma '{source}' é ambígua: {', '.join(found)}. "
+                    "Repita com o nome completo ou a sigla."
+                )
+            resolved = found[0]
+        t = time.perf_counter()
+        results = retriever.search(query, source=resolved, article=article)
+        if not results and article is not None:
+            # chunks sem metadados de artigo (ex.: NORMS_CHUNKING=recursive):
+            # busca pela citação no texto, ainda restrita à norma
+            results = retriever.search(f"{query} art. {article}", source=resolved)
+        RETRIEVAL_SECONDS.observe(time.perf_counter() - t, stage="search")
+        if not results:
+            return "Nenhuma informação relevante encontrada."
+        if compressor:
+            t = time.perf_counter()
+            results = compressor.compress(query, results)
+            RETRIEVAL_SECONDS.observe(time.perf_counter() - t, stage="compress")
+        return format_passages(results)
+
+    return consultar_normas_aeronauticas
+
+
+@lru_cache(maxsize=1)
+def get_pdf_retriever_tool():
+    """Tool de normas única por processo (grafo e aquecimento usam a mesma)."""
+    return build_pdf_retriever_tool()
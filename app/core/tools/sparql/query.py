@@ -0,0 +1,140 @@
+import os
+import re
+from functools import lru_cache
+from typing import Annotated, List, Optional
+
+from langchain_core.tools import tool
+
+from app.core.models.interface.triplestore import Triplestore, get_triplestore
+
+# linhas devolvidas por página de SELECT (o LIMIT vai para o Fuseki)
+SPARQL_MAX_ROWS = int(os.getenv("SPARQL_MAX_ROWS", "100"))
+SPARQL_READ_ONLY = os.getenv("SPARQL_READ_ONLY", "1") == "1"
+# tamanho máximo (bytes) do grafo de um CONSTRUCT/DESCRIBE na resposta da tool
+SPARQL_CONSTRUCT_MAX_BYTES = int(os.getenv("SPARQL_CONSTRUCT_MAX_BYTES", "16000"))
+
+# SPARQL 1.1 Update (subconjunto)
+WRITE_VERBS = (
+    "INSERT",
+    "DELETE",
+    "WITH",
+    "LOAD",
+    "CLEAR",
+    "CREATE",
+    "DROP",
+    "ADD",
+    "MOVE",
+    "COPY",
+)
+
+# PREFIX/BASE e comentários antes da forma da consulta
+_PROLOGUE_RE = re.compile(
+    r"^(?:\s+|#[^\n]*\n?|PREFIX\s+[\w.-]*:\s*<[^>]*>|BASE\s+<[^>]*>)*",
+    re.IGNORECASE,
+)
+
+
+def query_form(sparql: str) -> str:
+    """SELECT, ASK, CONSTRUCT, DESCRIBE ou o verbo de update."""
+    body = sparql[_PROLOGUE_RE.match(sparql).end() :]
+    word = re.match(r"[A-Za-z]+", body)
+    return word.group(0).upper() if word else ""
+
+
+def _cell(value: str) -> str:
+    # literais com tab/quebra de linha não podem quebrar o TSV
+    return value.replace("\t", " ").replace("\n", " ")
+
+
+def build_sparql_tool(
+    store: Optional[Triplestore] = None,
+    *,
+    read_only: bool = SPARQL_READ_ONLY,
+    max_rows: int = SPARQL_MAX_ROWS,
+    construct_format: str = "turtle",
+    construct_max_bytes: int = SPARQL_CONSTRUCT_MAX_BYTES,
+):
+    """
+    Tool 'sparql_query' sobre o Fuseki.
+
+    - SELECT: TSV (cabeçalho + linhas), no máximo `max_rows` por página;
+      LIMIT/OFFSET são aplicados no servidor e as linhas lidas em streaming.
+    - ASK: "true"/"false".
+    - CONSTRUCT/DESCRIBE: grafo serializado pelo Fuseki (Turtle por padrão),
+      cortado em `construct_max_bytes`.
+    - UPDATE: só com read_only=False.
+    """
+    store = store or get_triplestore()
+
+    @tool(
+        "sparql_query",
+        description=(
+            "Executa uma consulta SPARQL no triplestore (Fuseki) de dados "
+            "aeronáuticos. SELECT devolve TSV paginado "
+            f"({max_rows} linhas por página; use `page` para as seguintes); "
+            "ASK devolve true/false; CONSTRUCT/DESCRIBE devolvem Turtle. "
+            "Prefira SELECT com filtros e agregações (COUNT, GROUP BY) a "
+            "trazer muitas linhas."
+        ),
+    )
+    def sparql_query(
+        sparql: Annotated[str, "Consulta SPARQL completa, com os PREFIX."],
+        page: Annotated[int, "Página do resultado de um SELECT (começa em 0)."] = 0,
+    ) -> str:
+        try:
+            form = query_form(sparql)
+
+            if form in WRITE_VERBS:
+                if read_only:
+                    return "Escrita bloqueada: triplestore em modo somente leitura."
+                store.update(sparql)
+                return "OK"
+
+            if form == "ASK":
+                return "true" if store.ask(sparql) else "false"
+
+            if form in ("CONSTRUCT", "DESCRIBE"):
+                graph = store.construct(
+                    sparql, fmt=construct_format, max_bytes=construct_max_bytes
+                )
+                if not graph.strip():
+                    return "empty"
+                if graph.endswith(f"# truncado em {construct_max_bytes} bytes\n"):
+                    graph += (
+                        "[... grafo maior que o limite: restrinja o CONSTRUCT "
+                        "ou use SELECT]"
+                    )
+                return graph
+
+            # SELECT: pede uma linha a mais só para saber se há próxima página;
+            # o LIMIT já limita a leitura, então a página é lida até o fim
+            # (e pode entrar no cache do Triplestore)
+            page = max(page, 0)
+            headers: List[str] = []
+            lines: List[str] = []
+            for headers, row in store.iter_select(
+                sparql, limit=max_rows + 1, offset=page * max_rows
+            ):
+                lines.append("\t".join(_cell(row.get(h, "")) for h in headers))
+            more = len(lines) > max_rows
+            lines = lines[:max_rows]
+            if not lines:
+                return "empty" if page == 0 else f"Página {page} vazia."
+
+            out = "\t".join(headers) + "\n" + "\n".join(lines)
+            if more:
+                out += f"\n[... mais resultados: use page={page + 1}]"
+            return out
+
+        except PermissionError as e:
+            return f"SPARQL permission error: {e}"
+        except Exception as e:
+            return f"SPARQL error: {e}"
+
+    return sparql_query
+
+
+@lru_cache(maxsize=1)
+def get_sparql_tool():
+    """Tool SPARQL única por processo, compartilhada pelos agentes."""
+    return build_sparql_tool()
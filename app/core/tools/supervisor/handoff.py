@@ -4,6 +4,7 @@ from langgraph.prebuilt import InjectedState
 from langgraph.graph import MessagesState
 from langgraph.types import Command, Send
 from langchain_core.messages import AIMessage, ToolMessage
+from app.core.models.interface.chat_agent import trim_history
 
 
 def create_handoff_tool(*, agent_name: str, description: str | None = None):
@@ -21,11 +22,6 @@ def create_handoff_tool(*, agent_name: str, description: str | None = None):
         ],
         state: Annotated[MessagesState, InjectedState],
     ) -> Command:
-        msg = {"role": "user", "content": task_description}
-        agent_input = {
-            **state,
-            "messages": state["messages"] + [msg],
-        }
         tool_call_id = None
         for m in reversed(state["messages"]):
             if isinstance(m, AIMessage) and m.tool_calls:
@@ -41,6 +37,15 @@ def create_handoff_tool(*, agent_name: str, description: str | None = None):
             name=name,
             tool_call_id=tool_call_id,
         )
+        # o agente precisa receber o tool_msg também, senão o histórico dele
+        # fica com um tool_call sem resposta e a chamada ao modelo falha.
+        # Em sessões longas o histórico vai cortado pelo mesmo orçamento de
+        # tokens do modelo, em vez de copiado inteiro a cada transferência.
+        msg = {"role": "user", "content": task_description}
+        agent_input = {
+            **state,
+            "messages": trim_history(state["messages"]) + [tool_msg, msg],
+        }
         return Command(
             update={"messages": [tool_msg]},
             goto=[Send(agent_name, agent_input)],
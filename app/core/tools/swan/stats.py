@@ -0,0 +1,110 @@
+import time
+from functools import lru_cache
+from typing import Annotated, List, Literal, Optional
+
+from langchain_core.tools import tool
+
+from app.core.models.interface.occurrences import (
+    DIMENSIONS,
+    MULTI_VALUED,
+    get_occurrence_store,
+)
+
+Dimension = Literal["ano", "uf", "classificacao", "tipo", "categoria"]
+
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if value == int(value) else f"{value:.2f}"
+
+
+def build_occurrence_stats_tool():
+    @tool(
+        "estatisticas_ocorrencias",
+        description=(
+            "Estatísticas de ocorrências aeronáuticas (base do CENIPA): "
+            "contagens ou fatalidades agrupadas por "
+            f"{', '.join(DIMENSIONS)}, com filtros. "
+            "Ex.: acidentes por ano -> group_by=['ano'], classificacao='acidente'; "
+            "tipos mais comuns com helicópteros -> group_by=['tipo'], "
+            "categoria='helicoptero'. Use para qualquer pergunta de quantidade, "
+            "ranking ou tendência em vez de listar ocorrências."
+        ),
+    )
+    def estatisticas_ocorrencias(
+        group_by: Annotated[
+            Optional[List[Dimension]], "Dimensões para agrupar (vazio = só o total)."
+        ] = None,
+        ano: Annotated[Optional[int], "Ano exato."] = None,
+        ano_inicio: Annotated[Optional[int], "Ano inicial (inclusive)."] = None,
+        ano_fim: Annotated[Optional[int], "Ano final (inclusive)."] = None,
+        uf: Annotated[Optional[str], "UF, ex.: 'SP'."] = None,
+        classificacao: Annotated[
+            Optional[str], "'acidente', 'incidente' ou 'incidente grave'."
+        ] = None,
+        tipo: Annotated[
+            Optional[str], "Tipo de ocorrência (ou trecho), ex.: 'perda de controle'."
+        ] = None,
+        categoria: Annotated[
+            Optional[str], "Categoria da aeronave, ex.: 'avião', 'helicóptero'."
+        ] = None,
+        metrica: Annotated[
+            Literal["ocorrencias", "fatalidades"], "O que somar."
+        ] = "ocorrencias",
+        top: Annotated[int, "Máximo de grupos retornados."] = 15,
+    ) -> str:
+        store = get_occurrence_store()
+        if store is None:
+            return (
+                "Base de ocorrências não carregada (gere com "
+                "python -m app.core.models.interface.occurrences <csvs>)."
+            )
+        # valor exato tem prioridade: "incidente" não inclui "incidente grave"
+        filters = {
+            "uf": uf,
+            "classificacao": classificacao,
+            "tipo": tipo,
+            "categoria": categoria,
+        }
+        if ano is not None:
+            ano_inicio = ano_fim = ano
+        t = time.perf_counter()
+        try:
+            groups, total = store.aggregate(
+                group_by or [],
+                filters=filters,
+                year_from=ano_inicio,
+                year_to=ano_fim,
+                metric=metrica,
+                top=max(1, min(top, 100)),
+            )
+        except ValueError as e:
+            return str(e)
+        ms = (time.perf_counter() - t) * 1000
+
+        applied = [f"{k}={v}" for k, v in filters.items() if v]
+        if ano_inicio is not None or ano_fim is not None:
+            applied.append(f"ano={ano_inicio or '...'}-{ano_fim or '...'}")
+        lines = [
+            f"{metrica} (filtros: {', '.join(applied) or 'nenhum'}; "
+            f"base: {store.rows} ocorrências; {ms:.1f} ms)",
+            f"total: {_fmt(total)}",
+        ]
+        if group_by:
+            lines.append("\t".join(list(group_by) + [metrica, "%"]))
+            for labels, value in groups:
+                share = 100 * value / total if total else 0.0
+                lines.append("\t".join(list(labels) + [_fmt(value), f"{share:.1f}"]))
+            multi = [d for d in group_by if d in MULTI_VALUED]
+            if multi:
+                lines.append(
+                    f"obs.: ocorrências com mais de um valor em {', '.join(multi)} "
+                    "entram em cada grupo; o total conta cada ocorrência uma vez."
+                )
+        return "\n".join(lines)
+
+    return estatisticas_ocorrencias
+
+
+@lru_cache(maxsize=1)
+def get_occurrence_stats_tool():
+    return build_occurrence_stats_tool()
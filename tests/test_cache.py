@@ -0,0 +1,206 @@
+import time
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.cache import answer as A
+from app.core.cache.lru import TTLCache
+
+
+def test_lru_remove_o_menos_usado():
+    evicted = []
+    cache = TTLCache(maxsize=2, on_evict=evicted.append)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" passa a ser o menos usado
+    cache.put("c", 3)
+    assert "b" not in cache and evicted == ["b"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expira():
+    cache = TTLCache(maxsize=4, ttl=0.02)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.05)
+    assert cache.get("a", "x") == "x"
+    stats = cache.stats()
+    assert (stats["expirations"], stats["hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_clear_e_pop_avisam_on_evict():
+    evicted = []
+    cache = TTLCache(on_evict=evicted.append)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.pop("a")
+    cache.pop("nao-existe")
+    cache.clear()
+    assert evicted == ["a", "b"] and len(cache) == 0
+
+
+class Embeddings:
+    vectors = {
+        "qual a jornada maxima do aeronauta": [1.0, 0.0, 0.0],
+        "jornada máxima de um aeronauta?": [0.99, 0.1, 0.0],
+        "previsão do tempo em guarulhos": [0.0, 1.0, 0.0],
+    }
+
+    def embed_query(self, text):
+        return self.vectors.get(text, [0.0, 0.0, 1.0])
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    version = {"v": "1"}
+    monkeypatch.setattr(A, "get_embeddings", lambda: Embeddings())
+    monkeypatch.setattr(A, "index_version", lambda: version["v"])
+    cache = A.AnswerCache(maxsize=8, ttl=60, similarity=0.92)
+    cache.version = version
+    return cache
+
+
+def test_question_key_ignora_caixa_acento_e_pontuacao():
+    assert A.question_key("  Qual a JORNADA máxima?! ") == "qual a jornada maxima"
+
+
+def test_acerto_exato(cache):
+    answer, vec = cache.get("Qual a jornada máxima do aeronauta?")
+    assert answer is None and vec is not None
+    cache.put("Qual a jornada máxima do aeronauta?", "12 horas", vec)
+    assert cache.get("qual a jornada maxima do aeronauta") == ("12 horas", None)
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_acerto_semantico(cache):
+    _, vec = cache.get("qual a jornada maxima do aeronauta")
+    cache.put("qual a jornada maxima do aeronauta", "12 horas", vec)
+    answer, _ = cache.get("jornada máxima de um aeronauta?")
+    assert answer == "12 horas"
+    assert cache.get("previsão do tempo em guarulhos")[0] is None
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (1, 2)
+
+
+def test_indice_novo_descarta_respostas(cache):
+    cache.put("pergunta", "resposta")
+    assert cache.get("pergunta")[0] == "resposta"
+    cache.version["v"] = "2"
+    assert cache.get("pergunta")[0] is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_resposta_removida_sai_do_indice_semantico(cache):
+    small = A.AnswerCache(maxsize=1, ttl=60, similarity=0.92)
+    _, vec = small.get("qual a jornada maxima do aeronauta")
+    small.put("qual a jornada maxima do aeronauta", "12 horas", vec)
+    small.put("outra", "resposta")
+    assert small._vectors == {}
+    assert small.get("jornada máxima de um aeronauta?")[0] is None
+
+
+def test_sem_embeddings_usa_so_o_exato(cache, monkeypatch):
+    class Down:
+        def embed_query(self, text):
+            raise ConnectionError("ollama fora do ar")
+
+    monkeypatch.setattr(A, "get_embeddings", lambda: Down())
+    cache.put("pergunta", "resposta")
+    assert cache.get("Pergunta!") == ("resposta", None)
+    assert cache.get("outra") == (None, None)
+
+
+class BagEmbeddings:
+    """Só as palavras contam: números citados não mudam o vetor."""
+
+    VOCAB = ["diz", "art", "lei", "jornada", "aeronauta"]
+
+    def embed_query(self, text):
+        words = A.question_key(text).split()
+        return [float(words.count(w)) for w in self.VOCAB]
+
+
+def test_semantico_exige_os_mesmos_numeros(monkeypatch):
+    monkeypatch.setattr(A, "get_embeddings", lambda: BagEmbeddings())
+    monkeypatch.setattr(A, "index_version", lambda: "1")
+    cache = A.AnswerCache(maxsize=8, ttl=60, similarity=0.92)
+    for question, answer in (
+        ("o que diz o art. 302", "resposta do 302"),
+        ("o que diz a Lei nº 7.183", "resposta da 7.183"),
+    ):
+        _, vec = cache.get(question)
+        cache.put(question, answer, vec)
+
+    assert cache.get("o que diz o art. 303")[0] is None
+    assert cache.get("o que diz a Lei nº 7.565")[0] is None
+    assert cache.get("diz o art 302?")[0] == "resposta do 302"
+    assert cache.get("diz a lei 7183")[0] == "resposta da 7.183"
+
+    # a mais parecida cita outro número, mas uma com o mesmo número também passa
+    _, vec = cache.get("o que diz o art. 303")
+    cache.put("o que diz o art. 303", "resposta do 303", vec)
+    assert cache.get("art 303 o que diz?")[0] == "resposta do 303"
+
+
+class SpyCache:
+    def __init__(self, limiter, similar=None):
+        self.limiter = limiter
+        self.similar = similar
+        self.embedded_with = []
+
+    def get_exact(self, question):
+        return None
+
+    def get_similar(self, question):
+        self.embedded_with.append(self.limiter.stats()["running"])
+        return self.similar, None
+
+    def put(self, *args):
+        pass
+
+
+@pytest.fixture
+def api(monkeypatch):
+    from app.api import handler as H
+    from app.api.limiter import ConcurrencyLimiter
+
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=0, queue_timeout=1)
+    cache = SpyCache(limiter)
+    for name, value in (
+        ("answer_cache", cache),
+        ("limiter", limiter),
+        ("graph", object()),
+        ("session_graph", object()),
+    ):
+        monkeypatch.setattr(H.app.state, name, value, raising=False)
+    return H, cache
+
+
+def test_embedding_da_pergunta_roda_dentro_da_vaga(api):
+    H, cache = api
+    cache.similar = "resposta"
+    body = H.AskBody(question="o que diz o art. 302")
+    assert asyncio.run(H.ask(body)) == {"answer": "resposta", "cached": True}
+    assert cache.embedded_with == [1]
+    assert H.app.state.limiter.stats()["running"] == 0
+
+
+def test_sem_grafo_ou_sem_vaga_nao_chama_embeddings(api, monkeypatch):
+    H, cache = api
+    body = H.AskBody(question="o que diz o art. 302")
+    monkeypatch.setattr(H.app.state, "graph", None)
+    with pytest.raises(HTTPException) as err:
+        asyncio.run(H.ask(body))
+    assert err.value.status_code == 503
+
+    monkeypatch.setattr(H.app.state, "graph", object())
+
+    async def busy():
+        async with H.app.state.limiter.slot():
+            await H.ask_stream(body)
+
+    with pytest.raises(HTTPException) as err:
+        asyncio.run(busy())
+    assert err.value.status_code == 429
+    assert cache.embedded_with == []
@@ -0,0 +1,58 @@
+from langchain_core.documents import Document
+
+from app.core.tools.norms.compress import (
+    ContextCompressor,
+    estimate_tokens,
+    split_sentences,
+)
+
+ART = (
+    "Art. 302.\nA multa será aplicada pela autoridade\naeronáutica. "
+    "O valor é fixado em regulamento.\n"
+    "I - infrações leves;\n"
+    "II - infrações graves;\n"
+    "§ 1o A reincidência dobra a multa."
+)
+
+
+def test_frases_e_incisos():
+    assert split_sentences(ART) == [
+        "Art. 302. A multa será aplicada pela autoridade aeronáutica.",
+        "O valor é fixado em regulamento.",
+        "I - infrações leves;",
+        "II - infrações graves;",
+        "§ 1o A reincidência dobra a multa.",
+    ]
+
+
+def test_mantem_frases_relevantes_dentro_do_orcamento():
+    compressor = ContextCompressor(token_budget=30)
+    out = compressor.compress(
+        "reincidência da multa", [Document(ART, metadata={"doc_id": "a"})]
+    )
+    text = out[0].page_content
+    assert "reincidência" in text and "[...]" in text
+    assert "infrações leves" not in text
+    assert out[0].metadata == {"doc_id": "a"}
+    assert estimate_tokens(text) <= 30 + 2
+    stats = compressor.stats()
+    assert stats["tokens_out"] < stats["tokens_in"]
+
+
+def test_remove_frases_repetidas_entre_chunks():
+    first = Document("A jornada é de 12 horas. O repouso é de 10 horas.")
+    second = Document("O repouso é de 10 horas. A folga é semanal.")
+    out = ContextCompressor(token_budget=1000).compress(
+        "jornada repouso folga", [first, second]
+    )
+    joined = " ".join(d.page_content for d in out)
+    assert joined.count("O repouso é de 10 horas.") == 1
+
+
+def test_falha_do_scorer_envia_passagens_inteiras():
+    class Broken:
+        def score(self, query, texts):
+            raise RuntimeError("fora do ar")
+
+    passages = [Document(ART)]
+    assert ContextCompressor(Broken()).compress("multa", passages) == passages
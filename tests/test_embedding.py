@@ -0,0 +1,121 @@
+from concurrent.futures import Future
+
+import pytest
+
+from app.core.models.interface import embedding as E
+
+
+class BrokenPool:
+    """Pool cujas tarefas de um PDF sempre falham."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, path, start, stop):
+        fut = Future()
+        if path == "quebrado.pdf":
+            fut.set_exception(RuntimeError("worker morreu"))
+        else:
+            fut.set_result(fn(path, start, stop))
+        return fut
+
+
+@pytest.fixture
+def pdfs(monkeypatch):
+    sizes = {"ok.pdf": 40, "quebrado.pdf": 20}
+    monkeypatch.setattr(E, "page_count", lambda path: sizes[path])
+    monkeypatch.setattr(
+        E,
+        "extract_page_range",
+        lambda path, start, stop: [f"{path} p{i}" for i in range(start, stop)],
+    )
+    monkeypatch.setattr(E, "ProcessPoolExecutor", BrokenPool)
+    return sizes
+
+
+def test_falha_no_pool_cai_para_extracao_sequencial(pdfs):
+    processor = object.__new__(E.EmbeddingProcessor)
+    pages = processor.extract_pages_parallel(
+        {"ok": "ok.pdf", "quebrado": "quebrado.pdf"}, workers=4
+    )
+    assert pages["ok"] == [f"ok.pdf p{i}" for i in range(40)]
+    assert pages["quebrado"] == [f"quebrado.pdf p{i}" for i in range(20)]
+
+
+def test_pdf_sem_texto_fica_fora_do_manifesto(pdfs, monkeypatch, tmp_path):
+    def fail(path, start, stop):
+        raise OSError("arquivo corrompido")
+
+    monkeypatch.setattr(E, "extract_page_range", fail)
+    for name in pdfs:
+        (tmp_path / name).write_bytes(b"%PDF")
+    monkeypatch.chdir(tmp_path)
+
+    processor = object.__new__(E.EmbeddingProcessor)
+    processor.chunking = "recursive"
+    processor.chunk_size, processor.chunk_overlap = 1000, 200
+    processor.embedding_model = "fake"
+    processor.manifest = E.IngestionManifest(str(tmp_path / "db"))
+    docs = processor.process_pdfs({"quebrado": "quebrado.pdf"}, workers=4)
+    assert docs == []
+    assert processor.manifest.staged() == []
+
+
+class CountingSemaphore(E.threading.Semaphore):
+    instances = []
+
+    def __init__(self, value=1):
+        super().__init__(value)
+        self.initial, self.acquired, self.released = value, 0, 0
+        CountingSemaphore.instances.append(self)
+
+    def acquire(self, *args, **kwargs):
+        got = super().acquire(*args, **kwargs)
+        self.acquired += bool(got)
+        return got
+
+    def release(self, n=1):
+        self.released += n
+        super().release(n)
+
+
+class FakeEmbeddings:
+    def embed_documents(self, texts):
+        return [[float(len(t))] for t in texts]
+
+
+class FailingCollection:
+    def __init__(self, fail_on):
+        self.calls, self.fail_on = 0, fail_on
+
+    def upsert(self, **kwargs):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise RuntimeError("chroma fora do ar")
+
+
+@pytest.mark.parametrize("fail_on", [None, 1, 3])
+def test_ingest_libera_cada_vaga_uma_vez(monkeypatch, fail_on):
+    CountingSemaphore.instances = []
+    monkeypatch.setattr(E.threading, "Semaphore", CountingSemaphore)
+    processor = object.__new__(E.EmbeddingProcessor)
+    processor.embeddings = FakeEmbeddings()
+    collection = FailingCollection(fail_on)
+    processor.vectorstore = type("VS", (), {"_collection": collection})()
+    docs = [
+        E.Document(page_content=f"chunk {i}", metadata={"doc_id": str(i)})
+        for i in range(40)
+    ]
+    if fail_on:
+        with pytest.raises(RuntimeError):
+            processor._ingest(docs, batch_size=2, concurrency=2)
+    else:
+        processor._ingest(docs, batch_size=2, concurrency=2)
+    (slots,) = [s for s in CountingSemaphore.instances if s.initial == 4]
+    assert slots.acquired == slots.released == 20
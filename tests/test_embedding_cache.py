@@ -0,0 +1,99 @@
+import asyncio
+import os
+
+from app.core.cache.embedding import CachedEmbeddings
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), float(sum(map(ord, t)) % 97), 1.0] for t in texts]
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+
+def make(tmp_path, inner=None, **kwargs):
+    return CachedEmbeddings(
+        inner or CountingEmbeddings(), "nomic-embed-text", str(tmp_path), **kwargs
+    )
+
+
+def test_texto_repetido_nao_chama_o_modelo(tmp_path):
+    cache = make(tmp_path)
+    first = cache.embed_documents(["art. 1", "art. 2", "art. 1"])
+    assert cache.inner.calls == [["art. 1", "art. 2"]]
+    assert cache.embed_query("art. 2") == first[1]
+    assert cache.inner.calls == [["art. 1", "art. 2"]]
+    assert cache.stats()["hits"] == 2
+
+
+def test_cache_persiste_entre_processos(tmp_path):
+    vectors = make(tmp_path).embed_documents(["a", "b"])
+    other = make(tmp_path)
+    assert other.embed_documents(["b", "a"]) == vectors[::-1]
+    assert other.inner.calls == []
+
+
+def test_le_registros_gravados_por_outro_processo(tmp_path):
+    reader = make(tmp_path)
+    writer = make(tmp_path)
+    vector = writer.embed_documents(["novo"])[0]
+    assert reader.embed_documents(["novo"])[0] == vector
+    assert reader.inner.calls == []
+
+
+def test_modelos_diferentes_nao_se_misturam(tmp_path):
+    make(tmp_path).embed_documents(["a"])
+    other = CachedEmbeddings(CountingEmbeddings(), "outro-modelo", str(tmp_path))
+    other.embed_documents(["a"])
+    assert other.inner.calls == [["a"]]
+
+
+def test_cauda_truncada_e_recuperada(tmp_path):
+    cache = make(tmp_path)
+    good, lost = cache.embed_documents(["inteiro", "cortado"])
+    # processo morreu no meio do último write
+    size = os.path.getsize(cache.path)
+    with open(cache.path, "r+b") as f:
+        f.truncate(size - 5)
+
+    recovered = make(tmp_path)
+    assert recovered.embed_query("inteiro") == good
+    assert recovered.embed_documents(["cortado"]) == [lost]
+    assert recovered.inner.calls == [["cortado"]]
+
+    # o registro novo vem depois do pedaço quebrado e continua legível
+    again = make(tmp_path)
+    assert again.embed_documents(["inteiro", "cortado"]) == [good, lost]
+    assert again.inner.calls == []
+
+
+def test_versao_async(tmp_path):
+    cache = make(tmp_path)
+    vector = asyncio.run(cache.aembed_query("async"))
+    assert cache.embed_query("async") == vector
+    assert cache.inner.calls == [["async"]]
+
+
+def test_consultas_ficam_so_num_lru_limitado(tmp_path):
+    cache = make(tmp_path, query_cache_size=2)
+    for q in ("pergunta 1", "pergunta 2", "pergunta 3"):
+        cache.embed_query(q)
+    assert not os.path.exists(cache.path)
+    assert cache.stats()["queries"] == 2
+    cache.embed_query("pergunta 3")
+    assert len(cache.inner.calls) == 3
+    cache.embed_query("pergunta 1")
+    assert len(cache.inner.calls) == 4
+    # outro processo não vê as consultas
+    assert make(tmp_path).stats()["entries"] == 0
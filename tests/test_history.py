@@ -0,0 +1,46 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from app.core.models.interface.chat_agent import final_answer, trim_history
+
+
+def turn(i, size=40):
+    return [
+        HumanMessage(f"pergunta {i} " + "x " * size),
+        AIMessage("", tool_calls=[{"name": "busca", "args": {}, "id": f"c{i}"}]),
+        ToolMessage("resultado " + "y " * size, tool_call_id=f"c{i}"),
+        AIMessage(f"resposta {i}"),
+    ]
+
+
+def test_historico_curto_passa_inteiro():
+    messages = [SystemMessage("sistema")] + turn(1)
+    assert trim_history(messages, max_tokens=3000) == messages
+
+
+def test_corta_turnos_antigos_comecando_no_usuario():
+    messages = [SystemMessage("sistema")] + turn(1) + turn(2) + turn(3)
+    trimmed = trim_history(messages, max_tokens=120)
+    assert trimmed[0] == messages[0]
+    assert isinstance(trimmed[1], HumanMessage)
+    assert trimmed[-1].content == "resposta 3"
+    assert len(trimmed) < len(messages)
+    # nenhuma resposta de tool sem a chamada correspondente
+    calls = {c["id"] for m in trimmed if isinstance(m, AIMessage) for c in m.tool_calls}
+    assert all(m.tool_call_id in calls for m in trimmed if isinstance(m, ToolMessage))
+
+
+def test_turno_atual_maior_que_o_orcamento_vai_inteiro():
+    messages = turn(1) + turn(2, size=2000)
+    trimmed = trim_history(messages, max_tokens=50)
+    assert trimmed == messages[4:]
+
+
+def test_aceita_dicts():
+    trimmed = trim_history([{"role": "user", "content": "oi"}])
+    assert isinstance(trimmed[0], HumanMessage)
+
+
+def test_resposta_final_ignora_chamadas_de_tool():
+    assert final_answer({"messages": turn(1)}) == "resposta 1"
+    assert final_answer({"messages": turn(1)[:3]}) == ""
+    assert final_answer({}) == ""
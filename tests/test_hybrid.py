@@ -0,0 +1,114 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.core.tools.norms.bm25 import BM25Index
+from app.core.tools.norms.hybrid import (
+    HybridRetriever,
+    build_where,
+    reciprocal_rank_fusion,
+)
+
+CBA = "Código Brasileiro de Aeronáutica"
+AERONAUTA = "Lei do Aeronauta"
+CHUNKS = [
+    ("cba:1", "Art. 1 O Direito Aeronáutico é regulado pelos Tratados.", CBA, 1),
+    ("cba:302", "Art. 302 A multa será aplicada pela prática de infração.", CBA, 302),
+    (
+        "lei:1",
+        "Art. 1 Esta Lei regula o exercício da profissão de tripulante.",
+        AERONAUTA,
+        1,
+    ),
+    ("lei:31", "Art. 31 A jornada de trabalho do tripulante.", AERONAUTA, 31),
+]
+
+
+class FakeVectorstore:
+    def __init__(self, ranking):
+        self.ranking, self.filters = ranking, []
+
+    def similarity_search(self, query, k, filter=None):
+        self.filters.append(filter)
+        by_id = {c[0]: c for c in CHUNKS}
+        return [
+            Document(
+                page_content=by_id[i][1], metadata={"doc_id": i, "source": by_id[i][2]}
+            )
+            for i in self.ranking[:k]
+        ]
+
+
+@pytest.fixture
+def retriever():
+    index = BM25Index().build(
+        [c[0] for c in CHUNKS],
+        [c[1] for c in CHUNKS],
+        [
+            {"doc_id": i, "source": s, "article_start": a, "article_end": a}
+            for i, _, s, a in CHUNKS
+        ],
+    )
+    return HybridRetriever(
+        vectorstore=FakeVectorstore(["lei:31", "cba:1", "cba:302", "lei:1"]),
+        index=index,
+        k=2,
+    )
+
+
+def test_rrf_soma_posicoes_das_listas():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert [d for d, _ in fused] == ["a", "c", "b"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+    assert fused[2][1] == pytest.approx(1 / 62)
+
+
+def test_rrf_listas_vazias():
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+def test_build_where():
+    assert build_where() is None
+    assert build_where(source=CBA) == {"source": CBA}
+    assert build_where(article=302) == {
+        "$and": [{"article_start": {"$lte": 302}}, {"article_end": {"$gte": 302}}]
+    }
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("CBA", [CBA]),
+        ("codigo brasileiro de aeronautica", [CBA]),
+        ("lei", [AERONAUTA]),  # "lei" não casa com "brasiLEIro"
+        ("aeronauta", [AERONAUTA]),
+        ("Lei de Aeronauta", [AERONAUTA]),
+        ("Lei do Aeronauta (Lei 13.475)", [AERONAUTA]),
+        ("aero", []),
+        ("", []),
+    ],
+)
+def test_match_sources_por_palavra(retriever, name, expected):
+    assert retriever.match_sources(name) == expected
+
+
+def test_filtro_ambiguo(retriever):
+    # "aeronáutica" e "aeronauta" são palavras diferentes; "de" é stopword
+    retriever.index.partitions()["Regulamento de Aeronáutica Civil"] = BM25Index()
+    assert retriever.match_sources("aeronautica") == [
+        CBA,
+        "Regulamento de Aeronáutica Civil",
+    ]
+    assert retriever.resolve_source("aeronautica") is None
+    assert retriever.resolve_source("cba") == CBA
+
+
+def test_busca_restrita_a_norma(retriever):
+    results = retriever.search("tripulante jornada", source=AERONAUTA)
+    assert retriever.vectorstore.filters[-1] == {"source": AERONAUTA}
+    assert results[0].metadata["doc_id"] == "lei:31"
+
+
+def test_busca_funde_denso_e_lexical(retriever):
+    results = retriever.search("art. 302 multa")
+    ids = [d.metadata["doc_id"] for d in results]
+    assert "cba:302" in ids
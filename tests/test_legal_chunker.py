@@ -0,0 +1,75 @@
+from app.core.models.interface.legal_chunker import LegalTextSplitter
+
+PAGES = [
+    "LEI Nº 13.475, DE 28 DE AGOSTO DE 2017\n"
+    "Dispõe sobre o exercício da profissão de tripulante.\n"
+    "CAPÍTULO I\n"
+    "DISPOSIÇÕES PRELIMINARES\n"
+    "Art. 1o Esta Lei regula o exercício das profissões de piloto.\n"
+    "Art. 2o O piloto de aeronave e o mecânico de voo são tripulantes.\n",
+    "Art. 12. A jornada é a duração do trabalho.\n"
+    "Art. 12-A. O repouso é contado a partir do corte dos motores.\n"
+    "Art. 3 8. Número quebrado pelo PDF.\n"
+    "CAPÍTULO II\n"
+    "DAS DISPOSIÇÕES FINAIS\n"
+    "Art. 79. O art. 30 da Lei no 7.183 passa a vigorar com a seguinte redação:\n"
+    "“Art. 30. Os limites de tempo de voo do tripulante não poderão exceder:\n"
+    "I - em aviões convencionais, 100 (cem) horas;\n"
+    "Art. 31. Texto ainda citado, sem aspas no início da linha.\n"
+    "§ 1o Quando o aeronauta tripular diferentes tipos de aeronave.” (NR)\n"
+    "Art. 81. Revogam-se os dispositivos do art. 80.\n"
+    "Art. 5o Citação sem aspas com número menor.\n",
+]
+
+
+def blocks():
+    return LegalTextSplitter()._blocks(PAGES)
+
+
+def test_artigos_com_contexto_e_paginas():
+    b = {x["article"]: x for x in blocks()}
+    assert b["1"]["chapter"] == "Capítulo I - DISPOSIÇÕES PRELIMINARES"
+    assert b["1"]["page_start"] == 1
+    assert b["12"]["page_start"] == 2
+    assert b["12-A"]["article_num"] == 12
+    assert b["79"]["chapter"] == "Capítulo II - DAS DISPOSIÇÕES FINAIS"
+
+
+def test_texto_citado_fica_no_artigo_que_cita():
+    articles = [x["article"] for x in blocks()]
+    assert articles == ["", "1", "2", "12", "12-A", "38", "79", "81"]
+    art79 = next(x for x in blocks() if x["article"] == "79")
+    assert any(l.startswith("“Art. 30.") for l in art79["lines"])
+    assert any(l.startswith("Art. 31.") for l in art79["lines"])
+
+
+def test_numero_menor_nao_abre_artigo():
+    art81 = next(x for x in blocks() if x["article"] == "81")
+    assert art81["lines"][-1].startswith("Art. 5o")
+
+
+def test_rotulo_de_faixa_nao_confunde_com_artigo_com_letra():
+    chunks = LegalTextSplitter(max_chars=1500, min_chars=1000).split_pages(PAGES)
+    labels = {m["article"]: m for _, m in chunks}
+    # artigos curtos do mesmo capítulo juntados: faixa usa " a "
+    assert list(labels) == ["", "1 a 38", "79 a 81"]
+    assert labels["1 a 38"]["article_start"] == 1
+    assert labels["1 a 38"]["article_end"] == 38
+    chunks = LegalTextSplitter(max_chars=1500, min_chars=1000).split_pages(
+        ["Art. 12. Jornada.\nArt. 12-A. Repouso.\n"]
+    )
+    assert [m["article"] for _, m in chunks] == ["12 a 12-A"]
+    assert chunks[0][1]["article_start"] == chunks[0][1]["article_end"] == 12
+
+
+def test_artigo_longo_quebrado_em_paragrafos():
+    lines = ["Art. 7o Caput do artigo."] + [
+        f"§ {i}o " + "texto do parágrafo " * 10 for i in range(1, 12)
+    ]
+    splitter = LegalTextSplitter(max_chars=500, min_chars=200)
+    chunks = splitter.split_pages(["\n".join(lines)])
+    pieces = [t for t, m in chunks if m["article"] == "7"]
+    assert len(pieces) > 1
+    assert all(len(t) <= 500 for t in pieces)
+    assert all(t.startswith("Art. 7") for t in pieces)
+    assert all(m["article_start"] == m["article_end"] == 7 for _, m in chunks[1:])
@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.limiter import ConcurrencyLimiter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_fila_cheia_responde_429():
+    async def main():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=0, queue_timeout=1)
+        await limiter.acquire()
+        with pytest.raises(HTTPException) as err:
+            await limiter.acquire()
+        assert err.value.status_code == 429
+        limiter.release()
+        assert limiter.stats()["running"] == 0
+
+    run(main())
+
+
+def test_espera_estourada_responde_503():
+    async def main():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1, queue_timeout=0.01)
+        await limiter.acquire()
+        with pytest.raises(HTTPException) as err:
+            await limiter.acquire()
+        assert err.value.status_code == 503
+        assert limiter.stats()["waiting"] == 0
+
+    run(main())
+
+
+def test_hold_libera_uma_vez():
+    async def main():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=0, queue_timeout=1)
+        release = await limiter.hold()
+        release()
+        release()
+        assert limiter.stats()["running"] == 0
+        # só uma vaga volta ao semáforo
+        await limiter.acquire()
+        with pytest.raises(HTTPException):
+            await limiter.acquire()
+
+    run(main())
+
+
+def test_stream_sem_gerador_nao_vaza_vaga():
+    from app.api.handler import SlotStreamingResponse
+
+    async def main():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=0, queue_timeout=1)
+        release = await limiter.hold()
+
+        async def events():
+            try:
+                yield "data: x\n\n"
+            finally:
+                release()
+
+        async def send(message):
+            # cliente caiu antes dos cabeçalhos: o gerador nunca roda
+            raise OSError("client gone")
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        response = SlotStreamingResponse(events(), release=release)
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        with pytest.raises(Exception):
+            await response(scope, receive, send)
+        assert limiter.stats()["running"] == 0
+
+    run(main())
+
+
+def test_stream_completo_libera_uma_vez():
+    from app.api.handler import SlotStreamingResponse
+
+    async def main():
+        limiter = ConcurrencyLimiter(max_concurrency=2, max_queue=0, queue_timeout=1)
+        release = await limiter.hold()
+        sent = []
+
+        async def events():
+            try:
+                yield "data: x\n\n"
+            finally:
+                release()
+
+        async def send(message):
+            sent.append(message)
+
+        async def receive():
+            await asyncio.sleep(10)
+
+        response = SlotStreamingResponse(events(), release=release)
+        await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+        assert sent[-1]["type"] == "http.response.body"
+        assert limiter.stats()["running"] == 0
+        assert limiter._sem._value == 2
+
+    run(main())
+
+
+def test_slot_limita_execucoes_simultaneas():
+    async def main():
+        limiter = ConcurrencyLimiter(max_concurrency=3, max_queue=20, queue_timeout=5)
+        peak = 0
+
+        async def job():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.stats()["running"])
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(job() for _ in range(12)))
+        assert peak == 3
+        assert limiter.stats() == {
+            "running": 0,
+            "waiting": 0,
+            "max_concurrency": 3,
+            "max_queue": 20,
+        }
+
+    run(main())
+
+
+def test_slot_libera_em_erro():
+    async def main():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=0, queue_timeout=1)
+        with pytest.raises(RuntimeError):
+            async with limiter.slot():
+                raise RuntimeError("grafo falhou")
+        async with limiter.slot():
+            assert limiter.stats()["running"] == 1
+
+    run(main())
+
+
+def test_arun_graph_devolve_resposta_final_e_fecha_trace():
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    from app.core.config.trace import Trace
+    from app.core.config.utils import arun_graph
+
+    class Graph:
+        def __init__(self, error=None):
+            self.error = error
+
+        async def ainvoke(self, payload, config):
+            assert config["callbacks"][-1] is trace
+            if self.error:
+                raise self.error
+            return {
+                "messages": [
+                    HumanMessage("oi"),
+                    AIMessage("", tool_calls=[{"name": "t", "args": {}, "id": "1"}]),
+                    AIMessage("resposta"),
+                ]
+            }
+
+    trace = Trace("oi")
+    assert run(arun_graph(Graph(), {}, trace)) == "resposta"
+    assert trace.answer == "resposta"
+
+    trace = Trace("oi")
+    with pytest.raises(ValueError):
+        run(arun_graph(Graph(ValueError("fora do ar")), {}, trace))
+    assert "fora do ar" in trace.error
@@ -0,0 +1,77 @@
+import os
+
+from app.core.models.interface.embedding import IngestionManifest, index_version
+
+PARAMS = {"chunk_size": 1000, "chunk_overlap": 200, "embedding_model": "m"}
+
+
+def _pdf(tmp_path, content=b"%PDF-1.4 conteudo"):
+    path = tmp_path / "norma.pdf"
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_documento_novo_nao_esta_indexado(tmp_path):
+    manifest = IngestionManifest(str(tmp_path / "db"))
+    assert manifest.check("norma", _pdf(tmp_path), PARAMS) is False
+
+
+def test_commit_persiste_e_pula_no_proximo_boot(tmp_path):
+    pdf = _pdf(tmp_path)
+    db = str(tmp_path / "db")
+    manifest = IngestionManifest(db)
+    manifest.stage("norma", pdf, PARAMS, chunks=12)
+    # nada persiste antes do commit
+    assert IngestionManifest(db).check("norma", pdf, PARAMS) is False
+    manifest.commit()
+    again = IngestionManifest(db)
+    assert again.check("norma", pdf, PARAMS) is True
+    assert again.previous("norma")["chunks"] == 12
+
+
+def test_parametros_ou_conteudo_diferentes_reprocessam(tmp_path):
+    pdf = _pdf(tmp_path)
+    db = str(tmp_path / "db")
+    manifest = IngestionManifest(db)
+    manifest.stage("norma", pdf, PARAMS, chunks=1)
+    manifest.commit()
+    assert (
+        IngestionManifest(db).check("norma", pdf, {**PARAMS, "chunk_size": 500})
+        is False
+    )
+    _pdf(tmp_path, b"%PDF-1.4 outro conteudo maior")
+    assert IngestionManifest(db).check("norma", pdf, PARAMS) is False
+
+
+def test_mtime_novo_com_mesmo_conteudo_confirma_pelo_hash(tmp_path):
+    pdf = _pdf(tmp_path)
+    db = str(tmp_path / "db")
+    manifest = IngestionManifest(db)
+    manifest.stage("norma", pdf, PARAMS, chunks=1)
+    manifest.commit()
+    st = os.stat(pdf)
+    os.utime(pdf, (st.st_atime, st.st_mtime + 100))
+    again = IngestionManifest(db)
+    assert again.check("norma", pdf, PARAMS) is True
+    # o mtime novo fica registrado no próximo commit
+    assert again.staged() == ["norma"]
+
+
+def test_manifesto_invalido_e_ignorado(tmp_path):
+    db = tmp_path / "db"
+    db.mkdir()
+    (db / "ingest_manifest.json").write_text("{quebrado")
+    assert IngestionManifest(str(db)).entries == {}
+
+
+def test_index_version_muda_a_cada_commit(tmp_path):
+    db = str(tmp_path / "db")
+    assert index_version(db) == "empty"
+    manifest = IngestionManifest(db)
+    manifest.stage("norma", _pdf(tmp_path), PARAMS, chunks=1)
+    manifest.commit()
+    first = index_version(db)
+    assert first != "empty"
+    manifest.stage("norma", _pdf(tmp_path), PARAMS, chunks=1234)
+    manifest.commit()
+    assert index_version(db) != first
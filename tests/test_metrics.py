@@ -0,0 +1,33 @@
+from app.core.config.metrics import Counter, Histogram, MetricsCallback, NODE_SECONDS
+from tests.test_trace import visit_agent
+
+
+def _count(agent, node):
+    with NODE_SECONDS._lock:
+        value = NODE_SECONDS._values.get((agent, node))
+    return value[2] if value else 0
+
+
+def test_node_histogram_counts_each_visit_once():
+    before = _count("Agente Teste", "Agente Teste")
+    cb = MetricsCallback()
+    visit_agent(cb, agent="Agente Teste")
+    assert _count("Agente Teste", "Agente Teste") == before + 1
+    assert not cb._open
+
+
+def test_histogram_render_is_cumulative():
+    h = Histogram("x_seconds", "x", ("k",), buckets=(0.1, 1))
+    h.observe(0.05, k="a")
+    h.observe(0.5, k="a")
+    lines = h.render()
+    assert 'x_seconds_bucket{k="a",le="0.1"} 1' in lines
+    assert 'x_seconds_bucket{k="a",le="1"} 2' in lines
+    assert 'x_seconds_bucket{k="a",le="+Inf"} 2' in lines
+    assert 'x_seconds_count{k="a"} 2' in lines
+
+
+def test_counter_escapes_labels():
+    c = Counter("y_total", "y", ("k",))
+    c.inc(k='a"b')
+    assert 'y_total{k="a\\"b"} 1' in c.render()
@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.models.interface import model as M
+
+
+def test_keep_alive_em_segundos():
+    assert M._keep_alive_seconds("30m") == 1800
+    assert M._keep_alive_seconds("2h") == 7200
+    assert M._keep_alive_seconds("600") == 600
+    assert M._keep_alive_seconds("-1") == -1
+
+
+def test_um_cliente_por_modelo_com_o_mesmo_pool():
+    a = M.get_chat_model("qwen3:0.6b")
+    assert M.get_chat_model("qwen3:0.6b") is a
+    b = M.get_chat_model("qwen3:4b")
+    assert b is not a
+    options = M._client_options()
+    assert options["sync_client_kwargs"]["transport"] is M._sync_transport()
+    assert options["async_client_kwargs"]["transport"] is M._async_transport()
+    # embeddings usam o mesmo transport (mesmo pool de conexões)
+    assert (
+        M.get_embedding_model("nomic-embed-text").sync_client_kwargs["transport"]
+        is M._sync_transport()
+    )
+
+
+def _responses(monkeypatch, outcomes):
+    calls = []
+
+    def handle(self, request):
+        calls.append(request)
+        outcome = outcomes[len(calls) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, request=request)
+
+    monkeypatch.setattr(httpx.HTTPTransport, "handle_request", handle)
+    monkeypatch.setattr(M, "_backoff", lambda attempt: 0)
+    return calls
+
+
+def test_retry_em_falha_de_conexao_e_fila_cheia(monkeypatch):
+    calls = _responses(monkeypatch, [httpx.ConnectError("recusada"), 503, 200])
+    response = M._RetryTransport().handle_request(httpx.Request("POST", "http://o/api"))
+    assert response.status_code == 200 and len(calls) == 3
+
+
+def test_sem_retry_em_timeout_de_leitura(monkeypatch):
+    calls = _responses(monkeypatch, [httpx.ReadTimeout("lento"), 200])
+    with pytest.raises(httpx.ReadTimeout):
+        M._RetryTransport().handle_request(httpx.Request("POST", "http://o/api"))
+    assert len(calls) == 1
+
+
+def test_sem_retry_em_504_do_proxy(monkeypatch):
+    calls = _responses(monkeypatch, [504, 200])
+    response = M._RetryTransport().handle_request(httpx.Request("POST", "http://o/api"))
+    assert response.status_code == 504 and len(calls) == 1
+
+
+def test_desiste_depois_das_tentativas(monkeypatch):
+    monkeypatch.setattr(M, "OLLAMA_RETRIES", 2)
+    calls = _responses(monkeypatch, [503, 503, 503, 200])
+    response = M._RetryTransport().handle_request(httpx.Request("POST", "http://o/api"))
+    assert response.status_code == 503 and len(calls) == 3
+
+
+def test_modelo_por_agente(monkeypatch):
+    monkeypatch.setitem(M.AGENT_MODELS, "Agente de Normas", "qwen3:4b")
+    monkeypatch.setattr(M, "MODEL_FALLBACK", "qwen3:0.6b")
+    assert M.export_model("Agente de Normas") == "qwen3:4b"
+    assert M.export_model("Agente Supervisor") == M.OLLAMA_MODEL
+    assert M.export_model() == M.OLLAMA_MODEL
+    assert {"qwen3:4b", "qwen3:0.6b"} <= set(M.configured_models())
+
+
+def test_sem_fallback_distinto_usa_o_cliente_compartilhado(monkeypatch):
+    monkeypatch.setattr(M, "MODEL_FALLBACK", "")
+    assert M.get_agent_model("Agente Supervisor") is M.get_chat_model()
+
+
+def test_ocupado_levanta_model_unavailable():
+    guarded = M.GuardedChatOllama(model="teste-ocupado", max_inflight=1)
+    with guarded._slot():
+        with pytest.raises(M.ModelUnavailable):
+            with guarded._slot():
+                pass
+    # o slot é devolvido mesmo quando a chamada falha
+    assert M._inflight["teste-ocupado"] == 0
+
+
+def test_slo_estourado_cai_para_o_fallback(monkeypatch):
+    from langchain_core.language_models import FakeListChatModel
+    from langchain_ollama import ChatOllama
+
+    async def slow(self, *args, **kwargs):
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(ChatOllama, "_agenerate", slow)
+    monkeypatch.setitem(M.AGENT_MODELS, "Agente de Normas", "qwen3:4b")
+    monkeypatch.setattr(M, "MODEL_FALLBACK", "qwen3:0.6b")
+    monkeypatch.setattr(M, "MODEL_SLO_SECONDS", 0.05)
+    monkeypatch.setattr(
+        M, "get_chat_model", lambda model=None: FakeListChatModel(responses=["ok"])
+    )
+    M._guarded_model.cache_clear()
+    try:
+        model = M.get_agent_model("Agente de Normas")
+        answer = asyncio.run(model.ainvoke("oi"))
+    finally:
+        M._guarded_model.cache_clear()
+    assert answer.content == "ok"
@@ -0,0 +1,179 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.core.models.interface.occurrences import (
+    MISSING,
+    OccurrenceStore,
+    build_store,
+    read_occurrences,
+)
+
+
+def _write(path, header, rows):
+    path.write_text(
+        "\n".join([";".join(header)] + [";".join(map(str, r)) for r in rows]) + "\n",
+        encoding="utf-8",
+    )
+    return str(path)
+
+
+@pytest.fixture
+def cenipa(tmp_path):
+    ocorrencia = _write(
+        tmp_path / "ocorrencia.csv",
+        [
+            "codigo_ocorrencia",
+            "ocorrencia_classificacao",
+            "ocorrencia_uf",
+            "ocorrencia_dia",
+        ],
+        [
+            (1, "ACIDENTE", "SP", "23/05/2019"),
+            (2, "INCIDENTE", "RJ", "01/02/2020"),
+            (3, "ACIDENTE", "***", "10/10/2020"),
+        ],
+    )
+    tipo = _write(
+        tmp_path / "ocorrencia_tipo.csv",
+        ["codigo_ocorrencia1", "ocorrencia_tipo"],
+        [(1, "PERDA DE CONTROLE"), (1, "FALHA DO MOTOR"), (2, "FALHA DO MOTOR")],
+    )
+    aeronave = _write(
+        tmp_path / "aeronave.csv",
+        ["codigo_ocorrencia2", "aeronave_tipo_veiculo", "aeronave_fatalidades_total"],
+        [(1, "AVIÃO", 1), (1, "HELICÓPTERO", 2), (2, "AVIÃO", 0), (3, "AVIÃO", 4)],
+    )
+    paths = [ocorrencia, tipo, aeronave]
+    out = str(tmp_path / "oc.npz")
+    build_store(paths, out)
+    return paths, OccurrenceStore(out)
+
+
+def test_read_guarda_todos_os_valores(cenipa):
+    paths, _ = cenipa
+    first = read_occurrences(paths)[0]
+    assert first["tipo"] == ["PERDA DE CONTROLE", "FALHA DO MOTOR"]
+    assert first["categoria"] == ["AVIÃO", "HELICÓPTERO"]
+    assert first["fatalidades"] == 3
+    assert first["fatalidades:categoria"] == {"AVIÃO": 1, "HELICÓPTERO": 2}
+
+
+def test_ocorrencia_conta_em_cada_tipo_e_uma_vez_no_total(cenipa):
+    _, store = cenipa
+    groups, total = store.aggregate(["tipo"])
+    assert dict(groups) == {
+        ("FALHA DO MOTOR",): 2,
+        ("PERDA DE CONTROLE",): 1,
+        (MISSING,): 1,
+    }
+    assert total == 3
+    groups, total = store.aggregate(["tipo"], filters={"classificacao": "acidente"})
+    assert dict(groups) == {
+        ("FALHA DO MOTOR",): 1,
+        ("PERDA DE CONTROLE",): 1,
+        (MISSING,): 1,
+    }
+    assert total == 2
+
+
+def test_fatalidades_divididas_por_aeronave(cenipa):
+    _, store = cenipa
+    groups, total = store.aggregate(["categoria"], metric="fatalidades")
+    assert dict(groups) == {("AVIÃO",): 5, ("HELICÓPTERO",): 2}
+    assert total == 7
+    _, total = store.aggregate(
+        filters={"categoria": "helicoptero"}, metric="fatalidades"
+    )
+    assert total == 2
+    groups, _ = store.aggregate(
+        ["categoria"], filters={"categoria": "aviao"}, metric="fatalidades"
+    )
+    # o filtro restringe os pares: o helicóptero da ocorrência 1 não aparece
+    assert dict(groups) == {("AVIÃO",): 5}
+
+
+def test_filtro_em_dimensao_multipla(cenipa):
+    _, store = cenipa
+    _, total = store.aggregate(filters={"tipo": "perda de controle"})
+    assert total == 1
+    groups, _ = store.aggregate(["categoria"], filters={"tipo": "falha"})
+    assert dict(groups) == {("AVIÃO",): 2, ("HELICÓPTERO",): 1}
+
+
+def test_agrupamento_por_ano_e_faixa(cenipa):
+    _, store = cenipa
+    groups, total = store.aggregate(["ano"])
+    assert groups == [(("2019",), 1), (("2020",), 2)]
+    _, total = store.aggregate(year_from=2020, year_to=2020)
+    assert total == 2
+    groups, _ = store.aggregate(["uf", "categoria"], year_from=2020)
+    assert dict(groups) == {("RJ", "AVIÃO"): 1, (MISSING, "AVIÃO"): 1}
+
+
+def test_valores_invalidos(cenipa):
+    _, store = cenipa
+    with pytest.raises(ValueError):
+        store.aggregate(["piloto"])
+    with pytest.raises(ValueError):
+        store.aggregate(metric="feridos")
+    with pytest.raises(ValueError, match="não encontrado"):
+        store.aggregate(filters={"uf": "XX"})
+
+
+def test_confere_com_referencia_python(tmp_path):
+    random.seed(7)
+    tipos = ["A", "B", "C"]
+    categorias = ["AVIÃO", "HELICÓPTERO"]
+    occ, tp, ac = [], [], []
+    for i in range(300):
+        occ.append((i, random.choice(["ACIDENTE", "INCIDENTE"]), "SP", "2020"))
+        for t in random.sample(tipos, random.randint(1, 2)):
+            tp.append((i, t))
+        for _ in range(random.randint(1, 2)):
+            ac.append((i, random.choice(categorias), random.randint(0, 2)))
+    paths = [
+        _write(
+            tmp_path / "o.csv",
+            [
+                "codigo_ocorrencia",
+                "ocorrencia_classificacao",
+                "ocorrencia_uf",
+                "ocorrencia_ano",
+            ],
+            occ,
+        ),
+        _write(tmp_path / "t.csv", ["codigo_ocorrencia1", "ocorrencia_tipo"], tp),
+        _write(
+            tmp_path / "a.csv",
+            [
+                "codigo_ocorrencia2",
+                "aeronave_tipo_veiculo",
+                "aeronave_fatalidades_total",
+            ],
+            ac,
+        ),
+    ]
+    build_store(paths, str(tmp_path / "oc.npz"))
+    store = OccurrenceStore(str(tmp_path / "oc.npz"))
+
+    acidentes = {i for i, c, _, _ in occ if c == "ACIDENTE"}
+    expected = {}
+    for i, t in tp:
+        if i in acidentes:
+            for c in {c for j, c, _ in ac if j == i}:
+                expected[(t, c)] = expected.get((t, c), 0) + 1
+    groups, total = store.aggregate(
+        ["tipo", "categoria"], filters={"classificacao": "acidente"}, top=100
+    )
+    assert dict(groups) == expected
+    assert total == len(acidentes)
+
+    fatal = {}
+    for _, c, k in ac:
+        fatal[c] = fatal.get(c, 0) + k
+    groups, total = store.aggregate(["categoria"], metric="fatalidades")
+    assert {k[0]: v for k, v in groups} == fatal
+    assert total == sum(k for _, _, k in ac)
+    assert np.isclose(sum(v for _, v in groups), total)
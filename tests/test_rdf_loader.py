@@ -0,0 +1,188 @@
+import gzip
+
+import pytest
+
+from app.core.models.interface import rdf_loader as L
+
+TTL = """@prefix ex: <http://ex.org/> .
+# comentário com . e [ colchete
+ex:a ex:p "texto com . ponto" ;
+    ex:q <http://ex.org/x.y> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+ex:b ex:p _:n1 .
+_:n1 ex:v \"\"\"longo
+com . e [ dentro\"\"\" .
+ex:c ex:p [ ex:q 1 ] , ( ex:d "e"^^xsd:string ) .
+[ ex:only ex:x ] .
+ex:f ex:p ex:g .
+"""
+
+
+@pytest.fixture
+def ttl(tmp_path):
+    path = tmp_path / "dados.ttl"
+    path.write_text(TTL, encoding="utf-8")
+    return str(path)
+
+
+def test_scanner_fim_de_statement():
+    scanner = L._TurtleScanner("http://sk/")
+    assert scanner.feed('ex:a ex:p "a . b" ;\n') == ('ex:a ex:p "a . b" ;\n', False)
+    assert scanner.feed("  ex:q ex:r .\n")[1] is True
+    assert scanner.feed('ex:a ex:p """x .\n')[1] is False
+    assert scanner.feed('y""" .\n')[1] is True
+    text, ended = scanner.feed("_:b1 ex:p ex:o.\n")
+    assert text == "<http://sk/b1> ex:p ex:o.\n" and ended
+
+
+def test_lotes_com_prefixos_e_statements_inteiros(ttl):
+    batches = list(L.iter_batches(ttl, batch_size=2))
+    assert [count for _, count, _, _ in batches] == [2, 2, 2]
+    for body, _, _, header in batches:
+        assert body.decode().startswith("@prefix ex:")
+    # @prefix declarado no meio do arquivo vale dos lotes seguintes em diante
+    assert len(batches[0][3]) == 2
+    assert batches[-1][2] == len(TTL.encode("utf-8"))
+
+
+def test_prefixo_chamado_base_nao_e_diretiva(tmp_path):
+    header = [
+        "@prefix base: <http://b/> .\n",
+        "PREFIX ex: <http://ex.org/>\n",
+        "prefix prefix: <http://p/>\n",
+    ]
+    path = tmp_path / "base.ttl"
+    path.write_text(
+        "".join(header) + "base:x ex:p ex:o ;\n    ex:q ex:r .\n"
+        "prefix:y ex:p ex:o .\nex:a ex:p ex:b .\n",
+        encoding="utf-8",
+    )
+    batches = list(L.iter_batches(str(path), batch_size=1))
+    assert [count for _, count, _, _ in batches] == [1, 1, 1]
+    assert batches[-1][3] == header
+    assert batches[-1][0].decode() == "".join(header) + "ex:a ex:p ex:b .\n"
+    rdflib = pytest.importorskip("rdflib")
+    for body, *_ in batches:
+        rdflib.Graph().parse(data=body.decode(), format="turtle")
+
+
+def test_retomar_do_offset_gera_o_mesmo_conteudo(ttl):
+    full = list(L.iter_batches(ttl, batch_size=2))
+    _, _, offset, prefixes = full[0]
+    resumed = list(L.iter_batches(ttl, 2, offset, prefixes))
+    assert [b for b, *_ in resumed] == [b for b, *_ in full[1:]]
+
+
+def test_blank_nodes_viram_iris_estaveis(ttl):
+    bodies = b"".join(b for b, *_ in L.iter_batches(ttl, 2)).decode()
+    assert "_:" not in bodies
+    assert "[ ex:" not in bodies and "( ex:" not in bodies
+    again = b"".join(b for b, *_ in L.iter_batches(ttl, 1)).decode()
+    iris = lambda text: {w for w in text.split() if L.SKOLEM_BASE in w}
+    assert iris(bodies) == iris(again)
+
+
+def test_anonimos_equivalem_ao_original(ttl):
+    rdflib = pytest.importorskip("rdflib")
+    from rdflib.compare import isomorphic
+
+    original = rdflib.Graph().parse(ttl, format="turtle")
+    loaded = rdflib.Graph()
+    for body, *_ in L.iter_batches(ttl, 2):
+        loaded.parse(data=body.decode(), format="turtle")
+    # reenviar um lote (retry/retomada) não acrescenta triplas
+    loaded.parse(data=next(L.iter_batches(ttl, 2))[0].decode(), format="turtle")
+    nodes = {}
+    back = rdflib.Graph()
+    for triple in loaded:
+        back.add(
+            tuple(
+                nodes.setdefault(t, rdflib.BNode()) if L.SKOLEM_BASE in str(t) else t
+                for t in triple
+            )
+        )
+    assert isomorphic(original, back)
+
+
+def test_ntriples_gzip(tmp_path):
+    path = tmp_path / "dados.nt.gz"
+    lines = [f"<http://ex.org/s{i}> <http://ex.org/p> _:b{i} .\n" for i in range(5)]
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("# cabeçalho\n" + "".join(lines))
+    batches = list(L.iter_batches(str(path), batch_size=2))
+    assert [count for _, count, _, _ in batches] == [2, 2, 1]
+    assert b"_:" not in b"".join(b for b, *_ in batches)
+
+
+class FlakyLoader(L.BulkLoader):
+    def __init__(self, fail_at, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_at, self.sent = fail_at, []
+
+    def _send(self, body, fmt, graph, replace):
+        if len(self.sent) == self.fail_at:
+            self.fail_at = None
+            raise RuntimeError("GSP HTTP 500")
+        self.sent.append((body, replace))
+
+
+def test_carga_retoma_do_ultimo_lote(ttl, tmp_path):
+    progress = str(tmp_path / "progress.json")
+    loader = FlakyLoader(1, batch_size=2, progress=L.LoadProgress(progress))
+    with pytest.raises(RuntimeError):
+        loader.load_file(ttl, "http://g")
+    assert len(loader.sent) == 1
+
+    loader.progress = L.LoadProgress(progress)
+    # retomada com --replace não apaga o lote que já entrou
+    assert loader.load([(ttl, "http://g")], replace=True)
+    assert [replace for _, replace in loader.sent] == [False, False, False]
+    assert loader.load_file(ttl, "http://g") == 0
+
+    # lote de outro tamanho: recomeça do início
+    other = FlakyLoader(None, batch_size=3, progress=L.LoadProgress(progress))
+    assert other.load_file(ttl, "http://g") == 6
+
+
+def test_replace_limpa_cada_grafo_uma_vez(ttl, tmp_path):
+    other = tmp_path / "outro.ttl"
+    other.write_text("@prefix ex: <http://ex.org/> .\nex:z ex:p ex:o .\n")
+    loader = FlakyLoader(
+        None, batch_size=2, workers=4, progress=L.LoadProgress(str(tmp_path / "p"))
+    )
+    sent = []
+    loader._send = lambda body, fmt, graph, replace: sent.append((graph, replace, body))
+    jobs = [(ttl, "default"), (str(other), "default"), (str(other), "http://g")]
+    assert loader.load(jobs, replace=True)
+    puts = [(graph, body) for graph, replace, body in sent if replace]
+    assert sorted(puts) == [("default", b""), ("http://g", b"")]
+    # as limpezas vêm antes de qualquer lote
+    assert all(replace for _, replace, _ in sent[:2])
+    assert len(sent) == 2 + 3 + 1 + 1
+
+
+def test_graph_for_e_parse_job():
+    assert L.graph_for("seed/voos.nt.gz") == f"{L.SPARQL_GRAPH_BASE}voos"
+    assert L.parse_job("a.ttl=default") == ("a.ttl", "default")
+    assert L.parse_job("a.ttl") == ("a.ttl", f"{L.SPARQL_GRAPH_BASE}a")
+
+
+def test_invalida_cache_da_api(monkeypatch):
+    calls = []
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr(
+        L.requests, "post", lambda url, timeout: calls.append(url) or Response()
+    )
+    assert L.invalidate_api_cache("") is False
+    assert L.invalidate_api_cache("http://api/cache/sparql/invalidate") is True
+    assert calls == ["http://api/cache/sparql/invalidate"]
+
+    from app.api.handler import invalidate_sparql_cache
+
+    before = invalidate_sparql_cache()
+    if before["enabled"]:
+        assert invalidate_sparql_cache()["invalidations"] == before["invalidations"] + 1
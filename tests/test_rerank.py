@@ -0,0 +1,68 @@
+import time
+
+from langchain_core.documents import Document
+
+from app.core.tools.norms.rerank import LexicalScorer, Reranker
+
+
+def docs(*texts):
+    return [
+        Document(page_content=t, metadata={"doc_id": f"d{i}"})
+        for i, t in enumerate(texts)
+    ]
+
+
+def test_scorer_lexical_prefere_numero_citado_e_frase():
+    scorer = LexicalScorer()
+    a, b, c = scorer.score(
+        "multa do art. 302",
+        ["Art. 302 A multa será aplicada.", "A multa do art. 12.", "Sem relação."],
+    )
+    assert a > b > c == 0.0
+    assert scorer.score("de a o", ["qualquer"]) == [0.0]
+
+
+def test_reordena_por_score():
+    reranker = Reranker(LexicalScorer(), budget_ms=1000)
+    candidates = docs("jornada do tripulante", "nada", "multa art. 302 multa")
+    out = reranker.rerank("multa art. 302", candidates, top_n=2)
+    assert [d.metadata["doc_id"] for d in out] == ["d2", "d0"]
+
+
+class SlowScorer:
+    def __init__(self, delay):
+        self.delay, self.calls = delay, 0
+
+    def score(self, query, texts):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [float(len(t)) for t in texts]
+
+
+def test_orcamento_estourado_mantem_ordem_da_fusao():
+    scorer = SlowScorer(0.03)
+    reranker = Reranker(scorer, budget_ms=10, batch_size=2)
+    candidates = docs("a", "bb", "ccc", "dddd", "eeeee")
+    out = reranker.rerank("q", candidates, top_n=5)
+    # só o primeiro lote foi pontuado; o resto segue a ordem original
+    assert [d.page_content for d in out] == ["bb", "a", "ccc", "dddd", "eeeee"]
+    assert scorer.calls == 1 and reranker.over_budget == 1
+
+
+def test_scores_em_cache_por_consulta_e_chunk():
+    scorer = SlowScorer(0)
+    reranker = Reranker(scorer, budget_ms=1000, batch_size=10)
+    candidates = docs("a", "bb")
+    reranker.rerank("Consulta!", candidates, top_n=2)
+    reranker.rerank("consulta", candidates, top_n=2)
+    assert scorer.calls == 1
+    assert reranker.stats()["hits"] == 2
+
+
+def test_falha_do_scorer_mantem_ordem():
+    class Broken:
+        def score(self, query, texts):
+            raise RuntimeError("modelo indisponível")
+
+    candidates = docs("a", "b", "c")
+    assert Reranker(Broken()).rerank("q", candidates, top_n=2) == candidates[:2]
@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from app.core.config import router as R
+
+VOCAB = ["voo", "atraso", "lei", "jornada", "chuva", "vento"]
+
+
+class BagEmbeddings:
+    """Vetor = contagem das palavras de VOCAB (determinístico, sem Ollama)."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        words = R.normalize(text).split()
+        return [float(words.count(w)) for w in VOCAB]
+
+
+class Broken:
+    def embed_documents(self, texts):
+        raise ConnectionError("ollama fora do ar")
+
+    embed_query = embed_documents
+
+
+class Agent:
+    def __init__(self, name, keywords, examples):
+        self.name = name
+        self.route_keywords = keywords
+        self.route_examples = examples
+
+
+AGENTS = [
+    Agent("Voos", ("número do voo",), ["atraso do voo", "voo atrasado voo"]),
+    Agent("Normas", ("lei do aeronauta", "art."), ["jornada lei", "lei jornada"]),
+    Agent("Clima", ("metar",), ["chuva vento", "vento chuva"]),
+]
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(R, "get_embeddings", lambda: BagEmbeddings())
+    return R.FastPathRouter(AGENTS, threshold=0.7, margin=0.05)
+
+
+def test_palavra_chave_de_um_agente_so(router):
+    assert router.route("O que diz a Lei do Aeronauta?") == "Normas"
+    assert router.route("METAR de SBGR agora") == "Clima"
+
+
+def test_palavra_chave_inteira_sem_acento(router):
+    # "art." não casa dentro de "partida"
+    assert router._keyword_route(R.normalize("horário de partida")) is None
+    assert router._keyword_route(R.normalize("NÚMERO DO VOO 123")) == "Voos"
+
+
+def test_palavras_de_dois_agentes_vao_para_o_supervisor(router):
+    assert router._keyword_route(R.normalize("metar e lei do aeronauta")) is None
+
+
+def test_embedding_com_confianca(router):
+    assert router.route("teve atraso no voo") == "Voos"
+    # sem termo conhecido: similaridade zero, supervisor decide
+    assert router.route("bom dia") is None
+
+
+def test_embedding_sem_folga_para_o_segundo(router):
+    # empate entre "voo" e "chuva"
+    assert router.route("voo chuva") is None
+
+
+def test_sem_embeddings_segue_so_com_palavras_e_volta(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(R, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    backend = [Broken()]
+    monkeypatch.setattr(R, "get_embeddings", lambda: backend[0])
+    router = R.FastPathRouter(AGENTS, cooldown=5)
+    router.prime()
+    assert router.route("atraso do voo") is None
+    assert router.route("metar") == "Clima"
+
+    # Ollama voltou, mas ainda no cooldown: nem tenta
+    backend[0] = BagEmbeddings()
+    now[0] += 4
+    assert router.route("atraso do voo") is None
+    now[0] += 2
+    assert router.route("atraso do voo") == "Voos"
+
+
+def test_no_do_grafo(router, monkeypatch):
+    monkeypatch.setattr(R, "ROUTER_ENABLED", True)
+    assert router({"messages": [{"role": "user", "content": "metar"}]}) == {
+        "route": "Clima"
+    }
+    # última mensagem não é do usuário: não roteia
+    assert router({"messages": [AIMessage("metar")]}) == {"route": None}
+    monkeypatch.setattr(R, "ROUTER_ENABLED", False)
+    assert router({"messages": [{"role": "user", "content": "metar"}]}) == {
+        "route": None
+    }
@@ -0,0 +1,102 @@
+import pytest
+
+from app.core.models.interface.triplestore import (
+    Triplestore,
+    page_window,
+    paginate,
+    tsv_term,
+)
+from app.core.tools.sparql.query import build_sparql_tool, query_form
+
+
+class FakeStore:
+    """iter_select sobre N linhas em memória, com a mesma paginação do Fuseki."""
+
+    def __init__(self, n):
+        self.rows = [{"v": f"v{i}"} for i in range(n)]
+
+    def iter_select(self, query, limit=None, offset=0):
+        _, limit, offset = page_window(query, limit, offset)
+        end = None if limit is None else offset + limit
+        for row in self.rows[offset:end]:
+            yield ["v"], row
+
+
+def test_paginate_without_own_modifiers():
+    assert paginate("SELECT * WHERE {?s ?p ?o}", 101, 200) == (
+        "SELECT * WHERE {?s ?p ?o}\nLIMIT 101\nOFFSET 200"
+    )
+
+
+def test_paginate_clamps_own_limit_by_page_offset():
+    q = "SELECT * WHERE {?s ?p ?o} LIMIT 10"
+    assert page_window(q, 101, 100) == ("SELECT * WHERE {?s ?p ?o}", 0, 100)
+    assert page_window(q, 3, 4)[1:] == (3, 4)
+    assert page_window(q, 101, 4)[1:] == (6, 4)
+
+
+def test_paginate_adds_own_offset():
+    q = "SELECT * WHERE {?s ?p ?o} LIMIT 500 OFFSET 10"
+    assert paginate(q, 101, 200).endswith("LIMIT 101\nOFFSET 210")
+
+
+def test_paginate_keeps_subquery_modifiers():
+    q = "SELECT * WHERE { { SELECT ?s WHERE {?s ?p ?o} LIMIT 5 } }"
+    assert paginate(q, 11) == q + "\nLIMIT 11"
+
+
+def test_tsv_term():
+    assert tsv_term("<http://x>") == "http://x"
+    assert tsv_term('"Voo 1"@pt') == "Voo 1"
+    assert tsv_term('"a\\tb"^^<http://www.w3.org/2001/XMLSchema#string>') == "a\tb"
+    assert tsv_term("42") == "42"
+    assert tsv_term("_:b0") == "_:b0"
+
+
+@pytest.mark.parametrize(
+    "query, form",
+    [
+        ("PREFIX ex: <http://ex.org/>\n# c\nselect ?x {}", "SELECT"),
+        ("prefix : <a>\nINSERT DATA {}", "INSERT"),
+        ("BASE <http://b/> ASK {}", "ASK"),
+    ],
+)
+def test_query_form(query, form):
+    assert query_form(query) == form
+
+
+def test_tool_pages_and_signals_more():
+    tool = build_sparql_tool(FakeStore(250), max_rows=100)
+    first = tool.invoke({"sparql": "SELECT ?v WHERE {?v ?p ?o}"}).splitlines()
+    assert first[0] == "v" and len(first) == 102
+    assert "page=1" in first[-1]
+    last = tool.invoke({"sparql": "SELECT ?v WHERE {?v ?p ?o}", "page": 2})
+    assert "mais resultados" not in last
+    assert len(last.splitlines()) == 51
+
+
+def test_tool_respects_query_limit_across_pages():
+    store = FakeStore(1000)
+    tool = build_sparql_tool(store, max_rows=100)
+    q = "SELECT ?v WHERE {?v ?p ?o} LIMIT 250"
+    page2 = tool.invoke({"sparql": q, "page": 2})
+    assert "mais resultados" not in page2
+    assert page2.splitlines()[-1] == "v249"
+    assert tool.invoke({"sparql": q, "page": 3}) == "Página 3 vazia."
+
+
+def test_tool_blocks_writes_when_read_only():
+    tool = build_sparql_tool(FakeStore(0))
+    out = tool.invoke({"sparql": "DELETE WHERE {?s ?p ?o}"})
+    assert out.startswith("Escrita bloqueada")
+
+
+def test_page_past_query_limit_skips_request(monkeypatch):
+    store = Triplestore(query_url="http://127.0.0.1:9/ds/query", cache_size=0)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("não deveria consultar o Fuseki")
+
+    monkeypatch.setattr(store, "_post_query", fail)
+    q = "SELECT ?v WHERE {?v ?p ?o} LIMIT 10"
+    assert list(store.iter_select(q, limit=101, offset=100)) == []
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+from app.core.config.trace import Trace
+from app.core.config.utils import astream_graph
+
+SUP = "Agente Supervisor"
+NORMAS = "Agente de Normas"
+
+
+class Graph:
+    """astream com uma sequência fixa de (ns, modo, dados), como o LangGraph."""
+
+    def __init__(self, steps, error=None):
+        self.steps = steps
+        self.error = error
+
+    async def astream(self, payload, config, subgraphs, stream_mode):
+        assert subgraphs and stream_mode == ["updates", "messages"]
+        for step in self.steps:
+            yield step
+        if self.error:
+            raise self.error
+
+
+def token(ns, text):
+    return ns, "messages", (AIMessageChunk(text), {"langgraph_node": "agent"})
+
+
+def call(name, args, id):
+    return AIMessage("", tool_calls=[{"name": name, "args": args, "id": id}])
+
+
+SUP_NS = (f"{SUP}:t1",)
+NORMAS_NS = (f"{NORMAS}:t2",)
+STEPS = [
+    ((), "updates", {"router": {"route": None}}),
+    token(SUP_NS, "vou transferir"),
+    (
+        SUP_NS,
+        "updates",
+        {"agent": {"messages": [call(f"transfer_to_{NORMAS}", {}, "1")]}},
+    ),
+    (
+        SUP_NS,
+        "updates",
+        {
+            "tools": {
+                "messages": [
+                    ToolMessage("ok", name=f"transfer_to_{NORMAS}", tool_call_id="1")
+                ]
+            }
+        },
+    ),
+    (
+        NORMAS_NS,
+        "updates",
+        {"agent": {"messages": [call("norms", {"query": "jornada"}, "2")]}},
+    ),
+    (
+        NORMAS_NS,
+        "updates",
+        {
+            "tools": {
+                "messages": [ToolMessage("x" * 50, name="norms", tool_call_id="2")]
+            }
+        },
+    ),
+    token(NORMAS_NS, "12 "),
+    token(NORMAS_NS, ""),
+    token(NORMAS_NS, "horas"),
+    ((), "updates", {NORMAS: {"messages": [AIMessage("12 horas")]}}),
+    token(SUP_NS, "A jornada é de 12 horas."),
+    ((), "updates", {SUP: {"messages": [AIMessage("A jornada é de 12 horas.")]}}),
+]
+
+
+def collect(graph, trace=None):
+    async def main():
+        return [e async for e in astream_graph(graph, {}, SUP, trace=trace)]
+
+    return asyncio.run(main())
+
+
+def test_eventos_na_ordem():
+    trace = Trace("jornada")
+    events = collect(Graph(STEPS), trace)
+    assert events == [
+        {"event": "handoff", "to": NORMAS},
+        {
+            "event": "tool_call",
+            "agent": NORMAS,
+            "name": "norms",
+            "args": {"query": "jornada"},
+        },
+        {"event": "tool_result", "agent": NORMAS, "name": "norms", "chars": 50},
+        {"event": "token", "agent": NORMAS, "content": "12 "},
+        {"event": "token", "agent": NORMAS, "content": "horas"},
+        {"event": "done", "answer": "A jornada é de 12 horas."},
+    ]
+    assert trace.answer == "A jornada é de 12 horas."
+
+
+def test_rota_do_roteador_rapido():
+    steps = [
+        ((), "updates", {"router": {"route": NORMAS}}),
+        token(NORMAS_NS, "12 horas"),
+        ((), "updates", {NORMAS: {"messages": [AIMessage("12 horas")]}}),
+    ]
+    events = collect(Graph(steps))
+    assert events[0] == {"event": "handoff", "to": NORMAS, "via": "router"}
+    assert events[-1] == {"event": "done", "answer": "12 horas"}
+
+
+def test_erro_no_meio_fecha_o_trace():
+    trace = Trace("jornada")
+    with pytest.raises(ConnectionError):
+        collect(Graph(STEPS[:3], error=ConnectionError("ollama caiu")), trace)
+    assert "ollama caiu" in trace.error
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from langgraph.graph import END
+
+from app.core.config import supervisor as S
+
+
+class FakeBuilder:
+    def compile(self, checkpointer=None):
+        return ("grafo", checkpointer, object())
+
+
+def test_grafo_construido_uma_vez_e_compartilhado(monkeypatch):
+    builds = []
+
+    def build():
+        time.sleep(0.05)  # threads chegam juntas enquanto constrói
+        builds.append(1)
+        return FakeBuilder()
+
+    monkeypatch.setattr(S, "build_graph_builder", build)
+    monkeypatch.setattr(S, "_builder", None)
+    monkeypatch.setattr(S, "_supervisor", None)
+
+    graphs = []
+    threads = [
+        threading.Thread(target=lambda: graphs.append(S.get_supervisor()))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(builds) == 1
+    assert all(g is graphs[0] for g in graphs)
+
+    # sessões reaproveitam os mesmos agentes, só com outro checkpointer
+    session = S.get_session_supervisor("checkpointer")
+    assert session[1] == "checkpointer"
+    assert len(builds) == 1
+
+
+def test_rotas_do_grafo():
+    assert S._after_router({"route": None}) == S.SUPERVISOR_NAME
+    assert S._after_router({"route": "Agente de Normas"}) == "Agente de Normas"
+    # rota direta termina no especialista; senão volta ao supervisor
+    assert S._after_specialist({"route": "Agente de Normas"}) == END
+    assert S._after_specialist({}) == S.SUPERVISOR_NAME
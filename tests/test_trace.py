@@ -0,0 +1,79 @@
+import uuid
+
+from langgraph.errors import GraphBubbleUp
+
+from app.core.config.trace import Trace, TraceStore, node_name
+
+
+def _meta(node, ns):
+    return {"langgraph_node": node, "langgraph_checkpoint_ns": ns}
+
+
+def visit_agent(cb, agent="Agente de Normas"):
+    """Nó do agente no grafo do supervisor + subgrafo compilado com o mesmo nome."""
+    ns = f"{agent}:1"
+    outer, inner, hook = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    cb.on_chain_start(None, {}, run_id=outer, metadata=_meta(agent, ns), name=agent)
+    cb.on_chain_start(
+        None,
+        {},
+        run_id=inner,
+        parent_run_id=outer,
+        metadata=_meta(agent, ns),
+        name=agent,
+    )
+    cb.on_chain_start(
+        None,
+        {},
+        run_id=hook,
+        parent_run_id=inner,
+        metadata=_meta("agent", f"{ns}|agent:2"),
+        name="agent",
+    )
+    cb.on_chain_end({}, run_id=hook)
+    cb.on_chain_end({}, run_id=inner)
+    cb.on_chain_end({}, run_id=outer)
+
+
+def test_node_name_filters_internal_and_nested_runs():
+    meta = _meta("router", "router:1")
+    assert node_name(meta, "router") == "router"
+    assert node_name(meta, "RunnableSequence") is None
+    assert node_name(meta, "router", parent_node="router") is None
+    assert node_name({}, "router") is None
+
+
+def test_trace_records_one_span_per_agent_visit():
+    trace = Trace("q")
+    visit_agent(trace)
+    visit_agent(trace)
+    spans = [(n["agent"], n["node"]) for n in trace.nodes]
+    assert spans.count(("Agente de Normas", "Agente de Normas")) == 2
+    assert spans.count(("Agente de Normas", "agent")) == 2
+
+
+def test_handoff_is_not_an_error():
+    trace = Trace("q")
+    run = uuid.uuid4()
+    trace.on_chain_start(
+        None, {}, run_id=run, metadata=_meta("tools", "Sup:1|tools:2"), name="tools"
+    )
+    trace.on_chain_error(GraphBubbleUp(), run_id=run)
+    assert "error" not in trace.nodes[0]
+
+
+def test_trace_events_are_bounded():
+    trace = Trace("q", max_events=3)
+    for _ in range(10):
+        visit_agent(trace)
+    assert len(trace.nodes) == 3
+
+
+def test_trace_store_ring_buffer():
+    store = TraceStore(maxsize=2, jsonl_path="")
+    traces = [Trace(f"q{i}").finish("ok") for i in range(3)]
+    for t in traces:
+        store.add(t)
+    assert store.get(traces[0].id) is None
+    assert [t["id"] for t in store.recent()] == [traces[2].id, traces[1].id]
+    assert store.total == 3
@@ -0,0 +1,153 @@
+import io
+
+from app.core.models.interface.triplestore import Triplestore, normalize_sparql
+
+
+class FakeResponse:
+    # tamanho dos blocos entregues; None = o chunk_size pedido
+    chunk = None
+
+    def __init__(self, body: bytes, status: int = 200):
+        self.content = body
+        self.status_code = status
+        self.text = body.decode("utf-8")
+        self.read = 0
+
+    def iter_lines(self, decode_unicode=False):
+        yield from self.content.splitlines()
+
+    def iter_content(self, chunk_size=1):
+        chunk_size = self.chunk or chunk_size
+        for i in range(0, len(self.content), chunk_size):
+            self.read += 1
+            yield self.content[i : i + chunk_size]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def fake_store(monkeypatch, body: bytes) -> Triplestore:
+    store = Triplestore(
+        query_url="http://fuseki/ds/query", update_url="http://fuseki/ds/update"
+    )
+    store.posts = []
+
+    def post(url, data=None, **_):
+        store.posts.append((url, data))
+        store.last = FakeResponse(body)
+        return store.last
+
+    monkeypatch.setattr(store._session, "post", post)
+    return store
+
+
+def test_normalize_ignora_espacos_comentarios_e_prefixos():
+    a = """
+    PREFIX ex: <http://ex.org/>
+    PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+    # voos com atraso
+    SELECT ?v WHERE {
+        ?v   ex:atraso  ?a .
+    }
+    """
+    b = "PREFIX ex: <http://ex.org/> SELECT ?v WHERE{?v ex:atraso ?a .}"
+    assert normalize_sparql(a) == normalize_sparql(b)
+
+
+def test_normalize_preserva_literais_e_iris():
+    a = 'SELECT ?v WHERE { ?v ?p "dois  espaços # não é comentário" }'
+    b = 'SELECT ?v WHERE { ?v ?p "dois espaços # não é comentário" }'
+    assert normalize_sparql(a) != normalize_sparql(b)
+    assert "dois  espaços # não" in normalize_sparql(a)
+
+
+def test_select_repetido_sai_do_cache(monkeypatch):
+    store = fake_store(monkeypatch, b'?v\n"a"\n"b"\n')
+    q = "SELECT ?v WHERE { ?v ?p ?o }"
+    assert store.select(q) == [{"v": "a"}, {"v": "b"}]
+    assert store.select("SELECT ?v  WHERE {?v ?p ?o}  # de novo") == [
+        {"v": "a"},
+        {"v": "b"},
+    ]
+    assert len(store.posts) == 1
+    # outra página é outra chave
+    store.select(q, limit=1)
+    assert len(store.posts) == 2
+
+
+def test_select_interrompido_nao_entra_no_cache(monkeypatch):
+    store = fake_store(monkeypatch, b'?v\n"a"\n"b"\n')
+    q = "SELECT ?v WHERE { ?v ?p ?o }"
+    rows = store.iter_select(q)
+    next(rows)
+    rows.close()
+    store.select(q)
+    assert len(store.posts) == 2
+
+
+def test_update_esvazia_o_cache(monkeypatch):
+    store = fake_store(monkeypatch, b'{"boolean": true}')
+    q = "ASK { ?s ?p ?o }"
+    assert store.ask(q) and store.ask(q)
+    assert len(store.posts) == 1
+    store.update("INSERT DATA { <a> <b> <c> }")
+    assert store.cache_stats()["invalidations"] == 1
+    store.ask(q)
+    assert len(store.posts) == 3
+
+
+TURTLE = b"".join(
+    b"<http://ex.org/v%d> <http://ex.org/atraso> %d ;\n"
+    b'    <http://ex.org/nome> "voo %d" .\n' % (i, i, i)
+    for i in range(200)
+)
+NTRIPLES = b"".join(
+    b"<http://ex.org/v%d> <http://ex.org/p> %d .\n" % (i, i) for i in range(200)
+)
+
+
+def test_construct_corta_no_ultimo_statement_completo(monkeypatch):
+    monkeypatch.setattr(FakeResponse, "chunk", 100)
+    store = fake_store(monkeypatch, TURTLE)
+    graph = store.construct("CONSTRUCT WHERE { ?s ?p ?o }", max_bytes=1000)
+    body, note = graph.rsplit("# ", 1)
+    assert note == "truncado em 1000 bytes\n"
+    assert len(body.encode()) <= 1000 and body.endswith(" .\n")
+    assert TURTLE.startswith(body.encode())
+    # parou de ler a resposta logo depois do limite
+    assert store.last.read == 11
+
+
+def test_construct_ntriples_corta_por_linha(monkeypatch):
+    store = fake_store(monkeypatch, NTRIPLES)
+    graph = store.construct("CONSTRUCT WHERE { ?s ?p ?o }", fmt="nt", max_bytes=100)
+    lines = graph.splitlines()
+    assert lines[-1] == "# truncado em 100 bytes"
+    assert all(line.endswith(" .") for line in lines[:-1])
+
+
+def test_construct_dentro_do_limite_vem_inteiro(monkeypatch):
+    store = fake_store(monkeypatch, TURTLE)
+    assert store.construct("CONSTRUCT WHERE { ?s ?p ?o }") == TURTLE.decode()
+
+
+def test_construct_to_grava_em_blocos(monkeypatch):
+    store = fake_store(monkeypatch, TURTLE)
+    out = io.BytesIO()
+    assert store.construct_to("DESCRIBE <http://ex.org/v1>", out) == len(TURTLE)
+    assert out.getvalue() == TURTLE
+
+
+def test_tool_avisa_quando_o_grafo_foi_cortado(monkeypatch):
+    from app.core.tools.sparql.query import build_sparql_tool
+
+    store = fake_store(monkeypatch, TURTLE)
+    tool = build_sparql_tool(store, construct_max_bytes=500)
+    out = tool.invoke({"sparql": "CONSTRUCT WHERE { ?s ?p ?o }"})
+    assert out.endswith("ou use SELECT]")
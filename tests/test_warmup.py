@@ -0,0 +1,52 @@
+import asyncio
+
+from app.core.config import warmup as W
+
+
+def test_repete_o_passo_ate_dar_certo(monkeypatch):
+    monkeypatch.setattr(W, "WARMUP_RETRY_SECONDS", 0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("ollama fora do ar")
+
+    readiness = W.Readiness()
+    asyncio.run(readiness.run_step("chat:teste", flaky))
+    step = readiness.status()["steps"]["chat:teste"]
+    assert step["ok"] and step["attempts"] == 3
+    assert "error" not in readiness.status()
+
+
+def test_so_fica_pronto_depois_de_todos_os_passos(monkeypatch):
+    seen = []
+    readiness = W.Readiness()
+
+    def step(name):
+        def run():
+            assert not readiness.ready
+            seen.append(name)
+
+        return name, run
+
+    monkeypatch.setattr(W, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(W, "warmup_steps", lambda: [step("a"), step("b")])
+    assert not readiness.status()["ready"]
+    asyncio.run(readiness.warm_up())
+    assert seen == ["a", "b"] and readiness.status()["ready"]
+
+
+def test_um_passo_por_modelo_de_chat(monkeypatch):
+    monkeypatch.setattr(W, "configured_models", lambda: ["m1", "m2"])
+    names = [name for name, _ in W.warmup_steps()]
+    assert "chat:m1" in names and "chat:m2" in names
+    assert names[-2:] == ["retriever", "occurrences"]
+
+
+def test_base_de_ocorrencias_ausente_nao_segura_o_ready(monkeypatch):
+    def missing():
+        raise FileNotFoundError("sem csv")
+
+    monkeypatch.setattr(W, "get_occurrence_store", missing)
+    W._warm_occurrences()